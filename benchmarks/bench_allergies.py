@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark do registro de alergênios: gera classes de medicamentos com
+reatividade cruzada e verifica prescrições comparando as alergias do
+paciente, por nome, com o medicamento e as suas classes, e com o AND das
+máscaras do AllergenRegistry, calculadas uma vez por paciente.
+
+Uso: python benchmarks/bench_allergies.py [--families F] [--members M] [--checks N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_runtime import AllergenRegistry, normalize_name
+
+
+def generate_registry(families, members, rng):
+    """Classes family_<i> com membros drug_<i>_<j> e um par de reatividade cruzada por classe."""
+    groups = {
+        f"family_{family}": [f"drug_{family}_{member}" for member in range(members)]
+        for family in range(families)
+    }
+    cross = [(f"family_{family}", f"family_{rng.randrange(families)}") for family in range(families)]
+    return groups, cross
+
+
+def related_names(groups, cross, drug):
+    """Nomes que contraindicam drug: ele mesmo, as suas classes e as classes reativas."""
+    own = [family for family, members in groups.items() if drug in members]
+    names = [drug] + own
+    for first, second in cross:
+        if first in own:
+            names.append(second)
+        if second in own:
+            names.append(first)
+    return names
+
+
+def compare_names(allergies, classes, related):
+    """
+    Verificação por strings: cada alergia, e as classes de uma alergia a
+    medicamento, contra cada nome relacionado ao medicamento prescrito.
+    """
+    for allergy in allergies:
+        allergy = normalize_name(allergy)
+        for allergen in [allergy] + classes.get(allergy, []):
+            for name in related:
+                if allergen == name:
+                    return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do registro de alergênios')
+    parser.add_argument('--families', type=int, default=200, help='Classes de medicamentos')
+    parser.add_argument('--members', type=int, default=20, help='Medicamentos por classe')
+    parser.add_argument('--checks', type=int, default=200000, help='Verificações')
+    parser.add_argument('--allergies', type=int, default=4, help='Alergias por paciente')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    groups, cross = generate_registry(args.families, args.members, rng)
+    registry = AllergenRegistry(groups, cross)
+    drugs = [member for members in groups.values() for member in members]
+    allergens = drugs + list(groups)
+
+    # Cada paciente é verificado contra vários medicamentos, como numa enfermaria
+    patients = [[rng.choice(allergens) for _ in range(args.allergies)] for _ in range(args.checks // 20)]
+    checks = [(rng.randrange(len(patients)), rng.choice(drugs)) for _ in range(args.checks)]
+    related = {drug: related_names(groups, cross, drug) for drug in {drug for _, drug in checks}}
+
+    print(f"Registro: {registry.width} alergênios, máscaras de {registry.words} palavra(s) de 64 bits")
+
+    start = time.perf_counter()
+    by_name = sum(compare_names(patients[patient], registry.classes, related[drug]) for patient, drug in checks)
+    name_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    masks = [registry.allergy_mask(allergies) for allergies in patients]
+    by_mask = sum(registry.verify_allergies(masks[patient], drug) for patient, drug in checks)
+    mask_time = time.perf_counter() - start
+
+    # Nome do medicamento resolvido para a máscara, como o compilador faz com nomes literais
+    drug_masks = {drug: registry.drug_mask(drug) for drug in related}
+    start = time.perf_counter()
+    by_resolved = sum(registry.verify_allergies(masks[patient], drug_masks[drug]) for patient, drug in checks)
+    resolved_time = time.perf_counter() - start
+
+    assert by_name == by_mask == by_resolved
+    rounds = [
+        ('Comparação de nomes', name_time),
+        ('Máscaras (AND)', mask_time),
+        ('Máscaras, nome resolvido', resolved_time),
+    ]
+    for label, elapsed in rounds:
+        print(f"{label:>24}: {elapsed:.3f}s  {args.checks / elapsed:12,.0f} verificações/s  "
+              f"({name_time / elapsed:.1f}x)")
+    print(f"Sem alergia: {by_mask} de {args.checks}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
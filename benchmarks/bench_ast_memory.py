@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória da AST: analisa um programa grande gerado e mede com
+tracemalloc a memória retida pela árvore, em bytes por nó.
+
+Uso: python benchmarks/bench_ast_memory.py [--formulas N]
+"""
+
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import ASTNode, Scanner, Parser
+from bench_parser import generate_formulas
+
+
+def count_nodes(root):
+    """Conta os nós da AST com uma pilha explícita."""
+    count = 0
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, ASTNode):
+            count += 1
+            stack.extend(getattr(item, name) for name in type(item).__slots__)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de memória da AST')
+    parser.add_argument('--formulas', type=int, default=2000, help='Procedimentos gerados')
+    args = parser.parse_args()
+
+    source = generate_formulas(args.formulas)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    ast = Parser(Scanner(source).iter_tokens()).parse()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    retained -= before
+    nodes = count_nodes(ast)
+    print(f"Nós: {nodes}")
+    print(f"Memória retida: {retained / 2**20:.1f} MiB  {retained / nodes:.1f} bytes/nó")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cache de ASTs: compara a análise completa (Scanner + Parser)
+com a leitura da AST do cache em disco para um programa grande gerado.
+
+Uso: python benchmarks/bench_cache.py [--formulas N] [--repeat R]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser, ASTCache
+from bench_parser import generate_formulas
+
+
+def best_time(function, repeat):
+    """Retorna (resultado, melhor tempo em segundos) da chamada."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do cache de ASTs')
+    parser.add_argument('--formulas', type=int, default=2000, help='Procedimentos gerados')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições')
+    args = parser.parse_args()
+
+    source = generate_formulas(args.formulas)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ASTCache(directory)
+        key = ASTCache.source_hash(source)
+
+        ast, parse_time = best_time(lambda: Parser(Scanner(source).iter_tokens()).parse(), args.repeat)
+        _, store_time = best_time(lambda: cache.store(key, ast), args.repeat)
+        _, load_time = best_time(lambda: cache.load(key), args.repeat)
+        size = os.path.getsize(cache.path_for(key))
+
+    print(f"Código-fonte: {len(source) / 2**20:.1f} MiB  cache: {size / 2**20:.1f} MiB")
+    print(f"Scanner + Parser: {parse_time:.3f}s")
+    print(f"Gravação no cache: {store_time:.3f}s")
+    print(f"Leitura do cache:  {load_time:.3f}s  ({parse_time / load_time:.1f}x mais rápido)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pool de constantes: gera um conjunto de regras que repetem
+os mesmos nomes de medicamentos e datas e compara o IR gerado com uma
+constante global por literal e com o pool do IRModule, em número de
+globais, tamanho do .ll e tempo do llc (quando instalado).
+
+Uso: python benchmarks/bench_constants.py [--rules R] [--drugs D]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import (Scanner, Parser, SemanticAnalyzer, LLVMCodeGenerator, Optimizer,
+                              IRPrinter, IRModule, GlobalVariable, ElementPointer, llvm_string)
+
+
+RULE_TEMPLATE = '''
+procedure rule_{index}(p, dose : float) {{
+    if (dose > {index}) {{
+        note(p, "{drug}");
+        prescribe(p, "{drug}", 10mg, "1x ao dia", 30days);
+    }}
+    started : date = 2024-01-{day:02d};
+    note(p, "{other}");
+}}
+'''
+
+
+class UnpooledModule(IRModule):
+    """IRModule sem o pool: uma constante global por literal."""
+    def add_constant(self, prefix, value_type, initializer, comment=None):
+        variable = GlobalVariable(f"{prefix}.{self.global_counter}", value_type, initializer, comment,
+                                  linkage="private", constant=True)
+        self.global_counter += 1
+        self.globals.append(variable)
+        return variable
+
+    def string(self, text):
+        array_type, initializer = llvm_string(text)
+        return ElementPointer(self.add_constant("str", array_type, initializer), "i8")
+
+
+def generate_rules(rules, drugs):
+    """Regras que citam drugs nomes de medicamentos distintos, repetidos entre elas."""
+    header = 'procedure note(p, text : string) {\n}\n'
+    return header + ''.join(
+        RULE_TEMPLATE.format(index=index, drug=f"drug_{index % drugs}",
+                             other=f"drug_{(index * 7) % drugs}", day=index % 28 + 1)
+        for index in range(rules)
+    )
+
+
+def compile_module(ast, module):
+    """Gera, otimiza e imprime o IR no módulo dado; retorna (texto, globais, segundos)."""
+    start = time.perf_counter()
+    generator = LLVMCodeGenerator()
+    generator.module = module
+    module = generator.generate(ast)
+    Optimizer(module).optimize()
+    text = IRPrinter().print_module(module)
+    return text, len(module.globals), time.perf_counter() - start
+
+
+def llc_time(text, directory):
+    """Segundos do llc -O0 sobre o texto, ou None sem o llc."""
+    if shutil.which('llc') is None:
+        return None
+    path = os.path.join(directory, 'rules.ll')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    start = time.perf_counter()
+    subprocess.run(['llc', '-O0', '-filetype=obj', path, '-o', os.path.join(directory, 'rules.o')],
+                   check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do pool de constantes')
+    parser.add_argument('--rules', type=int, default=3000, help='Regras geradas')
+    parser.add_argument('--drugs', type=int, default=20, help='Medicamentos distintos')
+    args = parser.parse_args()
+
+    source = generate_rules(args.rules, args.drugs)
+    ast = Parser(Scanner(source).iter_tokens()).parse()
+    errors = SemanticAnalyzer().visit(ast)
+    assert not errors, errors
+
+    print(f"{args.rules} regras citando {args.drugs} medicamentos")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, module in (('Uma global por literal', UnpooledModule()), ('Pool de constantes', IRModule())):
+            text, globals_count, codegen_time = compile_module(ast, module)
+            backend_time = llc_time(text, directory)
+            backend = f"  llc {backend_time:.2f}s" if backend_time is not None else ""
+            print(f"{label:>22}: {globals_count:6} globais  {len(text) / 1024:8.0f} KiB  "
+                  f"geração {codegen_time:.2f}s{backend}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
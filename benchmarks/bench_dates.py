@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalabilidade da análise léxica em arquivos com muitas datas,
+medidas compostas (140/90mmHg) e unidades. Dobra o número de registros a
+cada rodada; com reconhecimento por posição o tempo por registro fica
+constante (tempo linear no tamanho do arquivo).
+
+Uso: python benchmarks/bench_dates.py [--records N] [--lexer scanner|classic|both]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Lexer, Scanner
+
+
+RECORD_TEMPLATE = (
+    'result_{index} : LabResult = {{ birth: 1980-05-15, date: 2025-04-01, '
+    'glucose: 110mg/dL, pressure: 140/90mmHg, baseline: 150/95, weight: 75.5kg }};\n'
+)
+
+
+def generate_records(count):
+    """Gera um arquivo Charcot com o número de registros datados pedido."""
+    return ''.join(RECORD_TEMPLATE.format(index=i) for i in range(count))
+
+
+def measure(lexer_class, source):
+    """Retorna o tempo em segundos para tokenizar o código-fonte."""
+    start = time.perf_counter()
+    lexer_class(source).tokenize()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de datas e medidas')
+    parser.add_argument('--records', type=int, default=100000, help='Registros na maior rodada')
+    parser.add_argument('--lexer', choices=['scanner', 'classic', 'both'], default='both')
+    args = parser.parse_args()
+
+    lexers = {'scanner': Scanner, 'classic': Lexer}
+    selected = lexers if args.lexer == 'both' else {args.lexer: lexers[args.lexer]}
+
+    sizes = [args.records // 8, args.records // 4, args.records // 2, args.records]
+    for name, lexer_class in selected.items():
+        print(f"--- {name} ---")
+        baseline = None
+        for count in sizes:
+            elapsed = measure(lexer_class, generate_records(count))
+            per_record = elapsed / count * 1e6
+            baseline = baseline or per_record
+            print(f"{count:>8} registros: {elapsed:7.3f}s  "
+                  f"{per_record:6.2f} µs/registro  ({per_record / baseline:.2f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark da tabela de doses: gera faixas de idade e peso para cada
+medicamento e valida as prescrições de uma enfermaria percorrendo as
+faixas em Python, linha a linha, com verify_dosage e com uma única
+chamada a DoseLimitTable.check_batch.
+
+Uso: python benchmarks/bench_dosage.py [--drugs D] [--bands B] [--rows N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from charcot_runtime import DoseLimitTable
+
+
+def generate_bands(drugs, bands, rng):
+    """Faixas de idade consecutivas para drug_<i>, com limites por kg nas pediátricas e absolutos em todas."""
+    rows = []
+    for drug in range(drugs):
+        per_kg = rng.uniform(5, 50)
+        maximum = rng.uniform(500, 4000)
+        ages = sorted(rng.sample(range(1, 18), bands - 1))
+        for low, high in zip([0] + ages, ages + [None]):
+            pediatric = high is not None
+            rows.append((f"drug_{drug}", {
+                'min_age': low, 'max_age': high,
+                'min_mg_per_kg': per_kg / 2 if pediatric else None,
+                'max_mg_per_kg': per_kg if pediatric else None,
+                'min_dose': None if pediatric else maximum / 10,
+                'max_dose': maximum,
+            }))
+    return rows
+
+
+def scan_bands(rows, weight, age, drug, dose):
+    """Verificação em Python: a primeira faixa do medicamento que contém a idade e o peso."""
+    for band in rows.get(drug, ()):
+        if not (band['min_age'] <= age and (band['max_age'] is None or age < band['max_age'])):
+            continue
+        if band['min_mg_per_kg'] is not None and dose < band['min_mg_per_kg'] * weight:
+            return True
+        if band['max_mg_per_kg'] is not None and dose > band['max_mg_per_kg'] * weight:
+            return True
+        if band['min_dose'] is not None and dose < band['min_dose']:
+            return True
+        return dose > band['max_dose']
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da tabela de doses')
+    parser.add_argument('--drugs', type=int, default=500, help='Medicamentos na tabela')
+    parser.add_argument('--bands', type=int, default=4, help='Faixas de idade por medicamento')
+    parser.add_argument('--rows', type=int, default=200000, help='Prescrições a validar')
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    bands = generate_bands(args.drugs, args.bands, rng)
+    table = DoseLimitTable(bands)
+    by_drug = {}
+    for drug, band in bands:
+        by_drug.setdefault(drug, []).append(band)
+
+    ages = [rng.uniform(0, 90) for _ in range(args.rows)]
+    weights = [min(3.5 + age * 4, 70) * rng.uniform(0.8, 1.2) for age in ages]
+    drugs = [f"drug_{rng.randrange(args.drugs)}" for _ in range(args.rows)]
+    doses = [rng.uniform(10, 4000) for _ in range(args.rows)]
+    rows = list(zip(weights, ages, drugs, doses))
+
+    print(f"Tabela: {len(table)} medicamentos, {len(bands)} faixas; {args.rows} prescrições")
+
+    start = time.perf_counter()
+    scanned = [scan_bands(by_drug, *row) for row in rows]
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scalar = [not table.verify_dosage(*row) for row in rows]
+    scalar_time = time.perf_counter() - start
+
+    # Arrays da enfermaria, como o serviço da farmácia os recebe
+    columns = (np.array(weights), np.array(ages), table.ids(drugs), np.array(doses))
+    start = time.perf_counter()
+    batch = table.check_batch(*columns)
+    batch_time = time.perf_counter() - start
+
+    assert scanned == scalar == batch.tolist()
+    rounds = [
+        ('Faixas em Python', scan_time),
+        ('verify_dosage', scalar_time),
+        ('check_batch', batch_time),
+    ]
+    for label, elapsed in rounds:
+        print(f"{label:>17}: {elapsed:.3f}s  {args.rows / elapsed:14,.0f} prescrições/s  "
+              f"({scan_time / elapsed:.1f}x)")
+    print(f"Violações: {int(batch.sum())} de {args.rows}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
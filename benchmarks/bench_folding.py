@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark da propagação de constantes: gera protocolos que comparam sinais
+vitais globais (glucose : mg/dL = 95;) com limites literais e escolhem um
+clinical_path pelo nível de risco global, e conta os blocos, os desvios
+condicionais e as instruções do IR com e sem a propagação de constantes
+globais e o Optimizer.constant_folding, com o tempo dos passes e do llc
+(quando instalado).
+
+Uso: python benchmarks/bench_folding.py [--protocols P]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser, SemanticAnalyzer, LLVMCodeGenerator, Optimizer, IRPrinter
+from bench_constants import llc_time
+
+
+HEADER = '''
+glucose : mg/dL = 95;
+pressure : mmHg = 150/95mmHg;
+risk : int = 2;
+procedure alert(amount : mg) {
+}
+'''
+
+PROTOCOL_TEMPLATE = '''
+procedure protocol_{index}(dose : mg) {{
+    if (glucose > 126mg/dL) {{
+        alert(dose * 2);
+    }} else {{
+        if (glucose < 70mg/dL || dose > {limit}mg) {{
+            alert(dose);
+        }}
+    }}
+    if (pressure > 140/90mmHg) {{
+        alert(dose - {reduction}mg);
+    }}
+    clinical_path risk {{
+        case 1:
+            alert(dose);
+        case 2:
+            alert(dose + {reduction}mg);
+        case 3:
+            alert(dose * 3);
+    }}
+    if (2024-01-{day:02d} > 2024-01-15) {{
+        alert(dose);
+    }}
+}}
+'''
+
+
+def generate_protocols(protocols):
+    """Protocolos protocol_<i> com limites e datas diferentes."""
+    return HEADER + ''.join(
+        PROTOCOL_TEMPLATE.format(index=index, limit=index % 50 + 100, reduction=index % 9 + 1,
+                                 day=index % 28 + 1)
+        for index in range(protocols)
+    )
+
+
+def count_code(module):
+    """Número de blocos, br condicionais e instruções nas funções definidas."""
+    counts = {'blocks': 0, 'branches': 0, 'instructions': 0}
+    for function in module.definitions():
+        counts['blocks'] += len(function.blocks)
+        for block in function.blocks:
+            counts['instructions'] += len(block.instructions)
+            terminator = block.terminator
+            if terminator is not None and terminator.opcode == 'br' and terminator.operands:
+                counts['branches'] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da propagação de constantes')
+    parser.add_argument('--protocols', type=int, default=2000, help='Protocolos gerados')
+    args = parser.parse_args()
+
+    ast = Parser(Scanner(generate_protocols(args.protocols)).iter_tokens()).parse()
+    errors = SemanticAnalyzer().visit(ast)
+    assert not errors, errors
+
+    print(f"{args.protocols} protocolos")
+    with tempfile.TemporaryDirectory() as directory:
+        for fold in (False, True):
+            module = LLVMCodeGenerator().generate(ast)
+            optimizer = Optimizer(module)
+            start = time.perf_counter()
+            if fold:
+                optimizer.propagate_global_constants()
+            for function in module.definitions():
+                optimizer.promote_allocas(function)
+                if fold:
+                    optimizer.constant_folding(function)
+                optimizer.common_subexpression_elimination(function)
+                optimizer.dead_code_elimination(function)
+            elapsed = time.perf_counter() - start
+
+            counts = count_code(module)
+            backend_time = llc_time(IRPrinter().print_module(module), directory)
+            backend = f"  llc {backend_time:.2f}s" if backend_time is not None else ""
+            label = 'Com propagação' if fold else 'Sem propagação'
+            print(f"{label:>14}: {counts['blocks']:6} blocos  {counts['branches']:6} br condicionais  "
+                  f"{counts['instructions']:7} instruções  passes {elapsed:.2f}s{backend}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
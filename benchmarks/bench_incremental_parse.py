@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark da análise sintática incremental: em um programa grande gerado,
+altera uma expressão em um procedimento no meio do arquivo e compara a
+reanálise completa (Scanner + Parser) com IncrementalParser.edit, que
+reconstrói apenas a declaração afetada.
+
+Uso: python benchmarks/bench_incremental_parse.py [--formulas N] [--edits E]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser, IncrementalParser
+from bench_parser import generate_formulas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da análise sintática incremental')
+    parser.add_argument('--formulas', type=int, default=2000, help='Procedimentos gerados')
+    parser.add_argument('--edits', type=int, default=50, help='Edições aplicadas')
+    args = parser.parse_args()
+
+    source = generate_formulas(args.formulas)
+    session = IncrementalParser(source)
+    program = session.parse()
+    declarations = len(program.declarations)
+
+    # Cada edição troca um dígito de uma fórmula em um procedimento do meio
+    target = f"adjusted_{args.formulas // 2} : float = dose * weight / "
+    offset = source.index(target) + len(target)
+
+    full_time = 0.0
+    edit_time = 0.0
+    reused = 0
+    for edit in range(args.edits):
+        digit = str(edit % 10)
+        source = source[:offset] + digit + source[offset + 1:]
+
+        start = time.perf_counter()
+        Parser(Scanner(source).iter_tokens()).parse()
+        full_time += time.perf_counter() - start
+
+        previous = session.program.declarations
+        start = time.perf_counter()
+        session.edit(offset, 1, digit)
+        edit_time += time.perf_counter() - start
+        reused += sum(new is old for new, old in zip(session.program.declarations, previous))
+
+    print(f"Declarações: {declarations}  linhas: {source.count(chr(10))}")
+    print(f"Reanálise completa: {full_time / args.edits * 1e3:8.2f} ms/edição")
+    print(f"IncrementalParser:  {edit_time / args.edits * 1e3:8.2f} ms/edição  "
+          f"({full_time / edit_time:.0f}x mais rápido)")
+    print(f"Declarações reaproveitadas: {reused / args.edits:.0f} de {declarations} por edição")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark da base de interações: gera uma base aleatória e verifica um
+medicamento contra a lista de medicamentos de cada paciente, percorrendo
+as linhas da base e consultando a InteractionDatabase, com os nomes a
+cada chamada e com as listas de ids já internadas.
+
+Uso: python benchmarks/bench_interactions.py [--drugs D] [--pairs P] [--checks N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_runtime import InteractionDatabase, normalize_name
+
+
+def generate_database(drugs, pairs, rng):
+    """Linhas (drug_a, drug_b, severity) aleatórias sobre os nomes drug_<i>."""
+    severities = ('minor', 'moderate', 'major')
+    return [
+        (f"drug_{rng.randrange(drugs)}", f"drug_{rng.randrange(drugs)}", rng.choice(severities))
+        for _ in range(pairs)
+    ]
+
+
+def scan_rows(rows, medications, drug):
+    """Verificação percorrendo todas as linhas da base."""
+    drug = normalize_name(drug)
+    medications = {normalize_name(name) for name in medications}
+    for first, second, _ in rows:
+        if (first == drug and second in medications) or (second == drug and first in medications):
+            return False
+    return True
+
+
+def timed(function, checks):
+    """Retorna (segundos, verificações sem interação)."""
+    start = time.perf_counter()
+    safe = sum(function(medications, drug) for medications, drug in checks)
+    return time.perf_counter() - start, safe
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da base de interações')
+    parser.add_argument('--drugs', type=int, default=3000, help='Medicamentos na base')
+    parser.add_argument('--pairs', type=int, default=20000, help='Pares que interagem')
+    parser.add_argument('--checks', type=int, default=2000, help='Verificações')
+    parser.add_argument('--medications', type=int, default=12, help='Medicamentos por paciente')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = [(normalize_name(a), normalize_name(b), severity)
+            for a, b, severity in generate_database(args.drugs, args.pairs, rng)]
+    database = InteractionDatabase(rows)
+    checks = [
+        ([f"Drug_{rng.randrange(args.drugs)}" for _ in range(args.medications)],
+         f"Drug_{rng.randrange(args.drugs)}")
+        for _ in range(args.checks)
+    ]
+    interned = [(database.medication_ids(medications), database.drug_id(drug)) for medications, drug in checks]
+
+    print(f"Base: {len(database.names)} medicamentos, {len(database)} pares")
+    rounds = [
+        ('Varredura das linhas', lambda medications, drug: scan_rows(rows, medications, drug), checks),
+        ('InteractionDatabase, nomes', database.verify_interaction, checks),
+        ('InteractionDatabase, ids', database.verify_interaction, interned),
+    ]
+    results = set()
+    for label, function, inputs in rounds:
+        elapsed, safe = timed(function, inputs)
+        results.add(safe)
+        print(f"{label:>27}: {elapsed:7.3f}s  {len(inputs) / elapsed * 60:14,.0f} verificações/min  "
+              f"({len(inputs) - safe} com interação)")
+    assert len(results) == 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
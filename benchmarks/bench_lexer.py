@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark da análise léxica: compara Lexer.tokenize (caractere a caractere)
+com Scanner.tokenize (expressão regular mestre) em tokens por segundo.
+
+Uso: python benchmarks/bench_lexer.py [--procedures N] [--repeat R]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Lexer, Scanner
+
+
+PROCEDURE_TEMPLATE = '''
+// Protocolo gerado {index}
+procedure protocol_{index}(p, dose) {{
+    /* Verificações de segurança
+       antes da prescrição */
+    glucose_{index} : float = 126mg/dL;
+    if (p.weight > 75.5kg && glucose_{index} >= 95) {{
+        verify_interaction(p.current_medications, "enalapril");
+        schedule_followup(p, 30days, 1980-05-15);
+    }} else {{
+        dose = dose * 2 + 10 - (heart_rate / 3);
+    }}
+    clinical_path p.condition {{
+        case "Hipertensão": prescribe(p, "Enalapril", 10mg, "1x ao dia", 30days);
+    }}
+}}
+'''
+
+
+def generate_source(procedures):
+    """Gera um programa Charcot sintético com o número de procedimentos pedido."""
+    return ''.join(PROCEDURE_TEMPLATE.format(index=i) for i in range(procedures))
+
+
+def measure(lexer_class, source, repeat):
+    """Retorna (melhor tempo em segundos, tokens) para o analisador informado."""
+    best = float('inf')
+    tokens = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = lexer_class(source).tokenize()
+        best = min(best, time.perf_counter() - start)
+    return best, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do analisador léxico')
+    parser.add_argument('--procedures', type=int, default=2000, help='Procedimentos gerados')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetições por analisador')
+    args = parser.parse_args()
+
+    source = generate_source(args.procedures)
+    print(f"Fonte: {len(source) / 1024:.0f} KiB, {source.count(chr(10))} linhas")
+
+    classic_time, classic_tokens = measure(Lexer, source, args.repeat)
+    scanner_time, scanner_tokens = measure(Scanner, source, args.repeat)
+
+    classic_stream = [(t.type, t.value, t.line, t.column) for t in classic_tokens]
+    scanner_stream = [(t.type, t.value, t.line, t.column) for t in scanner_tokens]
+    if classic_stream != scanner_stream:
+        print("ERRO: as sequências de tokens diferem")
+        return 1
+
+    count = len(scanner_tokens)
+    print(f"Tokens: {count}")
+    print(f"Lexer.tokenize:   {classic_time:.3f}s  {count / classic_time:,.0f} tokens/s")
+    print(f"Scanner.tokenize: {scanner_time:.3f}s  {count / scanner_time:,.0f} tokens/s")
+    print(f"Aceleração: {classic_time / scanner_time:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
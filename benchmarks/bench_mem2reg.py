@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark da promoção para registradores: gera protocolos de triagem com
+variáveis locais, laços e limites de pressão arterial e conta os
+alloca, load e store do IR antes e depois de Optimizer.promote_allocas,
+com o tempo do passe e do llc (quando instalado) sobre o resultado.
+
+Uso: python benchmarks/bench_mem2reg.py [--protocols P]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser, SemanticAnalyzer, LLVMCodeGenerator, Optimizer, IRPrinter
+from bench_constants import llc_time
+
+
+PROTOCOL_TEMPLATE = '''
+procedure triage_{index}(weight : kg, dose : mg, systolic : mmHg) {{
+    limit : mg = weight * {factor};
+    total : mg = 0mg;
+    day : int = 0;
+    while (day < {days}) {{
+        day = day + 1;
+        total = total + dose;
+        if (total > limit) {{
+            alert(total - limit);
+        }}
+    }}
+    high : bool = systolic > 140mmHg;
+    if (high || total > limit) {{
+        alert(total);
+    }} else {{
+        alert(limit - total);
+    }}
+}}
+'''
+
+
+def generate_protocols(protocols):
+    """Protocolos triage_<i> com limites e durações diferentes."""
+    header = 'procedure alert(amount : mg) {\n}\n'
+    return header + ''.join(
+        PROTOCOL_TEMPLATE.format(index=index, factor=index % 30 + 5, days=index % 7 + 1)
+        for index in range(protocols)
+    )
+
+
+def count_memory(module):
+    """Número de alloca, load e store nas funções definidas."""
+    counts = {'alloca': 0, 'load': 0, 'store': 0}
+    for function in module.definitions():
+        for block in function.blocks:
+            for instruction in block.instructions:
+                if instruction.opcode in counts:
+                    counts[instruction.opcode] += 1
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da promoção para registradores')
+    parser.add_argument('--protocols', type=int, default=2000, help='Protocolos gerados')
+    args = parser.parse_args()
+
+    ast = Parser(Scanner(generate_protocols(args.protocols)).iter_tokens()).parse()
+    errors = SemanticAnalyzer().visit(ast)
+    assert not errors, errors
+
+    print(f"{args.protocols} protocolos")
+    with tempfile.TemporaryDirectory() as directory:
+        for promote in (False, True):
+            module = LLVMCodeGenerator().generate(ast)
+            optimizer = Optimizer(module)
+            start = time.perf_counter()
+            for function in module.definitions():
+                if promote:
+                    optimizer.promote_allocas(function)
+                optimizer.common_subexpression_elimination(function)
+                optimizer.dead_code_elimination(function)
+            elapsed = time.perf_counter() - start
+
+            counts = count_memory(module)
+            backend_time = llc_time(IRPrinter().print_module(module), directory)
+            backend = f"  llc {backend_time:.2f}s" if backend_time is not None else ""
+            label = 'Com promoção' if promote else 'Sem promoção'
+            print(f"{label:>12}: {counts['alloca']:6} alloca  {counts['load']:6} load  "
+                  f"{counts['store']:6} store  passes {elapsed:.2f}s{backend}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark da entrada mapeada em memória: tokeniza um arquivo grande gerado
+lendo-o inteiro com open().read() e mapeando-o com map_source, e compara
+o tempo e o pico de memória alocada (tracemalloc) nos dois casos.
+
+Uso: python benchmarks/bench_mmap.py [--procedures N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, map_source
+from bench_lexer import generate_source
+
+
+def consume(path, mapped):
+    """Lê e tokeniza o arquivo sob demanda; retorna o número de tokens."""
+    if mapped:
+        source = map_source(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+
+    count = 0
+    for _ in Scanner(source).iter_tokens():
+        count += 1
+
+    if mapped and not isinstance(source, bytes):
+        source.close()
+    return count
+
+
+def measure(path, mapped):
+    """Retorna (segundos, pico de memória em bytes, tokens)."""
+    start = time.perf_counter()
+    count = consume(path, mapped)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    consume(path, mapped)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da entrada mapeada em memória')
+    parser.add_argument('--procedures', type=int, default=5000, help='Procedimentos gerados')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.charcot', encoding='utf-8', delete=False) as f:
+        f.write(generate_source(args.procedures))
+        path = f.name
+
+    try:
+        size = os.path.getsize(path)
+        print(f"Arquivo: {size / 2**20:.1f} MiB")
+        for label, mapped in (('open().read()', False), ('map_source', True)):
+            elapsed, peak, count = measure(path, mapped)
+            print(f"{label:>14}: {elapsed:6.2f}s  pico {peak / 2**20:7.1f} MiB  {count} tokens")
+    finally:
+        os.unlink(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
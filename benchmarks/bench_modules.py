@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark de módulos: gera M módulos compartilhados e N programas que
+importam todos eles, e mede a análise semântica dos importadores quando
+cada um analisa os módulos de novo, quando o ModuleLoader é compartilhado
+no processo e quando as interfaces gravadas em disco são reaproveitadas
+(uma nova execução do compilador).
+
+Uso: python benchmarks/bench_modules.py [--modules M] [--importers N] [--procedures P]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser, SemanticAnalyzer, ModuleLoader
+from bench_parser import FORMULA_TEMPLATE
+
+
+# Módulo shared.vitals, importado por todos os outros: as variáveis globais
+# usadas pelos procedimentos de FORMULA_TEMPLATE
+VITALS_MODULE = '''
+creatinine = 1.1;
+age = 45;
+clearance = 90;
+glucose = 95;
+fasting = 0;
+heart_rate = 72;
+'''
+
+
+def write_modules(directory, modules, procedures):
+    """Grava shared/vitals.charcot e os módulos shared/mod_<i>.charcot com seus procedimentos."""
+    os.makedirs(os.path.join(directory, 'shared'))
+    with open(os.path.join(directory, 'shared', 'vitals.charcot'), 'w', encoding='utf-8') as f:
+        f.write(VITALS_MODULE)
+    for module in range(modules):
+        body = 'import shared.vitals;\n' + ''.join(
+            FORMULA_TEMPLATE.format(index=f"{module}_{index}") for index in range(procedures)
+        )
+        with open(os.path.join(directory, 'shared', f'mod_{module}.charcot'), 'w', encoding='utf-8') as f:
+            f.write(body)
+
+
+def generate_importer(modules, index):
+    """Programa que importa todos os módulos e chama um procedimento de cada um."""
+    imports = ''.join(f'import shared.mod_{module};\n' for module in range(modules))
+    calls = ''.join(f'    dose_{module}_0(p, {index}, 70);\n' for module in range(modules))
+    return f'{imports}procedure main(p) {{\n{calls}}}\n'
+
+
+def analyze(programs, loader_for):
+    """
+    Analisa os programas com o ModuleLoader de loader_for(índice); retorna
+    (segundos, módulos analisados, interfaces lidas), somados entre os loaders.
+    """
+    loaders = {}
+    start = time.perf_counter()
+    for index, program in enumerate(programs):
+        loader = loader_for(index)
+        loaders[id(loader)] = loader
+        errors = SemanticAnalyzer(loader).visit(program)
+        assert not errors, errors
+    elapsed = time.perf_counter() - start
+    return (elapsed, sum(loader.parsed for loader in loaders.values()),
+            sum(loader.loaded for loader in loaders.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de módulos')
+    parser.add_argument('--modules', type=int, default=10, help='Módulos compartilhados')
+    parser.add_argument('--importers', type=int, default=50, help='Programas importadores')
+    parser.add_argument('--procedures', type=int, default=50, help='Procedimentos por módulo')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_modules(directory, args.modules, args.procedures)
+        interfaces = os.path.join(directory, 'interfaces')
+        programs = [
+            Parser(Scanner(generate_importer(args.modules, index)).iter_tokens()).parse()
+            for index in range(args.importers)
+        ]
+
+        # A última rodada simula uma nova execução: o cache do processo está
+        # vazio, mas as interfaces gravadas pela rodada anterior estão em disco
+        shared = ModuleLoader([directory], interfaces)
+        next_run = ModuleLoader([directory], interfaces)
+        rounds = [
+            ('Reanálise por importador', lambda index: ModuleLoader([directory])),
+            ('ModuleLoader do processo', lambda index: shared),
+            ('Interfaces em disco', lambda index: next_run),
+        ]
+
+        print(f"{args.importers} importadores de {args.modules} módulos com {args.procedures} procedimentos")
+        for label, loader_for in rounds:
+            elapsed, parsed, loaded = analyze(programs, loader_for)
+            print(f"{label:>26}: {elapsed:6.3f}s  {parsed:5} módulo(s) analisado(s)  "
+                  f"{loaded:5} interface(s) lida(s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark de aninhamento profundo: gera um protocolo com if/else e
+clinical_path aninhados N níveis e mede o parser, a análise semântica e a
+geração de código. Todas as fases usam pilha explícita (trampoline), então
+a profundidade não esbarra no limite de recursão do Python.
+
+Uso: python benchmarks/bench_nesting.py [--depth N]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser, SemanticAnalyzer, LLVMCodeGenerator
+
+
+def generate_nested(depth):
+    """Gera um procedimento com if/else e clinical_path alternados."""
+    parts = ['procedure deep(p) {\n']
+    for level in range(depth):
+        if level % 2:
+            parts.append(f'if (p > {level}) {{\n')
+        else:
+            parts.append(f'clinical_path p {{ case {level}: {{\n')
+    parts.append('p = 1;\n')
+    for level in reversed(range(depth)):
+        parts.append('} else { p = 2; }\n' if level % 2 else '} }\n')
+    parts.append('}\n')
+    return ''.join(parts)
+
+
+def timed(function, *args):
+    """Retorna (resultado, segundos) da chamada."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de aninhamento profundo')
+    parser.add_argument('--depth', type=int, default=100000, help='Níveis na maior rodada')
+    args = parser.parse_args()
+
+    print(f"Limite de recursão do Python: {sys.getrecursionlimit()}")
+    for depth in (args.depth // 100, args.depth // 10, args.depth):
+        source = generate_nested(depth)
+        ast, parse_time = timed(lambda: Parser(Scanner(source).iter_tokens()).parse())
+        errors, semantic_time = timed(SemanticAnalyzer().visit, ast)
+        _, codegen_time = timed(LLVMCodeGenerator().generate, ast)
+        print(f"{depth:>7} níveis: parser {parse_time:6.2f}s  semântica {semantic_time:6.2f}s  "
+              f"código {codegen_time:6.2f}s  ({len(errors)} erros)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
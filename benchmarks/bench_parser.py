@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark da análise sintática em código denso em expressões: fórmulas de
+dose, comparações com limiares e condições compostas. Os tokens são gerados
+antes da medição, de modo que apenas o Parser é cronometrado.
+
+Uso: python benchmarks/bench_parser.py [--formulas N] [--repeat R]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser
+
+
+FORMULA_TEMPLATE = '''
+procedure dose_{index}(p, dose, weight) {{
+    adjusted_{index} : float = dose * weight / 70 + (creatinine - 1.2) * 15 - age / 3;
+    limit_{index} : float = -dose * 2 + weight * 0.5 / (1 + clearance / 100);
+    if (p.weight > 75.5kg && glucose >= 95 || !fasting && heart_rate * 2 <= 180) {{
+        dose = dose * 2 + 10 - (heart_rate / 3) * (1 - p.age / 120);
+    }} else {{
+        dose = (dose + adjusted_{index}) / 2 == limit_{index} != (weight < 50);
+    }}
+    return dose * 1.5 + p.factor(dose, weight * 2) - 4 * (dose / weight);
+}}
+'''
+
+
+def generate_formulas(count):
+    """Gera um programa Charcot com o número de procedimentos pedido."""
+    return ''.join(FORMULA_TEMPLATE.format(index=i) for i in range(count))
+
+
+def measure(tokens, repeat):
+    """Retorna o melhor tempo em segundos para analisar a lista de tokens."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Parser(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do analisador sintático')
+    parser.add_argument('--formulas', type=int, default=2000, help='Procedimentos gerados')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições')
+    args = parser.parse_args()
+
+    tokens = Scanner(generate_formulas(args.formulas)).tokenize()
+    elapsed = measure(tokens, args.repeat)
+
+    print(f"Tokens: {len(tokens)}")
+    print(f"Parser.parse: {elapsed:.3f}s  {len(tokens) / elapsed:,.0f} tokens/s  "
+          f"{elapsed / args.formulas * 1e6:.1f} µs/procedimento")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
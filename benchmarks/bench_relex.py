@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark da reanálise léxica incremental: aplica edições de um caractere
+a um arquivo grande com TokenTable.relex e compara o custo por edição com
+o de tokenizar o arquivo inteiro novamente (Scanner.scan_table).
+
+Simula dois padrões de edição: digitação contínua em um mesmo ponto e
+edições em posições aleatórias do arquivo.
+
+Uso: python benchmarks/bench_relex.py [--lines N] [--edits E]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner
+from bench_lexer import generate_source, PROCEDURE_TEMPLATE
+
+
+def check(table):
+    """Confere a tabela incremental com uma tokenização completa."""
+    expected = Scanner(table.source.text()).scan_table()
+    actual = [(table.types[i], table.start_of(i), table.end_of(i)) for i in range(len(table))]
+    return actual == [(expected.types[i], expected.starts[i], expected.ends[i]) for i in range(len(expected))]
+
+
+def typing(table, edits):
+    """Digita edits caracteres em sequência no meio do arquivo."""
+    text = table.source.text()
+    offset = text.index('dose = dose', len(text) // 2)
+    timings = []
+    for char in ('x' * edits):
+        start = time.perf_counter()
+        table.relex(offset, 0, char)
+        timings.append(time.perf_counter() - start)
+        offset += 1
+    return timings
+
+
+def scattered(table, edits, rng):
+    """Insere e remove um caractere em posições aleatórias."""
+    timings = []
+    for _ in range(edits // 2):
+        offset = rng.randrange(len(table.source))
+        start = time.perf_counter()
+        table.relex(offset, 0, '7')
+        table.relex(offset, 1, '')
+        timings.append((time.perf_counter() - start) / 2)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    median = timings[len(timings) // 2] * 1e6
+    worst = timings[-1] * 1e6
+    print(f"{label:>22}: mediana {median:8.1f} µs  pior {worst:9.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da reanálise léxica incremental')
+    parser.add_argument('--lines', type=int, default=50000, help='Linhas do arquivo gerado')
+    parser.add_argument('--edits', type=int, default=200, help='Edições por padrão')
+    args = parser.parse_args()
+
+    procedures = args.lines // PROCEDURE_TEMPLATE.count('\n')
+    source = generate_source(procedures)
+
+    start = time.perf_counter()
+    table = Scanner(source).scan_table()
+    full_time = time.perf_counter() - start
+    print(f"Arquivo: {source.count(chr(10))} linhas, {len(table)} tokens")
+    print(f"{'tokenização completa':>22}: {full_time * 1e6:12.1f} µs")
+
+    # A primeira edição converte o texto em SourceBuffer (uma cópia única)
+    start = time.perf_counter()
+    table.relex(0, 0, '')
+    print(f"{'primeira edição':>22}: {(time.perf_counter() - start) * 1e6:12.1f} µs")
+
+    report('digitação contínua', typing(table, args.edits))
+    report('edições aleatórias', scattered(table, args.edits, random.Random(1)))
+
+    if not check(table):
+        print("ERRO: a tabela incremental difere da tokenização completa")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
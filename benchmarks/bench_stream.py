@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memória do parser: compara o pico de memória (tracemalloc) ao
+percorrer as declarações de um programa a partir da lista completa de
+tokens e a partir do gerador de tokens consumido sob demanda.
+
+Com o gerador, o pico acompanha o tamanho da maior declaração, e não o
+tamanho do arquivo.
+
+Uso: python benchmarks/bench_stream.py [--procedures N]
+"""
+
+import os
+import sys
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser
+from bench_lexer import generate_source
+
+
+def peak_memory(source, lazy):
+    """Retorna o pico de memória (bytes) ao percorrer todas as declarações."""
+    tracemalloc.start()
+    scanner = Scanner(source)
+    tokens = scanner.iter_tokens() if lazy else scanner.tokenize()
+    count = 0
+    for _ in Parser(tokens).iter_declarations():
+        count += 1
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de memória do parser')
+    parser.add_argument('--procedures', type=int, default=4000, help='Procedimentos na maior rodada')
+    args = parser.parse_args()
+
+    for count in (args.procedures // 4, args.procedures // 2, args.procedures):
+        source = generate_source(count)
+        list_peak, _ = peak_memory(source, lazy=False)
+        lazy_peak, _ = peak_memory(source, lazy=True)
+        print(f"{count:>6} procedimentos: lista {list_peak / 1024:9.0f} KiB   "
+              f"sob demanda {lazy_peak / 1024:6.0f} KiB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark da TokenTable: compara a memória (tracemalloc) e o tempo de
+tokenização da lista de objetos Token com a tabela compacta de arrays,
+em que linha e coluna só são calculadas sob demanda.
+
+Uso: python benchmarks/bench_token_table.py [--procedures N]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner
+from bench_lexer import generate_source
+
+
+def measure(build, source):
+    """Retorna (segundos, bytes retidos, número de tokens) para o construtor informado."""
+    start = time.perf_counter()
+    tokens = build(Scanner(source))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tokens = build(Scanner(source))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, retained, len(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da TokenTable')
+    parser.add_argument('--procedures', type=int, default=2000, help='Procedimentos gerados')
+    args = parser.parse_args()
+
+    source = generate_source(args.procedures)
+    list_time, list_bytes, count = measure(Scanner.tokenize, source)
+    table_time, table_bytes, _ = measure(Scanner.scan_table, source)
+
+    print(f"Tokens: {count}")
+    print(f"Lista de Token: {list_time:.3f}s  {list_bytes / 1024:8.0f} KiB  "
+          f"{list_bytes / count:5.1f} bytes/token")
+    print(f"TokenTable:     {table_time:.3f}s  {table_bytes / 1024:8.0f} KiB  "
+          f"{table_bytes / count:5.1f} bytes/token")
+    print(f"Redução de memória: {list_bytes / table_bytes:.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark do despacho de NodeVisitor: percorre uma AST grande gerada
+com um visitante que apenas conta os nós, usando a tabela de despacho por
+classe e, para comparação, o despacho anterior, que montava o nome
+visit_<Classe> e chamava getattr a cada nó. Mede também a análise
+semântica com os dois despachos.
+
+Uso: python benchmarks/bench_visitor.py [--formulas N] [--repeat R]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import ASTNode, NodeVisitor, Scanner, Parser, SemanticAnalyzer
+from bench_parser import generate_formulas
+
+
+class NodeCounter(NodeVisitor):
+    """Visita todos os nós da AST e conta as visitas."""
+    def __init__(self):
+        self.visits = 0
+
+    def generic_visit(self, node):
+        self.visits += 1
+        if isinstance(node, ASTNode):
+            for name in type(node).__slots__:
+                value = getattr(node, name)
+                if isinstance(value, list):
+                    for item in value:
+                        yield item
+                elif isinstance(value, ASTNode):
+                    yield value
+
+
+def string_dispatch(self, node):
+    """Despacho anterior: nome do método montado e procurado a cada nó."""
+    method_name = f'visit_{type(node).__name__}'
+    visitor = getattr(self, method_name, self.generic_visit)
+    return visitor(node)
+
+
+class StringNodeCounter(NodeCounter):
+    dispatch = string_dispatch
+
+
+class StringSemanticAnalyzer(SemanticAnalyzer):
+    dispatch = string_dispatch
+
+
+def best_time(make_visitor, ast, repeat):
+    """Retorna (visitante, melhor tempo em segundos) para visitar a AST."""
+    best = float('inf')
+    for _ in range(repeat):
+        visitor = make_visitor()
+        start = time.perf_counter()
+        visitor.visit(ast)
+        best = min(best, time.perf_counter() - start)
+    return visitor, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmark do despacho de NodeVisitor')
+    parser.add_argument('--formulas', type=int, default=2000, help='Procedimentos gerados')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições')
+    args = parser.parse_args()
+
+    ast = Parser(Scanner(generate_formulas(args.formulas)).iter_tokens()).parse()
+
+    counter, string_time = best_time(StringNodeCounter, ast, args.repeat)
+    _, table_time = best_time(NodeCounter, ast, args.repeat)
+    visits = counter.visits
+    print(f"Nós visitados: {visits}")
+    print(f"Contador, getattr:  {visits / string_time:12,.0f} visitas/s")
+    print(f"Contador, tabela:   {visits / table_time:12,.0f} visitas/s  "
+          f"({string_time / table_time:.2f}x)")
+
+    _, string_time = best_time(StringSemanticAnalyzer, ast, args.repeat)
+    _, table_time = best_time(SemanticAnalyzer, ast, args.repeat)
+    print(f"SemanticAnalyzer, getattr: {string_time:.3f}s")
+    print(f"SemanticAnalyzer, tabela:  {table_time:.3f}s  ({string_time / table_time:.2f}x)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
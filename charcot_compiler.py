@@ -9,10 +9,23 @@ que pode então ser compilado para código nativo de alta performance.
 import os
 import sys
 import re
+import mmap
 import json
+import hashlib
+import marshal
+import math
+import calendar
+import datetime
+import struct
 import argparse
+from array import array
+from sys import intern
+from bisect import bisect_left, bisect_right
 from enum import Enum, auto
-from typing import List, Dict, Optional, Tuple, Any
+from types import GeneratorType
+from typing import List, Dict, Optional, Tuple, Any, Callable
+
+from charcot_runtime import InteractionDatabase, AllergenRegistry, DoseLimitTable
 
 #################################################
 # PARTE 1: TOKENIZAÇÃO (ANÁLISE LÉXICA)
@@ -81,13 +94,276 @@ class TokenType(Enum):
     # Especial
     EOF = auto()
     COMMENT = auto()
+    
+    # Os membros são únicos e comparados por identidade; o hash padrão do
+    # Enum é escrito em Python e pesa nas tabelas do parser indexadas por tipo
+    __hash__ = object.__hash__
+
+# Mapeia palavras-chave para tipos de token
+KEYWORDS = {
+    'patient': TokenType.PATIENT,
+    'procedure': TokenType.PROCEDURE,
+    'treatment': TokenType.TREATMENT,
+    'prescription': TokenType.PRESCRIPTION,
+    'verify': TokenType.VERIFY,
+    'import': TokenType.IMPORT,
+    'if': TokenType.IF,
+    'else': TokenType.ELSE,
+    'while': TokenType.WHILE,
+    'for': TokenType.FOR,
+    'foreach': TokenType.FOREACH,
+    'in': TokenType.IN,
+    'return': TokenType.RETURN,
+    'case': TokenType.CASE,
+    'clinical_path': TokenType.CLINICAL_PATH,
+    'diagnose': TokenType.DIAGNOSE,
+    'monitor': TokenType.MONITOR,
+    'prescribe': TokenType.PRESCRIBE,
+    'new': TokenType.NEW
+}
+
+# Tipos médicos comuns
+MEDICAL_TYPES = {
+    'Patient', 'BloodTest', 'VitalSigns', 'Prescription',
+    'Medication', 'LabResult', 'Diagnosis', 'Treatment'
+}
+
+class SyntaxDiagnostic(SyntaxError):
+    """
+    Erro léxico ou sintático com a posição (linha e coluna) em que ocorreu.
+    
+    É levantado como SyntaxError e, no modo de recuperação do Parser,
+    guardado em Parser.diagnostics para ser relatado junto com os demais.
+    """
+    def __init__(self, message, line, column):
+        super().__init__(message)
+        self.line = line
+        self.column = column
+
+class Unit:
+    """
+    Unidade de medida reconhecida pelo analisador léxico.
+    
+    Converte magnitudes para a unidade canônica (SI) da sua grandeza:
+    canônico = magnitude * numerator / denominator + offset.
+    """
+    __slots__ = ('unit_id', 'symbol', 'dimension', 'canonical', 'numerator', 'denominator', 'offset')
+    
+    def __init__(self, unit_id, symbol, dimension, canonical, numerator, denominator=1, offset=0.0):
+        self.unit_id = unit_id
+        self.symbol = symbol
+        self.dimension = dimension
+        self.canonical = canonical
+        self.numerator = numerator
+        self.denominator = denominator
+        self.offset = offset
+    
+    def to_canonical(self, magnitude: float) -> float:
+        """Converte uma magnitude nesta unidade para a unidade canônica."""
+        return magnitude * self.numerator / self.denominator + self.offset
+    
+    def from_canonical(self, value: float) -> float:
+        """Converte um valor na unidade canônica para esta unidade."""
+        return (value - self.offset) * self.denominator / self.numerator
+    
+    def __repr__(self):
+        return f"Unit({self.symbol!r}, {self.dimension}, {self.canonical})"
+
+# Unidades médicas para medições: (símbolo, grandeza, unidade canônica,
+# numerador, denominador, deslocamento). O unit_id é a posição na lista.
+UNITS = [
+    Unit(unit_id, *definition) for unit_id, definition in enumerate([
+        ('mg', 'mass', 'kg', 1, 1_000_000),
+        ('g', 'mass', 'kg', 1, 1000),
+        ('kg', 'mass', 'kg', 1),
+        ('mmHg', 'pressure', 'Pa', 133.322387415),
+        ('bpm', 'frequency', 'Hz', 1, 60),
+        ('mmol', 'amount', 'mol', 1, 1000),
+        ('μmol', 'amount', 'mol', 1, 1_000_000),
+        ('mL', 'volume', 'm³', 1, 1_000_000),
+        ('L', 'volume', 'm³', 1, 1000),
+        ('mg/dL', 'mass_concentration', 'kg/m³', 1, 100),
+        ('mEq/L', 'equivalent_concentration', 'eq/m³', 1),
+        ('ng/mL', 'mass_concentration', 'kg/m³', 1, 1_000_000),
+        ('U/L', 'catalytic_concentration', 'kat/m³', 1, 60_000),
+        ('mmol/L', 'amount_concentration', 'mol/m³', 1),
+        ('cm', 'length', 'm', 1, 100),
+        ('m', 'length', 'm', 1),
+        ('years', 'time', 's', 31_557_600),
+        ('days', 'time', 's', 86_400),
+        ('hours', 'time', 's', 3600),
+        ('h', 'time', 's', 3600),
+        ('min', 'time', 's', 60),
+        ('C', 'temperature', 'K', 1, 1, 273.15),
+        ('F', 'temperature', 'K', 5, 9, 273.15 - 32 * 5 / 9),
+    ])
+]
+
+MEDICAL_UNITS = {unit.symbol for unit in UNITS}
+UNIT_BY_SYMBOL = {unit.symbol: unit for unit in UNITS}
+
+
+def _is_letter_char(source, index) -> bool:
+    return source[index:index + 1].isalpha()
+
+
+def _is_letter_byte(source, index) -> bool:
+    char = source[index:index + 1]
+    if char < b'\x80':
+        return char.isalpha()
+    # Caractere multibyte: decodifica apenas ele
+    return source[index:index + 4].decode('utf-8', 'ignore')[:1].isalpha()
+
+
+class UnitTrie:
+    """
+    Trie dos símbolos de unidade, percorrida uma única vez a partir do fim
+    do número. Guarda a maior unidade aceita que não seja seguida de outra
+    letra (5mg/dL, mas não 5m em 5month), sem retroceder no código-fonte.
+    
+    As chaves são fatias de um caractere (str) ou, com encoding, de um byte
+    do símbolo codificado, para o código-fonte mapeado em memória. Fatiar
+    em vez de indexar dispensa testar o fim do código-fonte: a fatia vazia
+    não está na trie.
+    """
+    def __init__(self, units, encoding=None):
+        self.root = {}
+        self.is_letter = _is_letter_byte if encoding else _is_letter_char
+        
+        for unit in units:
+            if encoding:
+                symbol = unit.symbol.encode(encoding)
+                elements = [symbol[i:i + 1] for i in range(len(symbol))]
+            else:
+                elements = unit.symbol
+            
+            node = self.root
+            for element in elements:
+                node = node.setdefault(element, {})
+            node[None] = unit
+    
+    def match(self, source, position) -> Tuple[Optional[Unit], int]:
+        """Retorna (unidade, fim) da maior unidade em position, ou (None, position)."""
+        node = self.root
+        unit = None
+        end = index = position
+        
+        while True:
+            node = node.get(source[index:index + 1])
+            if node is None:
+                break
+            index += 1
+            accepted = node.get(None)
+            if accepted is not None and not self.is_letter(source, index):
+                unit = accepted
+                end = index
+        
+        return unit, end
+
+UNIT_TRIE = UnitTrie(UNITS)
+UNIT_BYTES_TRIE = UnitTrie(UNITS, encoding='utf-8')
+
+
+class Measurement:
+    """
+    Medida interpretada durante a análise léxica: magnitude, unidade (índice
+    em UNITS, ou None) e valor na unidade canônica. Medidas compostas como
+    140/90mmHg guardam pares (sistólica, diastólica) em magnitude e
+    canonical_value.
+    """
+    __slots__ = ('magnitude', 'unit_id', 'canonical_value')
+    
+    def __init__(self, magnitude, unit_id, canonical_value):
+        self.magnitude = magnitude
+        self.unit_id = unit_id
+        self.canonical_value = canonical_value
+    
+    @classmethod
+    def from_parts(cls, magnitude: str, compound: Optional[str], unit: Optional[Unit]) -> 'Measurement':
+        """Constrói a medida a partir do número, da parte composta ('/90') e da unidade."""
+        value = float(magnitude)
+        if compound:
+            value = (value, float(compound[1:]))
+        
+        if unit is None:
+            return cls(value, None, value)
+        if compound:
+            return cls(value, unit.unit_id, (unit.to_canonical(value[0]), unit.to_canonical(value[1])))
+        return cls(value, unit.unit_id, unit.to_canonical(value))
+    
+    @property
+    def unit(self) -> Optional[Unit]:
+        return UNITS[self.unit_id] if self.unit_id is not None else None
+    
+    def __repr__(self):
+        symbol = self.unit.symbol if self.unit_id is not None else None
+        return f"Measurement({self.magnitude!r}, {symbol!r}, {self.canonical_value!r})"
+
+# Datas no formato YYYY-MM-DD
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Números, com parte composta opcional (150/95). A unidade que pode seguir
+# o número é reconhecida por UNIT_TRIE.
+NUMBER_PATTERN = re.compile(r'(?P<magnitude>\d+(?:\.\d*)?)(?P<compound>/\d+)?')
+
+
+def parse_measurement(text) -> Measurement:
+    """Interpreta o texto de um token MEASUREMENT (p. ex. ao ler uma TokenTable)."""
+    match = NUMBER_PATTERN.match(text)
+    unit, _ = UNIT_TRIE.match(text, match.end())
+    return Measurement.from_parts(match.group('magnitude'), match.group('compound'), unit)
+
+# Operadores e delimitadores de um único caractere
+SINGLE_CHAR_TOKENS = {
+    '.': TokenType.DOT,
+    ',': TokenType.COMMA,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.TIMES,
+    '/': TokenType.DIVIDE,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '{': TokenType.LBRACE,
+    '}': TokenType.RBRACE,
+    '[': TokenType.LBRACKET,
+    ']': TokenType.RBRACKET,
+    ';': TokenType.SEMICOLON
+}
+
+# Todos os operadores e delimitadores, incluindo os de dois caracteres
+OPERATOR_TOKENS = {
+    ':=': TokenType.ASSIGN,
+    '=': TokenType.ASSIGN,
+    ':': TokenType.COLON,
+    '==': TokenType.EQ,
+    '!=': TokenType.NEQ,
+    '!': TokenType.NOT,
+    '>=': TokenType.GTE,
+    '>': TokenType.GT,
+    '<=': TokenType.LTE,
+    '<': TokenType.LT,
+    '&&': TokenType.AND,
+    '||': TokenType.OR,
+    **SINGLE_CHAR_TOKENS
+}
+
+# Tipos de token indexados pelo código numérico usado em TokenTable
+TOKEN_TYPE_BY_CODE = [None] * (max(t.value for t in TokenType) + 1)
+for _token_type in TokenType:
+    TOKEN_TYPE_BY_CODE[_token_type.value] = _token_type
+del _token_type
 
 class Token:
-    def __init__(self, token_type: TokenType, value: str, line: int, column: int):
+    __slots__ = ('type', 'value', 'line', 'column', 'measurement')
+    
+    def __init__(self, token_type: TokenType, value: str, line: int, column: int,
+                 measurement: Optional[Measurement] = None):
         self.type = token_type
         self.value = value
         self.line = line
         self.column = column
+        # Medida já interpretada (apenas em tokens MEASUREMENT)
+        self.measurement = measurement
     
     def __str__(self):
         return f"Token({self.type}, '{self.value}', line={self.line}, col={self.column})"
@@ -104,55 +380,36 @@ class Lexer:
         self.current_char = self.source[0] if self.source else None
         
         # Mapeia palavras-chave para tipos de token
-        self.keywords = {
-            'patient': TokenType.PATIENT,
-            'procedure': TokenType.PROCEDURE,
-            'treatment': TokenType.TREATMENT,
-            'prescription': TokenType.PRESCRIPTION,
-            'verify': TokenType.VERIFY,
-            'import': TokenType.IMPORT,
-            'if': TokenType.IF,
-            'else': TokenType.ELSE,
-            'while': TokenType.WHILE,
-            'for': TokenType.FOR,
-            'foreach': TokenType.FOREACH,
-            'in': TokenType.IN,
-            'return': TokenType.RETURN,
-            'case': TokenType.CASE,
-            'clinical_path': TokenType.CLINICAL_PATH,
-            'diagnose': TokenType.DIAGNOSE,
-            'monitor': TokenType.MONITOR,
-            'prescribe': TokenType.PRESCRIBE,
-            'new': TokenType.NEW
-        }
+        self.keywords = KEYWORDS
         
         # Tipos médicos comuns
-        self.medical_types = {
-            'Patient', 'BloodTest', 'VitalSigns', 'Prescription',
-            'Medication', 'LabResult', 'Diagnosis', 'Treatment'
-        }
+        self.medical_types = MEDICAL_TYPES
         
         # Unidades médicas para medições
-        self.medical_units = {
-            'mg', 'g', 'kg', 'mmHg', 'bpm', 'mmol', 'μmol', 'mL', 'L',
-            'mg/dL', 'mEq/L', 'ng/mL', 'U/L', 'mmol/L', 'cm', 'm',
-            'years', 'days', 'hours', 'h', 'min', 'C', 'F'
-        }
+        self.medical_units = MEDICAL_UNITS
+        self.unit_trie = UNIT_TRIE
     
     def advance(self):
         """Avança para o próximo caractere."""
+        # A quebra de linha pertence à linha que ela termina
+        if self.current_char == '\n':
+            self.line += 1
+            self.column = 1
+        else:
+            self.column += 1
+        
         self.position += 1
         
         if self.position >= len(self.source):
             self.current_char = None
         else:
             self.current_char = self.source[self.position]
-            
-            if self.current_char == '\n':
-                self.line += 1
-                self.column = 1
-            else:
-                self.column += 1
+    
+    def advance_to(self, position):
+        """Avança diretamente até a posição indicada, dentro da linha atual."""
+        self.column += position - self.position
+        self.position = position
+        self.current_char = self.source[position] if position < len(self.source) else None
     
     def peek(self, n=1) -> Optional[str]:
         """Verifica o caractere n posições à frente sem avançar."""
@@ -207,56 +464,29 @@ class Lexer:
             return Token(TokenType.IDENTIFIER, result, self.line, start_col)
     
     def number(self) -> Token:
-        """Processa números (inteiros e decimais)."""
+        """
+        Processa números (inteiros e decimais), medidas compostas como
+        150/95 e 140/90mmHg e números seguidos de unidade médica.
+        """
         start_col = self.column
-        result = ''
-        
-        # Processa parte inteira
-        while self.current_char is not None and self.current_char.isdigit():
-            result += self.current_char
-            self.advance()
-        
-        # Processa parte decimal se houver
-        if self.current_char == '.':
-            result += self.current_char
-            self.advance()
-            
-            while self.current_char is not None and self.current_char.isdigit():
-                result += self.current_char
-                self.advance()
-        
-        # Verifica se o número é seguido por uma unidade médica
-        unit = ''
-        peek_pos = 0
+        start_pos = self.position
         
-        # Para lidar com notações como "120/80mmHg"
-        if self.current_char == '/':
-            unit += self.current_char
-            self.advance()
-            
-            while self.current_char is not None and self.current_char.isdigit():
-                unit += self.current_char
-                self.advance()
+        # O reconhecimento é feito por posição, sem copiar o restante do arquivo
+        match = NUMBER_PATTERN.match(self.source, start_pos)
         
-        # Captura a unidade
-        start_unit_pos = self.position
-        while (self.current_char is not None and 
-              (self.current_char.isalpha() or self.current_char == '/')):
-            unit += self.current_char
-            self.advance()
+        # Maior unidade médica conhecida logo após o número, sem retrocesso
+        unit, end = self.unit_trie.match(self.source, match.end())
         
-        # Verifica se a unidade é uma unidade médica conhecida
-        if unit in self.medical_units:
-            return Token(TokenType.MEASUREMENT, f"{result}{unit}", self.line, start_col)
-        elif unit:  # Tem unidade, mas não é reconhecida
-            # Restauramos a posição para o início da unidade para reprocessá-la
-            self.position = start_unit_pos
-            self.current_char = self.source[self.position] if self.position < len(self.source) else None
+        self.advance_to(end)
         
-        return Token(TokenType.NUMBER, result, self.line, start_col)
+        if end == match.end('magnitude'):
+            return Token(TokenType.NUMBER, match.group('magnitude'), self.line, start_col)
+        measurement = Measurement.from_parts(match.group('magnitude'), match.group('compound'), unit)
+        return Token(TokenType.MEASUREMENT, self.source[start_pos:end], self.line, start_col, measurement)
     
     def string(self) -> Token:
         """Processa strings (entre aspas)."""
+        start_line = self.line
         start_col = self.column
         self.advance()  # Pula a aspa inicial
         result = ''
@@ -264,7 +494,9 @@ class Lexer:
         while self.current_char is not None and self.current_char != '"':
             if self.current_char == '\\':
                 self.advance()  # Pula o escape
-                if self.current_char == 'n':
+                if self.current_char is None:
+                    break
+                elif self.current_char == 'n':
                     result += '\n'
                 elif self.current_char == 't':
                     result += '\t'
@@ -279,29 +511,24 @@ class Lexer:
         if self.current_char == '"':
             self.advance()  # Pula a aspa final
         else:
-            raise SyntaxError(f"String não terminada na linha {self.line}, coluna {start_col}")
+            raise SyntaxDiagnostic(
+                f"String não terminada na linha {start_line}, coluna {start_col}", start_line, start_col
+            )
         
-        return Token(TokenType.STRING, result, self.line, start_col)
+        return Token(TokenType.STRING, result, start_line, start_col)
     
     def date(self) -> Optional[Token]:
         """Tenta processar uma data no formato YYYY-MM-DD."""
         start_col = self.column
-        start_pos = self.position
-        
-        # Padrão de data simples: YYYY-MM-DD
-        date_pattern = re.compile(r'\d{4}-\d{2}-\d{2}')
         
         # Verifica se temos um padrão de data a partir da posição atual
-        match = date_pattern.match(self.source[start_pos:])
+        match = DATE_PATTERN.match(self.source, self.position)
         
         if match:
-            date_str = match.group(0)
-            
             # Avança o lexer após a data
-            for _ in range(len(date_str)):
-                self.advance()
+            self.advance_to(match.end())
             
-            return Token(TokenType.DATE, date_str, self.line, start_col)
+            return Token(TokenType.DATE, match.group(0), self.line, start_col)
         
         return None
     
@@ -323,16 +550,11 @@ class Lexer:
             if self.current_char.isalpha() or self.current_char == '_':
                 return self.identifier()
             
-            # Datas (YYYY-MM-DD)
-            if self.current_char.isdigit() and self.peek() and self.peek(2) and self.peek(3):
-                peek_str = self.current_char + self.peek() + self.peek(2) + self.peek(3)
-                if re.match(r'\d{4}-', peek_str):
-                    date_token = self.date()
-                    if date_token:
-                        return date_token
-            
-            # Números
+            # Datas (YYYY-MM-DD) e números
             if self.current_char.isdigit():
+                date_token = self.date()
+                if date_token:
+                    return date_token
                 return self.number()
             
             # Strings
@@ -403,36 +625,21 @@ class Lexer:
                 return Token(TokenType.OR, '||', self.line, col)
             
             # Caracteres simples
-            char_tokens = {
-                '.': TokenType.DOT,
-                ',': TokenType.COMMA,
-                '+': TokenType.PLUS,
-                '-': TokenType.MINUS,
-                '*': TokenType.TIMES,
-                '/': TokenType.DIVIDE,
-                '(': TokenType.LPAREN,
-                ')': TokenType.RPAREN,
-                '{': TokenType.LBRACE,
-                '}': TokenType.RBRACE,
-                '[': TokenType.LBRACKET,
-                ']': TokenType.RBRACKET,
-                ';': TokenType.SEMICOLON
-            }
-            
-            if self.current_char in char_tokens:
+            if self.current_char in SINGLE_CHAR_TOKENS:
                 col = self.column
                 char = self.current_char
                 self.advance()
-                return Token(char_tokens[char], char, self.line, col)
+                return Token(SINGLE_CHAR_TOKENS[char], char, self.line, col)
             
             # Se chegou aqui, encontrou um caractere desconhecido
-            raise SyntaxError(
-                f"Caractere inesperado '{self.current_char}' na linha {self.line}, coluna {self.column}"
+            raise SyntaxDiagnostic(
+                f"Caractere inesperado '{self.current_char}' na linha {self.line}, coluna {self.column}",
+                self.line, self.column
             )
         
         # Fim do arquivo
         return Token(TokenType.EOF, '', self.line, self.column)
-
+    
     def tokenize(self) -> List[Token]:
         """Tokeniza todo o código-fonte."""
         tokens = []
@@ -444,41 +651,1027 @@ class Lexer:
         
         tokens.append(token)  # Adiciona o token EOF
         return tokens
+    
+    def iter_tokens(self):
+        """Gera os tokens sob demanda, terminando com o token EOF."""
+        token = self.get_next_token()
+        
+        while token.type != TokenType.EOF:
+            yield token
+            token = self.get_next_token()
+        
+        yield token
+
+
+# Padrão mestre do Scanner: uma única alternância compilada que reconhece
+# espaços e comentários (trivia) seguidos do próximo lexema. A trivia usa
+# um quantificador possessivo para que um comentário nunca seja devolvido
+# como operador '/'. A ordem das alternativas reproduz a ordem de decisão
+# de Lexer.get_next_token.
+TRIVIA_PATTERN = r"""(?:\s+|//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))*+"""
+
+SCANNER_PATTERN = re.compile(TRIVIA_PATTERN + r"""
+    (?:
+        (?P<identifier>[^\W\d]\w*)
+      | (?P<date>""" + DATE_PATTERN.pattern + r""")
+      | (?P<number>""" + NUMBER_PATTERN.pattern + r""")
+      | (?P<string>"(?:[^"\\]|\\[\s\S])*")
+      | (?P<operator>:=|==|!=|>=|<=|&&|\|\||[:=!><.,+\-*/(){}\[\];])
+    )
+""", re.VERBOSE)
+
+TRIVIA_RE = re.compile(TRIVIA_PATTERN)
+
+# Versões em bytes dos padrões, usadas quando o código-fonte é um arquivo
+# mapeado em memória (mmap). Bytes acima de 0x7F são aceitos em
+# identificadores e unidades e validados após a decodificação UTF-8.
+TRIVIA_BYTES_PATTERN = TRIVIA_PATTERN.encode()
+
+BYTES_SCANNER_PATTERN = re.compile(TRIVIA_BYTES_PATTERN + rb"""
+    (?:
+        (?P<identifier>(?:[A-Za-z_]|[\x80-\xff])(?:\w|[\x80-\xff])*)
+      | (?P<date>""" + DATE_PATTERN.pattern.encode() + rb""")
+      | (?P<number>""" + NUMBER_PATTERN.pattern.encode() + rb""")
+      | (?P<string>"(?:[^"\\]|\\[\s\S])*")
+      | (?P<operator>:=|==|!=|>=|<=|&&|\|\||[:=!><.,+\-*/(){}\[\];])
+    )
+""", re.VERBOSE)
+
+TRIVIA_BYTES_RE = re.compile(TRIVIA_BYTES_PATTERN)
+
+IDENTIFIER_RE = re.compile(r'[^\W\d]\w*')
+
+# Tabelas de classificação indexadas por bytes, para o código-fonte mapeado
+KEYWORDS_BYTES = {name.encode(): token_type for name, token_type in KEYWORDS.items()}
+MEDICAL_TYPES_BYTES = {name.encode() for name in MEDICAL_TYPES}
+OPERATOR_TOKENS_BYTES = {text.encode(): token_type for text, token_type in OPERATOR_TOKENS.items()}
+
+STRING_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+ESCAPE_PATTERN = re.compile(r'\\([\s\S])')
+
+
+def unescape_string(body: str) -> str:
+    """Resolve as sequências de escape do corpo de uma string."""
+    if '\\' not in body:
+        return body
+    return ESCAPE_PATTERN.sub(lambda m: STRING_ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def lexical_error(source, offset) -> SyntaxDiagnostic:
+    """
+    Cria o erro léxico para a posição em que nenhum token é reconhecido:
+    string não terminada, se houver uma aspa, ou caractere inesperado.
+    """
+    char = source[offset:offset + 4]
+    if not isinstance(char, str):
+        char = bytes(char).decode('utf-8', 'ignore')
+    char = char[:1] or '?'
+    
+    line, column = LineIndex(source).line_column(offset)
+    if char == '"':
+        return SyntaxDiagnostic(f"String não terminada na linha {line}, coluna {column}", line, column)
+    return SyntaxDiagnostic(f"Caractere inesperado '{char}' na linha {line}, coluna {column}", line, column)
+
+
+class Scanner:
+    """
+    Analisador léxico de passagem única baseado em uma expressão regular mestre.
+    
+    Produz a mesma sequência de tokens que Lexer.tokenize, mas reconhece cada
+    lexema com uma única chamada a SCANNER_PATTERN.match e fatia o valor
+    diretamente do código-fonte, sem concatenar caractere a caractere.
+    
+    O código-fonte pode ser uma str ou um buffer de bytes UTF-8, como o mmap
+    devolvido por map_source. Nesse caso nenhuma cópia do texto é feita:
+    cada lexema é decodificado individualmente e os tokens guardam o
+    deslocamento em bytes, com linha e coluna resolvidas sob demanda.
+    """
+    def __init__(self, source_code):
+        self.source = source_code
+        if isinstance(source_code, str):
+            self._tokens = self._scan()
+        else:
+            self._tokens = self._scan_buffer()
+    
+    def _scan(self):
+        """Gera os tokens do código-fonte, terminando com o token EOF."""
+        source = self.source
+        match = SCANNER_PATTERN.match
+        keywords = KEYWORDS
+        medical_types = MEDICAL_TYPES
+        unit_match = UNIT_TRIE.match
+        operators = OPERATOR_TOKENS
+        
+        position = 0
+        length = len(source)
+        line = 1
+        line_start = 0
+        
+        while position < length:
+            m = match(source, position)
+            
+            if m is None:
+                # Só restam espaços e comentários, ou há um caractere inválido
+                start = TRIVIA_RE.match(source, position).end()
+                line += source.count('\n', position, start)
+                if start > position:
+                    line_start = source.rfind('\n', 0, start) + 1
+                if start == length:
+                    break
+                column = start - line_start + 1
+                if source[start] == '"':
+                    raise SyntaxDiagnostic(f"String não terminada na linha {line}, coluna {column}", line, column)
+                raise SyntaxDiagnostic(
+                    f"Caractere inesperado '{source[start]}' na linha {line}, coluna {column}", line, column
+                )
+            
+            kind = m.lastgroup
+            trivia_start = position
+            start, position = m.span(kind)
+            if start != trivia_start:
+                newlines = source.count('\n', trivia_start, start)
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind('\n', trivia_start, start) + 1
+            
+            if kind == 'identifier':
+                value = source[start:position]
+                token_type = keywords.get(value)
+                if token_type is None:
+                    token_type = TokenType.TYPE if value in medical_types else TokenType.IDENTIFIER
+                yield Token(token_type, value, line, start - line_start + 1)
+            
+            elif kind == 'operator':
+                value = source[start:position]
+                yield Token(operators[value], value, line, start - line_start + 1)
+            
+            elif kind == 'number':
+                unit, position = unit_match(source, position)
+                
+                if position == m.end('magnitude'):
+                    yield Token(TokenType.NUMBER, source[start:position], line, start - line_start + 1)
+                else:
+                    measurement = Measurement.from_parts(m.group('magnitude'), m.group('compound'), unit)
+                    yield Token(
+                        TokenType.MEASUREMENT,
+                        source[start:position],
+                        line,
+                        start - line_start + 1,
+                        measurement
+                    )
+            
+            elif kind == 'date':
+                yield Token(TokenType.DATE, source[start:position], line, start - line_start + 1)
+            
+            else:  # string
+                yield Token(
+                    TokenType.STRING,
+                    unescape_string(source[start + 1:position - 1]),
+                    line,
+                    start - line_start + 1
+                )
+                newlines = source.count('\n', start, position)
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind('\n', start, position) + 1
+        
+        # Fim do arquivo
+        yield Token(TokenType.EOF, '', line, length - line_start + 1)
+    
+    def get_next_token(self) -> Token:
+        """Obtém o próximo token do código-fonte."""
+        token = next(self._tokens, None)
+        if token is None:
+            return self._eof
+        if token.type == TokenType.EOF:
+            self._eof = token
+        return token
+    
+    def tokenize(self) -> List[Token]:
+        """Tokeniza todo o código-fonte."""
+        return list(self._tokens)
+    
+    def iter_tokens(self):
+        """Gera os tokens sob demanda, terminando com o token EOF."""
+        return self._tokens
+    
+    def _scan_buffer(self):
+        """Gera tokens com deslocamento em bytes a partir de um buffer mapeado."""
+        source = self.source
+        lines = LineIndex(source)
+        eof_code = TokenType.EOF.value
+        string_code = TokenType.STRING.value
+        measurement_code = TokenType.MEASUREMENT.value
+        
+        for code, start, end in self._spans():
+            measurement = None
+            if code == string_code:
+                value = unescape_string(source[start + 1:end - 1].decode('utf-8'))
+            elif code == eof_code:
+                value = ''
+            else:
+                value = source[start:end].decode('utf-8')
+                if code == measurement_code:
+                    measurement = parse_measurement(value)
+            yield OffsetToken(TOKEN_TYPE_BY_CODE[code], value, start, lines, measurement)
+    
+    def _spans(self, position=0):
+        """
+        Gera (código do tipo, início, fim) para cada token a partir de
+        position, sem rastrear linhas nem construir valores. Aceita str ou
+        buffers de bytes.
+        """
+        source = self.source
+        if isinstance(source, str):
+            match = SCANNER_PATTERN.match
+            trivia = TRIVIA_RE.match
+            keywords = KEYWORDS
+            medical_types = MEDICAL_TYPES
+            unit_match = UNIT_TRIE.match
+            operators = OPERATOR_TOKENS
+        else:
+            match = BYTES_SCANNER_PATTERN.match
+            trivia = TRIVIA_BYTES_RE.match
+            keywords = KEYWORDS_BYTES
+            medical_types = MEDICAL_TYPES_BYTES
+            unit_match = UNIT_BYTES_TRIE.match
+            operators = OPERATOR_TOKENS_BYTES
+        text = isinstance(source, str)
+        
+        identifier_code = TokenType.IDENTIFIER.value
+        type_code = TokenType.TYPE.value
+        number_code = TokenType.NUMBER.value
+        measurement_code = TokenType.MEASUREMENT.value
+        date_code = TokenType.DATE.value
+        string_code = TokenType.STRING.value
+        
+        length = len(source)
+        
+        while position < length:
+            m = match(source, position)
+            
+            if m is None:
+                start = trivia(source, position).end()
+                if start == length:
+                    break
+                raise lexical_error(source, start)
+            
+            kind = m.lastgroup
+            start, position = m.span(kind)
+            
+            if kind == 'identifier':
+                value = source[start:position]
+                if not text and not value.isascii():
+                    # Caminho lento: identificador com caracteres não ASCII
+                    position = self._identifier_end(start, position)
+                    value = source[start:position]
+                token_type = keywords.get(value)
+                if token_type is not None:
+                    code = token_type.value
+                else:
+                    code = type_code if value in medical_types else identifier_code
+            
+            elif kind == 'operator':
+                code = operators[source[start:position]].value
+            
+            elif kind == 'number':
+                _, position = unit_match(source, position)
+                code = number_code if position == m.end('magnitude') else measurement_code
+            
+            elif kind == 'date':
+                code = date_code
+            
+            else:  # string
+                code = string_code
+            
+            yield code, start, position
+        
+        # Fim do arquivo
+        yield TokenType.EOF.value, length, length
+    
+    def _identifier_end(self, start, end) -> int:
+        """
+        Decodifica um identificador não ASCII e retorna o fim em bytes do
+        maior prefixo que é de fato um identificador.
+        """
+        text = self.source[start:end].decode('utf-8')
+        match = IDENTIFIER_RE.match(text)
+        if match is None:
+            raise lexical_error(self.source, start)
+        return start + len(match.group().encode('utf-8'))
+    
+    def scan_table(self) -> 'TokenTable':
+        """
+        Tokeniza todo o código-fonte em uma TokenTable compacta.
+        
+        Apenas o tipo e os deslocamentos de cada token são gravados; valores,
+        linhas e colunas são obtidos da tabela quando alguém precisa deles.
+        """
+        table = TokenTable(self.source)
+        append_type = table.types.append
+        append_start = table.starts.append
+        append_end = table.ends.append
+        
+        for code, start, end in self._spans():
+            append_type(code)
+            append_start(start)
+            append_end(end)
+        
+        return table
+
+
+class LineIndex:
+    """
+    Índice dos inícios de linha de um código-fonte (str ou bytes), construído
+    apenas na primeira consulta. Converte deslocamentos em (linha, coluna).
+    """
+    def __init__(self, source):
+        self.source = source
+        self._line_starts = None
+    
+    def line_starts(self) -> array:
+        """Deslocamentos em que cada linha começa."""
+        if self._line_starts is None:
+            source = self.source
+            if isinstance(source, SourceBuffer):
+                source = source.text()
+            newline = '\n' if isinstance(source, str) else b'\n'
+            line_starts = array('I', [0])
+            line_starts.extend(m.end() for m in re.finditer(newline, source))
+            self._line_starts = line_starts
+        return self._line_starts
+    
+    def line_column(self, offset) -> Tuple[int, int]:
+        """Converte um deslocamento no código-fonte em (linha, coluna)."""
+        line_starts = self.line_starts()
+        line = bisect_right(line_starts, offset)
+        line_start = line_starts[line - 1]
+        
+        if isinstance(self.source, str):
+            return line, offset - line_start + 1
+        
+        segment = self.source[line_start:offset]
+        if isinstance(segment, str):
+            return line, len(segment) + 1
+        
+        # Deslocamentos em bytes: a coluna conta caracteres
+        if segment.isascii():
+            return line, len(segment) + 1
+        return line, len(segment.decode('utf-8', 'replace')) + 1
+
+
+class SourceBuffer:
+    """
+    Código-fonte editável guardado em blocos de até CHUNK_SIZE caracteres
+    (ou bytes). Uma edição copia apenas os blocos que ela toca, e não o
+    arquivo inteiro. Fatias funcionam como as de str e bytes.
+    """
+    CHUNK_SIZE = 1 << 15
+    
+    def __init__(self, source):
+        size = self.CHUNK_SIZE
+        self._empty = source[:0]
+        self._chunks = [source[i:i + size] for i in range(0, len(source), size)] or [self._empty]
+        self._offsets = []
+        self._length = 0
+        self._reindex(0)
+    
+    def __len__(self):
+        return self._length
+    
+    def __getitem__(self, key):
+        start, stop, _ = key.indices(self._length)
+        if start >= stop:
+            return self._empty
+        
+        offsets = self._offsets
+        chunks = self._chunks
+        index = bisect_right(offsets, start) - 1
+        base = offsets[index]
+        if stop <= base + len(chunks[index]):
+            return chunks[index][start - base:stop - base]
+        
+        pieces = [chunks[index][start - base:]]
+        index += 1
+        while offsets[index] + len(chunks[index]) < stop:
+            pieces.append(chunks[index])
+            index += 1
+        pieces.append(chunks[index][:stop - offsets[index]])
+        return self._empty.join(pieces)
+    
+    def text(self):
+        """Retorna o texto completo (uma cópia)."""
+        return self._empty.join(self._chunks)
+    
+    def replace(self, offset, deleted, inserted):
+        """Substitui deleted caracteres a partir de offset por inserted."""
+        offsets = self._offsets
+        chunks = self._chunks
+        first = max(bisect_right(offsets, offset) - 1, 0)
+        last = max(bisect_right(offsets, offset + deleted) - 1, first)
+        
+        base = offsets[first]
+        text = self._empty.join(chunks[first:last + 1])
+        text = text[:offset - base] + inserted + text[offset + deleted - base:]
+        
+        # Blocos que cresceram demais são divididos
+        size = self.CHUNK_SIZE
+        if len(text) > 2 * size:
+            pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        elif text or len(chunks) == last - first + 1:
+            pieces = [text]
+        else:
+            pieces = []
+        
+        chunks[first:last + 1] = pieces
+        del offsets[first:]
+        self._reindex(first)
+    
+    def _reindex(self, first):
+        """Recalcula o deslocamento inicial dos blocos a partir de first."""
+        offsets = self._offsets
+        position = offsets[-1] + len(self._chunks[first - 1]) if first else 0
+        for chunk in self._chunks[first:]:
+            offsets.append(position)
+            position += len(chunk)
+        self._length = position
+
+
+# Maior distância que o Scanner examina além do fim de um token: a
+# alternativa de data em 1980-05-1, a trie de unidades mais o caractere de
+# fronteira (mmol/L, até 4 bytes em UTF-8) e a parte composta de um número.
+# Um token que termina mais longe que isso antes de uma edição não é afetado.
+RELEX_LOOKAHEAD = 16
+
+# Tamanho inicial da janela de texto reanalisada por TokenTable.relex
+RELEX_WINDOW = 1024
+
+# Número de deslocamentos pendentes acumulados antes de aplicá-los à tabela
+RELEX_MAX_FENCES = 128
+
+
+class TokenTable:
+    """
+    Tabela compacta de tokens no formato estrutura de arrays.
+    
+    Cada token ocupa um código de tipo em types (array('B')) e os deslocamentos
+    de início e fim no código-fonte em starts e ends (array('I')). Linha e
+    coluna não são armazenadas: são calculadas por busca binária em um índice
+    de inícios de linha, construído apenas quando um diagnóstico precisa dele.
+    
+    A tabela pode ser atualizada por edições de texto com relex(). Para que
+    uma edição não precise deslocar todos os tokens seguintes, o deslocamento
+    fica pendente: a partir de cada índice em _fences, as posições gravadas
+    devem ser somadas ao valor correspondente em _deltas. Use start_of e
+    end_of para obter as posições no código-fonte atual.
+    """
+    def __init__(self, source):
+        self.source = source
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = LineIndex(source)
+        self._fences = [0]
+        self._deltas = [0]
+        self.error_offsets = []  # Posições dos erros léxicos (apenas após relex)
+        self._error = None
+    
+    def __len__(self):
+        return len(self.types)
+    
+    def __iter__(self):
+        return self.iter_from(0)
+    
+    def iter_from(self, first):
+        """Gera os tokens a partir do índice first, como OffsetToken."""
+        # Como na análise completa, os tokens param no primeiro erro léxico
+        stop = self.error_offsets[0] if self.error_offsets else None
+        
+        for index in range(first, len(self.types)):
+            start = self.start_of(index)
+            if stop is not None and start >= stop:
+                break
+            yield OffsetToken(
+                self.type_of(index),
+                self.value_of(index),
+                start,
+                self.lines,
+                self.measurement_of(index)
+            )
+        
+        if stop is not None:
+            raise self.error
+    
+    @property
+    def error(self) -> Optional[SyntaxDiagnostic]:
+        """Primeiro erro léxico do código-fonte atual, ou None."""
+        if self._error is None and self.error_offsets:
+            self._error = lexical_error(self.source, self.error_offsets[0])
+        return self._error
+    
+    def type_of(self, index) -> TokenType:
+        """Retorna o tipo do token na posição indicada."""
+        return TOKEN_TYPE_BY_CODE[self.types[index]]
+    
+    def _delta(self, index) -> int:
+        """Deslocamento pendente dos tokens a partir de index."""
+        fences = self._fences
+        if len(fences) == 1:
+            return self._deltas[0]
+        return self._deltas[bisect_right(fences, index) - 1]
+    
+    def start_of(self, index) -> int:
+        """Deslocamento do início do token no código-fonte atual."""
+        return self.starts[index] + self._delta(index)
+    
+    def end_of(self, index) -> int:
+        """Deslocamento do fim do token no código-fonte atual."""
+        return self.ends[index] + self._delta(index)
+    
+    def value_of(self, index) -> str:
+        """Retorna o valor do token, fatiado do código-fonte."""
+        start = self.start_of(index)
+        end = self.end_of(index)
+        text = self.source[start:end]
+        if not isinstance(text, str):
+            text = text.decode('utf-8')
+        if self.types[index] == TokenType.STRING.value:
+            return unescape_string(text[1:-1])
+        return text
+    
+    def measurement_of(self, index) -> Optional[Measurement]:
+        """Retorna a medida interpretada de um token MEASUREMENT, ou None."""
+        if self.types[index] != TokenType.MEASUREMENT.value:
+            return None
+        return parse_measurement(self.value_of(index))
+    
+    def line_column(self, offset) -> Tuple[int, int]:
+        """Converte um deslocamento no código-fonte em (linha, coluna)."""
+        return self.lines.line_column(offset)
+    
+    def index_at(self, offset) -> int:
+        """Índice do token que começa em offset (o EOF, no fim do código-fonte)."""
+        # Só o EOF é vazio: o primeiro token que termina depois de offset é
+        # o que começa nele
+        return min(self._first_ending_at(offset + 1), len(self.types) - 1)
+    
+    def relex(self, offset, deleted, inserted) -> Tuple[int, int, int]:
+        """
+        Aplica uma edição de texto ao código-fonte e atualiza a tabela.
+        
+        Remove deleted caracteres (bytes, se o código-fonte for um buffer) a
+        partir de offset e insere inserted em seu lugar. Apenas os tokens a
+        partir do último que termina antes de offset - RELEX_LOOKAHEAD são
+        reanalisados: como o Scanner não guarda estado entre tokens, o fim
+        de qualquer token anterior é um ponto de reinício seguro. A varredura
+        para assim que um novo token termina, após o texto inserido, na
+        mesma posição que um token antigo; dali em diante os tokens antigos
+        são reaproveitados, e o deslocamento deles fica pendente.
+        
+        Comentários de bloco e strings não terminados são tratados como na
+        análise completa: o comentário consome o restante do arquivo e a
+        string, que pode ocupar várias linhas, vai até a próxima aspa ou
+        produz um erro léxico. Para que a edição seguinte ainda encontre
+        tokens com que sincronizar, o caractere do erro (a aspa, por exemplo)
+        é pulado e a varredura continua; a posição vai para error_offsets,
+        o primeiro erro fica em self.error e a iteração da tabela para nele,
+        como Scanner faria. Como a edição pode fechar uma aspa sem par, a
+        varredura recomeça antes da primeira delas. Uma tabela vazia, criada com TokenTable(''),
+        aceita a edição que insere o texto inteiro.
+        
+        Retorna (primeiro, fim_antigo, fim_novo): os tokens antigos
+        [primeiro, fim_antigo) foram substituídos pelos novos
+        [primeiro, fim_novo).
+        """
+        if not isinstance(self.source, SourceBuffer):
+            self.source = SourceBuffer(self.source)
+        source = self.source
+        if isinstance(source[:0], bytes) and isinstance(inserted, str):
+            inserted = inserted.encode('utf-8')
+        
+        delta = len(inserted) - deleted
+        inserted_end = offset + len(inserted)
+        count = len(self.types)
+        eof_code = TokenType.EOF.value
+        
+        # Primeiro token cujo reconhecimento pode ter examinado o texto editado
+        first = self._first_ending_at(offset - RELEX_LOOKAHEAD)
+        restart = self.end_of(first - 1) if first else 0
+        
+        # Uma aspa sem par antes da edição pode ser fechada por ela: a
+        # varredura recomeça antes da primeira delas
+        quote = '"' if isinstance(source[:0], str) else b'"'
+        for error_offset in self.error_offsets:
+            if error_offset >= restart:
+                break
+            if source[error_offset:error_offset + 1] == quote:
+                first = self._first_ending_at(error_offset + 1)
+                restart = self.end_of(first - 1) if first else 0
+                break
+        
+        source.replace(offset, deleted, inserted)
+        
+        types = array('B')
+        starts = array('I')
+        ends = array('I')
+        resync = None
+        errors = []
+        
+        for code, start, end in self._window_spans(restart):
+            if code is None:
+                errors.append(start)
+                continue
+            
+            types.append(code)
+            starts.append(start)
+            ends.append(end)
+            
+            if code == eof_code or end < inserted_end:
+                continue
+            
+            # Mesmo estado (mesma posição no texto inalterado) que algum
+            # token antigo: o restante da tabela não muda
+            old_end = end - delta
+            match = self._first_ending_at(old_end, first)
+            if match < count and self.end_of(match) == old_end and self.types[match] != eof_code:
+                resync = match + 1
+                break
+        
+        stop = count if resync is None else resync
+        
+        # Erros antes do reinício continuam; os posteriores ao ponto de
+        # sincronização são deslocados com os tokens reaproveitados
+        error_offsets = self.error_offsets
+        kept = error_offsets[:bisect_left(error_offsets, restart)]
+        if resync is not None:
+            tail = bisect_left(error_offsets, old_end)
+            errors.extend(error_offset + delta for error_offset in error_offsets[tail:])
+        
+        self._splice_fences(first, stop, len(types), delta)
+        self.types[first:stop] = types
+        self.starts[first:stop] = starts
+        self.ends[first:stop] = ends
+        if len(self._fences) > RELEX_MAX_FENCES:
+            self._apply_fences()
+        
+        self.lines = LineIndex(source)
+        self.error_offsets = kept + errors
+        self._error = None
+        
+        return first, stop, first + len(types)
+    
+    def _window_spans(self, position):
+        """
+        Gera (código, início, fim) a partir de position, como
+        Scanner._spans, varrendo janelas do código-fonte que dobram de
+        tamanho. Um token que termina a menos de RELEX_LOOKAHEAD do fim da
+        janela pode depender do texto que ficou de fora e é reanalisado na
+        janela seguinte. Um erro léxico é gerado como (None, início, fim) do
+        caractere pulado.
+        """
+        source = self.source
+        length = len(source)
+        size = RELEX_WINDOW
+        eof_code = TokenType.EOF.value
+        
+        while True:
+            extend = True
+            window_end = min(length, position + size)
+            if isinstance(source[:0], bytes):
+                # A janela não pode cortar um caractere UTF-8 ao meio
+                while window_end < length and 0x80 <= source[window_end:window_end + 1][0] < 0xC0:
+                    window_end -= 1
+            text = source[position:window_end]
+            complete = window_end == length
+            limit = len(text) - RELEX_LOOKAHEAD
+            resume = 0
+            
+            try:
+                for code, start, end in Scanner(text)._spans():
+                    if not complete and (code == eof_code or end > limit):
+                        break
+                    resume = end
+                    yield code, position + start, position + end
+                else:
+                    return
+            except SyntaxError:
+                trivia = TRIVIA_RE if isinstance(text, str) else TRIVIA_BYTES_RE
+                failed = trivia.match(text, resume).end()
+                
+                # Uma aspa sem par pode ser fechada fora da janela
+                if complete or (failed <= limit and text[failed:failed + 1] not in ('"', b'"')):
+                    if isinstance(text, str):
+                        skip = 1
+                    else:
+                        skip = len(text[failed:failed + 4].decode('utf-8', 'ignore')[:1].encode('utf-8')) or 1
+                    resume = failed + skip
+                    yield None, position + failed, position + resume
+                    extend = False
+            
+            position += resume
+            if extend:
+                size *= 2
+    
+    def _first_ending_at(self, offset, low=0) -> int:
+        """Índice do primeiro token, a partir de low, que termina em offset ou depois."""
+        ends = self.ends
+        fences = self._fences
+        deltas = self._deltas
+        count = len(ends)
+        
+        for segment in range(bisect_right(fences, low) - 1, len(fences)):
+            segment_start = max(fences[segment], low)
+            segment_end = fences[segment + 1] if segment + 1 < len(fences) else count
+            if segment_end > segment_start and ends[segment_end - 1] + deltas[segment] >= offset:
+                return bisect_left(ends, offset - deltas[segment], segment_start, segment_end)
+        return count
+    
+    def _splice_fences(self, first, stop, added, delta):
+        """
+        Atualiza os deslocamentos pendentes para a substituição dos tokens
+        [first, stop) por added tokens novos, gravados já em posição final.
+        Os tokens seguintes passam a estar delta posições adiante.
+        """
+        fences = self._fences
+        deltas = self._deltas
+        tail = bisect_right(fences, stop) - 1
+        tail_delta = deltas[tail] + delta
+        shift = added - (stop - first)
+        
+        keep = bisect_left(fences, first)
+        new_fences = fences[:keep] + [first, first + added] + [f + shift for f in fences[tail + 1:]]
+        new_deltas = deltas[:keep] + [0, tail_delta] + [d + delta for d in deltas[tail + 1:]]
+        
+        # Remove trechos vazios e vizinhos com o mesmo deslocamento
+        size = len(self.types) + shift
+        self._fences = [0]
+        self._deltas = [new_deltas[0]]
+        for fence, fence_delta in zip(new_fences[1:], new_deltas[1:]):
+            if fence == self._fences[-1]:
+                self._deltas[-1] = fence_delta
+            elif fence < size and fence_delta != self._deltas[-1]:
+                self._fences.append(fence)
+                self._deltas.append(fence_delta)
+        
+        if len(self._deltas) > 1 and self._fences[-1] >= size:
+            self._fences.pop()
+            self._deltas.pop()
+    
+    def _apply_fences(self):
+        """Soma os deslocamentos pendentes às posições gravadas."""
+        fences = self._fences + [len(self.types)]
+        for segment, delta in enumerate(self._deltas):
+            if delta:
+                low, high = fences[segment], fences[segment + 1]
+                self.starts[low:high] = array('I', [value + delta for value in self.starts[low:high]])
+                self.ends[low:high] = array('I', [value + delta for value in self.ends[low:high]])
+        self._fences = [0]
+        self._deltas = [0]
+
+
+class OffsetToken(Token):
+    """
+    Token que guarda apenas seu deslocamento no código-fonte. Linha e coluna
+    são resolvidas pelo LineIndex só quando acessadas (p. ex. em Parser.error).
+    """
+    __slots__ = ('offset', 'lines')
+    
+    def __init__(self, token_type: TokenType, value: str, offset: int, lines: LineIndex,
+                 measurement: Optional[Measurement] = None):
+        self.type = token_type
+        self.value = value
+        self.offset = offset
+        self.lines = lines
+        self.measurement = measurement
+    
+    @property
+    def line(self):
+        return self.lines.line_column(self.offset)[0]
+    
+    @property
+    def column(self):
+        return self.lines.line_column(self.offset)[1]
+
+
+def map_source(path):
+    """
+    Mapeia um arquivo .charcot em memória, somente leitura, para ser
+    analisado pelo Scanner sem carregar uma cópia do texto.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class TokenStream:
+    """
+    Fonte de tokens consumida sob demanda pelo Parser.
+    
+    Aceita uma lista ou um gerador de tokens e mantém apenas os tokens
+    já lidos à frente do atual em um pequeno buffer circular, de modo que
+    a memória não cresce com o tamanho do arquivo.
+    """
+    def __init__(self, tokens, lookahead=4):
+        self._source = iter(tokens)
+        self._ring = [None] * lookahead
+        self._head = 0
+        self._count = 0
+        self._last = None
+    
+    def _pull(self) -> Token:
+        """Lê o próximo token da fonte; após o fim, repete o token EOF."""
+        token = next(self._source, None)
+        
+        if token is None:
+            last = self._last
+            if last is None or last.type != TokenType.EOF:
+                line, column = (last.line, last.column) if last else (1, 1)
+                self._last = Token(TokenType.EOF, '', line, column)
+            return self._last
+        
+        self._last = token
+        return token
+    
+    def next(self) -> Token:
+        """Consome e retorna o próximo token."""
+        if self._count:
+            ring = self._ring
+            token = ring[self._head]
+            ring[self._head] = None
+            self._head = (self._head + 1) % len(ring)
+            self._count -= 1
+            return token
+        return self._pull()
+    
+    def peek(self, offset=1) -> Token:
+        """Retorna o token na posição indicada à frente sem consumi-lo."""
+        ring = self._ring
+        size = len(ring)
+        if not 1 <= offset <= size:
+            raise ValueError(f"Lookahead de {offset} tokens excede o buffer de {size}")
+        
+        while self._count < offset:
+            ring[(self._head + self._count) % size] = self._pull()
+            self._count += 1
+        
+        return ring[(self._head + offset - 1) % size]
 
 
 #################################################
 # PARTE 2: ANÁLISE SINTÁTICA (PARSER)
 #################################################
 
+def trampoline(routine, expand=None):
+    """
+    Executa o gerador routine com uma pilha explícita, sem recursão em Python.
+    
+    Um passo que depende de um subproblema produz (yield) o gerador desse
+    subproblema e recebe o resultado dele (o valor do return) como valor do
+    yield. Itens que não são geradores passam por expand, se informada, que
+    devolve um gerador ou o resultado pronto; sem expand, voltam inalterados.
+    Exceções sobem para o gerador que produziu o subproblema, como em uma
+    chamada comum. Assim, a profundidade do problema não é limitada pela
+    pilha de chamadas do Python.
+    """
+    stack = []  # geradores à espera do resultado de top
+    top = routine
+    value = None
+    error = None
+    
+    while True:
+        try:
+            if error is None:
+                item = top.send(value)
+            else:
+                thrown, error = error, None
+                item = top.throw(thrown)
+        except StopIteration as stop:
+            if not stack:
+                return stop.value
+            value = stop.value
+            top = stack.pop()
+            continue
+        except Exception as exception:
+            if not stack:
+                raise
+            error = exception
+            top = stack.pop()
+            continue
+        
+        if expand is not None and type(item) is not GeneratorType:
+            try:
+                item = expand(item)
+            except Exception as exception:
+                error = exception
+                continue
+        
+        if type(item) is GeneratorType:
+            stack.append(top)
+            top = item
+            value = None
+        else:
+            value = item
+
 class ASTNode:
-    """Classe base para todos os nós da AST (Árvore Sintática Abstrata)."""
-    pass
+    """
+    Classe base para todos os nós da AST (Árvore Sintática Abstrata).
+    
+    Os nós declaram seus campos em __slots__, sem __dict__ por instância,
+    o que reduz a memória de bibliotecas de protocolos com centenas de
+    milhares de nós.
+    """
+    __slots__ = ()
+
+class NodeVisitor:
+    """
+    Base dos passes que percorrem a AST.
+    
+    visit(node) chama visit_<Classe>(node), ou generic_visit se o método não
+    existir. Um método que precisa visitar um filho faz
+    `resultado = yield filho` em vez de chamar self.visit(filho): o método
+    passa a ser um gerador e a travessia usa a pilha explícita de
+    trampoline, de modo que ASTs com centenas de milhares de níveis são
+    percorridas sem RecursionError. Métodos sem filhos podem ser funções
+    comuns.
+    
+    O método de cada classe de nó é procurado uma única vez por classe de
+    visitante e guardado em _visit_table, de modo que o despacho é uma
+    consulta a um dicionário, sem montar o nome do método a cada nó.
+    """
+    _visit_table: Dict[type, Callable] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Cada visitante tem a sua tabela, preenchida sob demanda
+        cls._visit_table = {}
+    
+    def visit(self, node):
+        """Visita um nó e retorna o resultado do seu método visit_."""
+        result = self.dispatch(node)
+        if type(result) is GeneratorType:
+            result = trampoline(result, self.dispatch)
+        return result
+    
+    def dispatch(self, node):
+        """Chama o método visit_ do nó; retorna o resultado ou um gerador."""
+        try:
+            method = self._visit_table[type(node)]
+        except KeyError:
+            method = self._visit_method(type(node))
+        return method(self, node)
+    
+    @classmethod
+    def _visit_method(cls, node_class) -> Callable:
+        """Procura visit_<Classe> (ou generic_visit) e guarda-o na tabela."""
+        method = getattr(cls, f'visit_{node_class.__name__}', cls.generic_visit)
+        cls._visit_table[node_class] = method
+        return method
+    
+    def generic_visit(self, node):
+        return None
 
 class Program(ASTNode):
     """Nó raiz da AST, representando um programa completo."""
+    __slots__ = ('declarations',)
+    
     def __init__(self, declarations):
         self.declarations = declarations
 
 class ImportDeclaration(ASTNode):
     """Declaração de importação de módulo."""
-    def __init__(self, module_name):
+    __slots__ = ('module_name', 'interface', 'slot')
+    
+    def __init__(self, module_name, interface=None, slot=None):
         self.module_name = module_name
+        self.interface = interface  # ModuleInterface, preenchida pela análise semântica
+        self.slot = slot            # Posição do primeiro símbolo importado no escopo global
 
 class VariableDeclaration(ASTNode):
     """Declaração de variável com tipo opcional."""
-    def __init__(self, name, type_name=None, value=None):
+    __slots__ = ('name', 'type_name', 'value', 'slot', 'value_type')
+    
+    def __init__(self, name, type_name=None, value=None, slot=None, value_type=None):
         self.name = name
         self.type_name = type_name
         self.value = value
+        self.slot = slot  # Posição no escopo, atribuída pela análise semântica
+        self.value_type = value_type  # Sem tipo declarado, o tipo inferido do valor inicial
 
 class PatientDeclaration(ASTNode):
     """Declaração de paciente."""
-    def __init__(self, name, properties):
+    __slots__ = ('name', 'properties', 'slot')
+    
+    def __init__(self, name, properties, slot=None):
         self.name = name
         self.properties = properties
+        self.slot = slot  # Posição no escopo, atribuída pela análise semântica
 
 class ProcedureDeclaration(ASTNode):
     """Declaração de procedimento (função)."""
+    __slots__ = ('name', 'parameters', 'body')
+    
     def __init__(self, name, parameters, body):
         self.name = name
         self.parameters = parameters
@@ -486,6 +1679,8 @@ class ProcedureDeclaration(ASTNode):
 
 class TreatmentDeclaration(ASTNode):
     """Declaração de protocolo de tratamento."""
+    __slots__ = ('name', 'parameters', 'body')
+    
     def __init__(self, name, parameters, body):
         self.name = name
         self.parameters = parameters
@@ -493,17 +1688,24 @@ class TreatmentDeclaration(ASTNode):
 
 class Parameter(ASTNode):
     """Parâmetro de função/procedimento."""
-    def __init__(self, name, type_name=None):
+    __slots__ = ('name', 'type_name', 'slot')
+    
+    def __init__(self, name, type_name=None, slot=None):
         self.name = name
         self.type_name = type_name
+        self.slot = slot  # Posição no escopo, atribuída pela análise semântica
 
 class BlockStatement(ASTNode):
     """Bloco de declarações entre chaves {}."""
+    __slots__ = ('statements',)
+    
     def __init__(self, statements):
         self.statements = statements
 
 class IfStatement(ASTNode):
     """Declaração condicional if/else."""
+    __slots__ = ('condition', 'if_body', 'else_body')
+    
     def __init__(self, condition, if_body, else_body=None):
         self.condition = condition
         self.if_body = if_body
@@ -511,12 +1713,16 @@ class IfStatement(ASTNode):
 
 class WhileStatement(ASTNode):
     """Declaração de loop while."""
+    __slots__ = ('condition', 'body')
+    
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 class ForEachStatement(ASTNode):
     """Declaração de loop foreach."""
+    __slots__ = ('variable', 'collection', 'body')
+    
     def __init__(self, variable, collection, body):
         self.variable = variable
         self.collection = collection
@@ -524,28 +1730,38 @@ class ForEachStatement(ASTNode):
 
 class ClinicalPathStatement(ASTNode):
     """Declaração de caminho clínico (similar a switch/case)."""
+    __slots__ = ('expression', 'cases')
+    
     def __init__(self, expression, cases):
         self.expression = expression
         self.cases = cases
 
 class CaseStatement(ASTNode):
     """Caso em uma declaração de caminho clínico."""
+    __slots__ = ('value', 'body')
+    
     def __init__(self, value, body):
         self.value = value
         self.body = body
 
 class ReturnStatement(ASTNode):
     """Declaração de retorno."""
+    __slots__ = ('value',)
+    
     def __init__(self, value=None):
         self.value = value
 
 class ExpressionStatement(ASTNode):
     """Declaração que consiste apenas em uma expressão."""
+    __slots__ = ('expression',)
+    
     def __init__(self, expression):
         self.expression = expression
 
 class PrescribeStatement(ASTNode):
     """Declaração de prescrição de medicamento."""
+    __slots__ = ('patient', 'medication', 'dose', 'instructions', 'duration')
+    
     def __init__(self, patient, medication, dose, instructions=None, duration=None):
         self.patient = patient
         self.medication = medication
@@ -555,6 +1771,8 @@ class PrescribeStatement(ASTNode):
 
 class BinaryOperation(ASTNode):
     """Operação binária (a + b, a > b, etc)."""
+    __slots__ = ('left', 'operator', 'right')
+    
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -562,29 +1780,51 @@ class BinaryOperation(ASTNode):
 
 class UnaryOperation(ASTNode):
     """Operação unária (!a, -b, etc)."""
+    __slots__ = ('operator', 'operand')
+    
     def __init__(self, operator, operand):
         self.operator = operator
         self.operand = operand
 
 class VariableReference(ASTNode):
-    """Referência a uma variável."""
-    def __init__(self, name):
+    """
+    Referência a uma variável. A análise semântica resolve a referência:
+    depth é o número de escopos entre o uso e a declaração e slot, a
+    posição da declaração nesse escopo (None se a variável não existe).
+    """
+    __slots__ = ('name', 'depth', 'slot')
+    
+    def __init__(self, name, depth=None, slot=None):
         self.name = name
+        self.depth = depth
+        self.slot = slot
 
 class PropertyAccess(ASTNode):
     """Acesso a uma propriedade (obj.prop)."""
+    __slots__ = ('object_expr', 'property_name')
+    
     def __init__(self, object_expr, property_name):
         self.object_expr = object_expr
         self.property_name = property_name
 
 class FunctionCall(ASTNode):
     """Chamada de função/procedimento."""
-    def __init__(self, name, arguments=None):
+    __slots__ = ('name', 'arguments', 'resolved')
+    
+    def __init__(self, name, arguments=None, resolved=None):
         self.name = name
         self.arguments = arguments or []
+        # Resolução de uma função médica pela análise semântica: o resultado
+        # (bool), quando a chamada é decidida na compilação, o id do
+        # medicamento literal na base de interações (int) ou, em
+        # verify_allergies, as palavras de 64 bits da sua máscara de
+        # alergênios (tuple)
+        self.resolved = resolved
 
 class MethodCall(ASTNode):
     """Chamada de método (obj.method())."""
+    __slots__ = ('object_expr', 'method_name', 'arguments')
+    
     def __init__(self, object_expr, method_name, arguments=None):
         self.object_expr = object_expr
         self.method_name = method_name
@@ -592,62 +1832,162 @@ class MethodCall(ASTNode):
 
 class Literal(ASTNode):
     """Valor literal (número, string, etc)."""
-    def __init__(self, value, literal_type):
+    __slots__ = ('value', 'literal_type', 'measurement')
+    
+    def __init__(self, value, literal_type, measurement=None):
         self.value = value
         self.literal_type = literal_type
+        self.measurement = measurement  # Measurement do token, para medidas
 
 class ArrayLiteral(ASTNode):
     """Lista de valores."""
+    __slots__ = ('elements',)
+    
     def __init__(self, elements):
         self.elements = elements
 
 class ObjectLiteral(ASTNode):
     """Objeto literal com pares chave-valor."""
+    __slots__ = ('properties',)
+    
     def __init__(self, properties):
         self.properties = properties
 
 class PropertyAssignment(ASTNode):
     """Atribuição de propriedade em um objeto literal."""
+    __slots__ = ('name', 'value')
+    
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
+# Precedência dos operadores binários, do menor para o maior nível; todos
+# são associativos à esquerda. A atribuição ('='), associativa à direita e de
+# menor precedência, é tratada à parte em Parser.expression.
+BINARY_PRECEDENCE = {
+    TokenType.OR: 1,
+    TokenType.AND: 2,
+    TokenType.EQ: 3,
+    TokenType.NEQ: 3,
+    TokenType.LT: 4,
+    TokenType.GT: 4,
+    TokenType.LTE: 4,
+    TokenType.GTE: 4,
+    TokenType.PLUS: 5,
+    TokenType.MINUS: 5,
+    TokenType.TIMES: 6,
+    TokenType.DIVIDE: 6,
+}
+
+UNARY_OPERATORS = frozenset({TokenType.NOT, TokenType.MINUS})
+
+# Tokens que formam um Literal e o literal_type correspondente
+LITERAL_TYPES = {
+    TokenType.NUMBER: "number",
+    TokenType.STRING: "string",
+    TokenType.DATE: "date",
+    TokenType.MEASUREMENT: "measurement",
+}
+
+# Palavras-chave que iniciam uma declaração de nível superior; a recuperação
+# de erros do parser retoma a análise nelas
+DECLARATION_KEYWORDS = frozenset({
+    TokenType.PROCEDURE, TokenType.TREATMENT, TokenType.PATIENT, TokenType.IMPORT
+})
+
 class Parser:
     """
     Analisador sintático para a linguagem Charcot.
-    Constrói uma Árvore Sintática Abstrata (AST) a partir de uma lista de tokens.
-    """
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.current_token_index = 0
-        self.current_token = self.tokens[0]
+    Constrói uma Árvore Sintática Abstrata (AST) a partir de uma lista de tokens
+    ou de um gerador, consumido sob demanda através de um TokenStream.
     
-    def error(self, message):
-        """Levanta um erro de sintaxe com uma mensagem específica."""
+    Com recover=True, um erro de sintaxe não interrompe a análise: ele é
+    guardado em diagnostics, os tokens são descartados até um ponto de
+    sincronização (';', '}' ou uma palavra-chave de declaração) e a análise
+    continua. O comando ou a declaração com erro fica fora da AST parcial.
+    """
+    def __init__(self, tokens, recover=False):
+        self.tokens = tokens if isinstance(tokens, TokenStream) else TokenStream(tokens)
+        self.recover = recover
+        self.diagnostics: List[SyntaxDiagnostic] = []
+        try:
+            self.current_token = self.tokens.next()
+        except SyntaxError as error:
+            if not recover:
+                raise
+            # Erro léxico já no primeiro token: resta apenas o EOF
+            self.diagnostics.append(error)
+            self.current_token = self.tokens.next()
+    
+    def syntax_error(self, message) -> SyntaxDiagnostic:
+        """Cria o erro de sintaxe para o token atual."""
         token = self.current_token
-        raise SyntaxError(
+        return SyntaxDiagnostic(
             f"{message} na linha {token.line}, coluna {token.column}, " +
-            f"encontrado '{token.value}' ({token.type})"
+            f"encontrado '{token.value}' ({token.type})",
+            token.line, token.column
         )
     
+    def error(self, message):
+        """Levanta um erro de sintaxe com uma mensagem específica."""
+        raise self.syntax_error(message)
+    
+    def synchronize(self, error):
+        """
+        Registra o erro e descarta tokens até um ponto de sincronização:
+        consome o próximo ';' ou para antes de '}', de uma palavra-chave de
+        declaração ou do fim do arquivo. Um bloco '{ ... }' aberto durante
+        o descarte é pulado inteiro e também encerra a sincronização.
+        """
+        self.diagnostics.append(error)
+        depth = 0
+        
+        while True:
+            token_type = self.current_token.type
+            if token_type == TokenType.EOF or token_type in DECLARATION_KEYWORDS:
+                return
+            if token_type == TokenType.RBRACE:
+                if not depth:
+                    return
+                depth -= 1
+                self.skip()
+                if not depth:
+                    return
+                continue
+            
+            if token_type == TokenType.LBRACE:
+                depth += 1
+            self.skip()
+            if token_type == TokenType.SEMICOLON and not depth:
+                return
+    
+    def skip(self):
+        """
+        Descarta o token atual durante a recuperação. Um erro léxico ao ler
+        o próximo token também é registrado; depois dele vem o EOF.
+        """
+        try:
+            self.advance()
+        except SyntaxError as error:
+            self.diagnostics.append(error)
+    
     def eat(self, token_type):
         """
         Consome o token atual se for do tipo esperado,
         avançando para o próximo token.
         """
         if self.current_token.type == token_type:
-            self.current_token_index += 1
-            if self.current_token_index < len(self.tokens):
-                self.current_token = self.tokens[self.current_token_index]
+            self.current_token = self.tokens.next()
             return
         self.error(f"Esperado {token_type}, mas encontrado {self.current_token.type}")
     
+    def advance(self):
+        """Consome o token atual, cujo tipo o chamador já verificou."""
+        self.current_token = self.tokens.next()
+    
     def peek(self, offset=1):
         """Verifica um token à frente sem consumir o token atual."""
-        peek_index = self.current_token_index + offset
-        if peek_index < len(self.tokens):
-            return self.tokens[peek_index]
-        return None
+        return self.tokens.peek(offset)
     
     def parse(self):
         """Ponto de entrada principal do parser."""
@@ -657,12 +1997,28 @@ class Parser:
         """
         program : declaration* EOF
         """
-        declarations = []
-        
+        return Program(list(self.iter_declarations()))
+    
+    def iter_declarations(self):
+        """
+        Gera as declarações de nível superior uma a uma, permitindo
+        processar o programa sem manter a AST inteira em memória.
+        """
         while self.current_token.type != TokenType.EOF:
-            declarations.append(self.declaration())
-        
-        return Program(declarations)
+            if not self.recover:
+                yield self.declaration()
+                continue
+            
+            try:
+                declaration = self.declaration()
+            except SyntaxError as error:
+                self.synchronize(error)
+                # Um '}' sem par no nível superior não fecha nada
+                if self.current_token.type == TokenType.RBRACE:
+                    self.skip()
+                continue
+            
+            yield declaration
     
     def declaration(self):
         """
@@ -717,15 +2073,7 @@ class Parser:
         type_name = None
         if self.current_token.type == TokenType.COLON:
             self.eat(TokenType.COLON)
-            
-            if self.current_token.type == TokenType.TYPE:
-                type_name = self.current_token.value
-                self.eat(TokenType.TYPE)
-            elif self.current_token.type == TokenType.IDENTIFIER:
-                type_name = self.current_token.value
-                self.eat(TokenType.IDENTIFIER)
-            else:
-                self.error("Esperado tipo após ':'")
+            type_name = self.type_name()
         
         value = None
         if self.current_token.type == TokenType.ASSIGN:
@@ -736,6 +2084,29 @@ class Parser:
         
         return VariableDeclaration(variable_name, type_name, value)
     
+    def type_name(self):
+        """
+        type_name : TYPE | identifier | identifier '/' identifier
+        
+        A última forma aceita unidades com barra (mg/dL, mmol/L), que o
+        analisador léxico só reconhece logo após um número.
+        """
+        token = self.current_token
+        if token.type == TokenType.TYPE:
+            self.eat(TokenType.TYPE)
+            return token.value
+        if token.type != TokenType.IDENTIFIER:
+            self.error("Esperado tipo após ':'")
+        self.eat(TokenType.IDENTIFIER)
+        
+        if self.current_token.type == TokenType.DIVIDE and self.peek().type == TokenType.IDENTIFIER:
+            symbol = f"{token.value}/{self.peek().value}"
+            if symbol in UNIT_BY_SYMBOL:
+                self.eat(TokenType.DIVIDE)
+                self.eat(TokenType.IDENTIFIER)
+                return intern(symbol)
+        return token.value
+    
     def patient_declaration(self):
         """
         patient_declaration : 'patient' identifier ':' 'Patient' '{' property_list '}'
@@ -812,7 +2183,7 @@ class Parser:
         parameters = self.parameter_list()
         self.eat(TokenType.RPAREN)
         
-        body = self.block_statement()
+        body = trampoline(self.block_statement())
         
         return ProcedureDeclaration(procedure_name, parameters, body)
     
@@ -832,7 +2203,7 @@ class Parser:
         parameters = self.parameter_list()
         self.eat(TokenType.RPAREN)
         
-        body = self.block_statement()
+        body = trampoline(self.block_statement())
         
         return TreatmentDeclaration(treatment_name, parameters, body)
     
@@ -864,27 +2235,39 @@ class Parser:
         type_name = None
         if self.current_token.type == TokenType.COLON:
             self.eat(TokenType.COLON)
-            
-            if self.current_token.type == TokenType.TYPE:
-                type_name = self.current_token.value
-                self.eat(TokenType.TYPE)
-            elif self.current_token.type == TokenType.IDENTIFIER:
-                type_name = self.current_token.value
-                self.eat(TokenType.IDENTIFIER)
-            else:
-                self.error("Esperado tipo após ':'")
+            type_name = self.type_name()
         
         return Parameter(param_name, type_name)
     
     def block_statement(self):
         """
         block_statement : '{' statement* '}'
+        
+        Como os demais comandos compostos, é um gerador executado por
+        trampoline: cada comando aninhado é produzido com yield em vez de
+        analisado recursivamente, e o aninhamento não consome a pilha de
+        chamadas do Python.
         """
         self.eat(TokenType.LBRACE)
         
         statements = []
         while self.current_token.type != TokenType.RBRACE:
-            statements.append(self.statement())
+            if not self.recover:
+                statements.append((yield self.statement()))
+                continue
+            
+            token_type = self.current_token.type
+            if token_type == TokenType.EOF or token_type in DECLARATION_KEYWORDS:
+                # Bloco não fechado: a próxima declaração começa aqui
+                self.diagnostics.append(self.syntax_error(
+                    f"Esperado {TokenType.RBRACE}, mas encontrado {token_type}"
+                ))
+                return BlockStatement(statements)
+            
+            try:
+                statements.append((yield self.statement()))
+            except SyntaxError as error:
+                self.synchronize(error)
         
         self.eat(TokenType.RBRACE)
         
@@ -901,6 +2284,9 @@ class Parser:
                   | return_statement
                   | expression_statement
                   | prescribe_statement
+        
+        Comandos compostos retornam o gerador que os analisa, a ser executado
+        por trampoline (ver block_statement); os simples, o nó já pronto.
         """
         if self.current_token.type == TokenType.LBRACE:
             return self.block_statement()
@@ -932,12 +2318,12 @@ class Parser:
         condition = self.expression()
         self.eat(TokenType.RPAREN)
         
-        if_body = self.statement()
+        if_body = yield self.statement()
         
         else_body = None
         if self.current_token.type == TokenType.ELSE:
             self.eat(TokenType.ELSE)
-            else_body = self.statement()
+            else_body = yield self.statement()
         
         return IfStatement(condition, if_body, else_body)
     
@@ -951,7 +2337,7 @@ class Parser:
         condition = self.expression()
         self.eat(TokenType.RPAREN)
         
-        body = self.statement()
+        body = yield self.statement()
         
         return WhileStatement(condition, body)
     
@@ -978,7 +2364,7 @@ class Parser:
         
         self.eat(TokenType.RPAREN)
         
-        body = self.statement()
+        body = yield self.statement()
         
         return ForEachStatement(variable, collection, body)
     
@@ -994,7 +2380,7 @@ class Parser:
         
         cases = []
         while self.current_token.type == TokenType.CASE:
-            cases.append(self.case_statement())
+            cases.append((yield self.case_statement()))
         
         self.eat(TokenType.RBRACE)
         
@@ -1010,7 +2396,7 @@ class Parser:
         
         self.eat(TokenType.COLON)
         
-        body = self.statement()
+        body = yield self.statement()
         
         return CaseStatement(value, body)
     
@@ -1074,127 +2460,57 @@ class Parser:
     
     def expression(self):
         """
-        expression : assignment_expression
-        """
-        return self.assignment_expression()
-    
-    def assignment_expression(self):
-        """
-        assignment_expression : logical_or_expression ('=' assignment_expression)?
+        expression : binary_expression ('=' expression)?
         """
-        expr = self.logical_or_expression()
+        expr = self.binary_expression()
         
         if self.current_token.type == TokenType.ASSIGN:
-            self.eat(TokenType.ASSIGN)
-            right = self.assignment_expression()
+            self.advance()
+            right = self.expression()
             expr = BinaryOperation(expr, '=', right)
         
         return expr
     
-    def logical_or_expression(self):
+    def binary_expression(self, min_precedence=1):
         """
-        logical_or_expression : logical_and_expression ('||' logical_and_expression)*
-        """
-        expr = self.logical_and_expression()
-        
-        while self.current_token.type == TokenType.OR:
-            operator = self.current_token.value
-            self.eat(TokenType.OR)
-            right = self.logical_and_expression()
-            expr = BinaryOperation(expr, operator, right)
-        
-        return expr
-    
-    def logical_and_expression(self):
-        """
-        logical_and_expression : equality_expression ('&&' equality_expression)*
-        """
-        expr = self.equality_expression()
-        
-        while self.current_token.type == TokenType.AND:
-            operator = self.current_token.value
-            self.eat(TokenType.AND)
-            right = self.equality_expression()
-            expr = BinaryOperation(expr, operator, right)
-        
-        return expr
-    
-    def equality_expression(self):
-        """
-        equality_expression : relational_expression (('==' | '!=') relational_expression)*
-        """
-        expr = self.relational_expression()
-        
-        while (self.current_token.type == TokenType.EQ or
-               self.current_token.type == TokenType.NEQ):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            right = self.relational_expression()
-            expr = BinaryOperation(expr, operator, right)
-        
-        return expr
-    
-    def relational_expression(self):
-        """
-        relational_expression : additive_expression (('<' | '>' | '<=' | '>=') additive_expression)*
-        """
-        expr = self.additive_expression()
-        
-        while (self.current_token.type == TokenType.LT or
-               self.current_token.type == TokenType.GT or
-               self.current_token.type == TokenType.LTE or
-               self.current_token.type == TokenType.GTE):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            right = self.additive_expression()
-            expr = BinaryOperation(expr, operator, right)
+        binary_expression : unary_expression (binary_operator unary_expression)*
         
-        return expr
-    
-    def additive_expression(self):
+        Analisa por subida de precedência (precedence climbing) com a tabela
+        BINARY_PRECEDENCE: o laço consome operadores com precedência de pelo
+        menos min_precedence, e o operando direito é analisado com o nível
+        seguinte, o que torna todos os operadores associativos à esquerda.
         """
-        additive_expression : multiplicative_expression (('+' | '-') multiplicative_expression)*
-        """
-        expr = self.multiplicative_expression()
-        
-        while (self.current_token.type == TokenType.PLUS or
-               self.current_token.type == TokenType.MINUS):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            right = self.multiplicative_expression()
-            expr = BinaryOperation(expr, operator, right)
-        
-        return expr
+        if self.current_token.type in UNARY_OPERATORS:
+            left = self.unary_expression()
+        else:
+            left = self.postfix_expression()
+        precedence_of = BINARY_PRECEDENCE.get
+        
+        while True:
+            operator = self.current_token
+            precedence = precedence_of(operator.type, 0)
+            if precedence < min_precedence:
+                return left
+            
+            self.advance()
+            right = self.binary_expression(precedence + 1)
+            left = BinaryOperation(left, intern(operator.value), right)
     
-    def multiplicative_expression(self):
+    def unary_expression(self):
         """
-        multiplicative_expression : unary_expression (('*' | '/') unary_expression)*
+        unary_expression : ('!' | '-')* postfix_expression
         """
-        expr = self.unary_expression()
+        operators = []
+        while self.current_token.type in UNARY_OPERATORS:
+            operators.append(intern(self.current_token.value))
+            self.advance()
         
-        while (self.current_token.type == TokenType.TIMES or
-               self.current_token.type == TokenType.DIVIDE):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            right = self.unary_expression()
-            expr = BinaryOperation(expr, operator, right)
+        expr = self.postfix_expression()
+        for operator in reversed(operators):
+            expr = UnaryOperation(operator, expr)
         
         return expr
     
-    def unary_expression(self):
-        """
-        unary_expression : ('!' | '-') unary_expression
-                         | postfix_expression
-        """
-        if (self.current_token.type == TokenType.NOT or 
-            self.current_token.type == TokenType.MINUS):
-            operator = self.current_token.value
-            self.eat(self.current_token.type)
-            operand = self.unary_expression()
-            return UnaryOperation(operator, operand)
-        
-        return self.postfix_expression()
-    
     def postfix_expression(self):
         """
         postfix_expression : primary_expression ('.' identifier ('(' argument_list ')')?)*
@@ -1207,7 +2523,7 @@ class Parser:
             if self.current_token.type != TokenType.IDENTIFIER:
                 self.error("Esperado identificador após '.'")
             
-            property_name = self.current_token.value
+            property_name = intern(self.current_token.value)
             self.eat(TokenType.IDENTIFIER)
             
             # Se for uma chamada de método
@@ -1232,49 +2548,36 @@ class Parser:
                            | '(' expression ')'
                            | function_call
         """
-        if self.current_token.type == TokenType.NUMBER:
-            value = self.current_token.value
-            self.eat(TokenType.NUMBER)
-            return Literal(value, "number")
-        
-        elif self.current_token.type == TokenType.STRING:
-            value = self.current_token.value
-            self.eat(TokenType.STRING)
-            return Literal(value, "string")
-        
-        elif self.current_token.type == TokenType.DATE:
-            value = self.current_token.value
-            self.eat(TokenType.DATE)
-            return Literal(value, "date")
-        
-        elif self.current_token.type == TokenType.MEASUREMENT:
-            value = self.current_token.value
-            self.eat(TokenType.MEASUREMENT)
-            return Literal(value, "measurement")
+        token = self.current_token
+        token_type = token.type
         
-        elif self.current_token.type == TokenType.LBRACKET:
-            return self.array_literal()
+        literal_type = LITERAL_TYPES.get(token_type)
+        if literal_type is not None:
+            self.advance()
+            return Literal(intern(token.value), literal_type, token.measurement)
         
-        elif self.current_token.type == TokenType.LBRACE:
-            return self.object_literal()
+        elif token_type == TokenType.IDENTIFIER:
+            # Verifica se é uma chamada de função ou referência a variável
+            if self.peek().type == TokenType.LPAREN:
+                return self.function_call()
+            else:
+                self.advance()
+                return VariableReference(intern(token.value))
         
-        elif self.current_token.type == TokenType.LPAREN:
-            self.eat(TokenType.LPAREN)
+        elif token_type == TokenType.LPAREN:
+            self.advance()
             expr = self.expression()
             self.eat(TokenType.RPAREN)
             return expr
         
-        elif self.current_token.type == TokenType.IDENTIFIER:
-            # Verifica se é uma chamada de função ou referência a variável
-            if self.peek().type == TokenType.LPAREN:
-                return self.function_call()
-            else:
-                name = self.current_token.value
-                self.eat(TokenType.IDENTIFIER)
-                return VariableReference(name)
+        elif token_type == TokenType.LBRACKET:
+            return self.array_literal()
+        
+        elif token_type == TokenType.LBRACE:
+            return self.object_literal()
         
         else:
-            self.error(f"Expressão primária inesperada: {self.current_token.type}")
+            self.error(f"Expressão primária inesperada: {token_type}")
     
     def array_literal(self):
         """
@@ -1316,7 +2619,7 @@ class Parser:
         """
         function_call : identifier '(' argument_list ')'
         """
-        function_name = self.current_token.value
+        function_name = intern(self.current_token.value)
         self.eat(TokenType.IDENTIFIER)
         
         self.eat(TokenType.LPAREN)
@@ -1341,14 +2644,415 @@ class Parser:
         return arguments
 
 
+#################################################
+# ANÁLISE SINTÁTICA INCREMENTAL
+#################################################
+
+class DeclarationSpan:
+    """
+    Trecho do programa analisado como uma unidade: os tokens [first, stop)
+    da TokenTable, a declaração de nível superior construída a partir deles
+    (None para um trecho final só com erros) e os erros de sintaxe
+    encontrados nele. digest é o sha256 do texto desses tokens.
+    """
+    __slots__ = ('first', 'stop', 'digest', 'node', 'diagnostics')
+    
+    def __init__(self, first, stop, digest, node, diagnostics):
+        self.first = first
+        self.stop = stop
+        self.digest = digest
+        self.node = node
+        self.diagnostics = diagnostics
+
+class IncrementalParser:
+    """
+    Mantém a AST de um código-fonte que é editado aos poucos, como em um
+    editor, reanalisando apenas as declarações de nível superior afetadas.
+    
+    Os tokens ficam em uma TokenTable atualizada por relex(). Cada declaração
+    registra seu trecho de tokens em um DeclarationSpan; os trechos cobrem a
+    tabela de ponta a ponta, de modo que o fim de um é o início do seguinte.
+    Em edit(), a análise recomeça no início da primeira declaração cujo
+    trecho toca os tokens alterados e para assim que uma declaração nova
+    termina no início de uma declaração antiga posterior à edição: dali em
+    diante, os nós antigos são reaproveitados (os mesmos objetos). Uma
+    declaração reanalisada cujo texto tem o mesmo digest da antiga também
+    mantém o nó antigo.
+    """
+    def __init__(self, source, recover=False):
+        try:
+            self.table = Scanner(source).scan_table()
+        except SyntaxError:
+            # Com erros léxicos, a tabela é construída pelo relex, que os registra
+            self.table = TokenTable(source[:0])
+            self.table.relex(0, 0, source)
+        self.recover = recover
+        self.spans: List[DeclarationSpan] = []
+        self.program = None
+    
+    @property
+    def diagnostics(self) -> List[SyntaxDiagnostic]:
+        """Erros de sintaxe do código-fonte atual (modo de recuperação)."""
+        return [error for span in self.spans for error in span.diagnostics]
+    
+    def source_span(self, span) -> Tuple[int, int]:
+        """Deslocamentos (início, fim) do texto do trecho no código-fonte atual."""
+        table = self.table
+        if span.stop == span.first:
+            start = table.start_of(span.first)
+            return start, start
+        return table.start_of(span.first), table.end_of(span.stop - 1)
+    
+    def parse(self) -> 'Program':
+        """Analisa o código-fonte inteiro."""
+        self.spans = []
+        self._reparse(0, [], {}, 0)
+        return self.program
+    
+    def edit(self, offset, deleted, inserted) -> List[DeclarationSpan]:
+        """
+        Aplica uma edição de texto (como TokenTable.relex) e atualiza a AST
+        em self.program. Retorna os trechos reconstruídos; as demais
+        declarações não mudaram, e as fases seguintes podem ignorá-las.
+        """
+        first, old_stop, new_stop = self.table.relex(offset, deleted, inserted)
+        shift = new_stop - old_stop
+        spans = self.spans
+        
+        # Trechos que tocam os tokens alterados [first, old_stop)
+        low = 0
+        while low < len(spans) and spans[low].stop < first:
+            low += 1
+        high = low
+        while high < len(spans) and spans[high].first <= old_stop:
+            high += 1
+        
+        # Os trechos seguintes só mudam de posição
+        tail = spans[high:]
+        for span in tail:
+            span.first += shift
+            span.stop += shift
+        
+        start = spans[low - 1].stop if low else 0
+        previous = {span.digest: span for span in spans[low:high]}
+        self.spans = spans[:low]
+        return self._reparse(start, tail, previous, new_stop)
+    
+    def _reparse(self, start, tail, previous, changed_stop) -> List[DeclarationSpan]:
+        """
+        Analisa declarações a partir do token start até o fim do arquivo ou
+        até alcançar, depois de changed_stop, o início de um trecho de tail,
+        que é então reaproveitado. previous associa o digest de um trecho
+        substituído ao próprio trecho. Retorna os trechos novos.
+        """
+        table = self.table
+        index_at = table.index_at
+        # Mensagens de erro citam linhas, que a edição pode ter deslocado:
+        # trechos com erros são sempre reanalisados, e o reaproveitamento
+        # começa depois do último deles
+        clean = len(tail)
+        while clean and not tail[clean - 1].diagnostics:
+            clean -= 1
+        starts = {tail[position].first: position for position in range(clean, len(tail))}
+        rebuilt = []
+        
+        parser = Parser(table.iter_from(start), recover=self.recover)
+        reported = 0
+        before = start
+        
+        try:
+            for node in parser.iter_declarations():
+                token = parser.current_token
+                after = index_at(token.offset) if isinstance(token, OffsetToken) else len(table) - 1
+                span = self._make_span(before, after, node, parser.diagnostics[reported:], previous)
+                reported = len(parser.diagnostics)
+                self.spans.append(span)
+                before = after
+                
+                if span.node is node:
+                    rebuilt.append(span)
+                
+                if after >= changed_stop and after in starts:
+                    self.spans.extend(tail[starts[after]:])
+                    break
+            else:
+                # Erros depois da última declaração formam um trecho sem nó
+                end = len(table) - 1
+                if parser.diagnostics[reported:] or before < end:
+                    span = DeclarationSpan(before, end, self._digest(before, end), None,
+                                           parser.diagnostics[reported:])
+                    self.spans.append(span)
+                    rebuilt.append(span)
+        except SyntaxError:
+            # Sem recuperação, a próxima edição reanalisa tudo
+            self.spans = []
+            self.program = None
+            raise
+        
+        self.program = Program([span.node for span in self.spans if span.node is not None])
+        return rebuilt
+    
+    def _make_span(self, first, stop, node, diagnostics, previous) -> DeclarationSpan:
+        """Cria o trecho, mantendo o nó do trecho substituído de mesmo texto."""
+        digest = self._digest(first, stop)
+        old = previous.pop(digest, None)
+        if old is not None and not diagnostics and not old.diagnostics:
+            node = old.node
+        return DeclarationSpan(first, stop, digest, node, diagnostics)
+    
+    def _digest(self, first, stop) -> str:
+        """sha256 do texto dos tokens [first, stop)."""
+        table = self.table
+        if stop == first:
+            return ASTCache.source_hash('')
+        return ASTCache.source_hash(table.source[table.start_of(first):table.end_of(stop - 1)])
+
+#################################################
+# CACHE DA AST
+#################################################
+
+# Versão do compilador; junto com a impressão digital do próprio código,
+# invalida as ASTs guardadas em cache por versões anteriores
+COMPILER_VERSION = "0.1.0"
+
+# Formato serializado: a AST em pós-ordem, como uma sequência de operações
+# (array 'I', operação = argumento << 2 | tipo) e a lista das constantes
+# que elas consomem, em ordem. Tipos de operação:
+AST_OP_CONSTANT = 0     # empilha a próxima constante
+AST_OP_MEASUREMENT = 1  # empilha uma Measurement (constante: tupla dos campos)
+AST_OP_LIST = 2         # desempilha argumento valores em uma lista
+AST_OP_NODE = 3         # desempilha os campos de um nó de AST_NODE_CLASSES[argumento]
+
+AST_NODE_CLASSES = tuple(ASTNode.__subclasses__())
+AST_NODE_INDEX = {cls: index for index, cls in enumerate(AST_NODE_CLASSES)}
+
+class _PendingOperation:
+    """Operação emitida depois dos campos de um nó ou elementos de uma lista."""
+    __slots__ = ('code',)
+    
+    def __init__(self, code):
+        self.code = code
+
+def serialize_ast(node) -> bytes:
+    """
+    Serializa a AST em bytes compactos (marshal de uma sequência plana).
+    
+    A árvore é percorrida com uma pilha explícita e gravada em pós-ordem,
+    de modo que nem a serialização nem o marshal, que limita o aninhamento
+    de contêineres, dependem da profundidade da árvore.
+    """
+    operations = array('I')
+    constants = []
+    emit = operations.append
+    pending = [node]
+    
+    while pending:
+        item = pending.pop()
+        item_type = type(item)
+        
+        if item_type is _PendingOperation:
+            emit(item.code)
+        elif item_type in AST_NODE_INDEX:
+            pending.append(_PendingOperation(AST_NODE_INDEX[item_type] << 2 | AST_OP_NODE))
+            pending.extend(getattr(item, name) for name in reversed(item_type.__slots__))
+        elif item_type is list:
+            pending.append(_PendingOperation(len(item) << 2 | AST_OP_LIST))
+            pending.extend(reversed(item))
+        elif item_type is Measurement:
+            constants.append((item.magnitude, item.unit_id, item.canonical_value))
+            emit(AST_OP_MEASUREMENT)
+        else:
+            constants.append(item)
+            emit(AST_OP_CONSTANT)
+    
+    return marshal.dumps((operations.tobytes(), constants))
+
+def deserialize_ast(data):
+    """Reconstrói a AST gravada por serialize_ast."""
+    encoded, constants = marshal.loads(data)
+    operations = array('I')
+    operations.frombytes(encoded)
+    
+    # Os parâmetros de __init__ seguem a ordem de __slots__
+    arities = [len(cls.__slots__) for cls in AST_NODE_CLASSES]
+    next_constant = iter(constants).__next__
+    values = []
+    push = values.append
+    
+    for operation in operations:
+        kind = operation & 3
+        if kind == AST_OP_CONSTANT:
+            push(next_constant())
+        elif kind == AST_OP_NODE:
+            index = operation >> 2
+            start = len(values) - arities[index]
+            node = AST_NODE_CLASSES[index](*values[start:])
+            del values[start:]
+            push(node)
+        elif kind == AST_OP_LIST:
+            start = len(values) - (operation >> 2)
+            items = values[start:]
+            del values[start:]
+            push(items)
+        else:
+            push(Measurement(*next_constant()))
+    
+    return values.pop()
+
+class ASTCache:
+    """
+    Cache em disco das ASTs, em directory/<sha256 do código-fonte>.ast.
+    
+    Cada arquivo guarda a versão do compilador e a impressão digital do seu
+    código junto com a AST serializada e é lido de uma vez; com outra versão
+    do compilador, a entrada é ignorada e regravada. hits e misses contam
+    os acertos e as faltas.
+    """
+    def __init__(self, directory='.charcot_cache'):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def source_hash(source) -> str:
+        """sha256 do código-fonte (texto em UTF-8 ou buffer de bytes)."""
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        return hashlib.sha256(source).hexdigest()
+    
+    def path_for(self, key) -> str:
+        return os.path.join(self.directory, f"{key}.ast")
+    
+    def load(self, key):
+        """Retorna a AST guardada para a chave, ou None (falta)."""
+        try:
+            with open(self.path_for(key), 'rb') as f:
+                data = f.read()
+            version, fingerprint, payload = marshal.loads(data)
+            if version == COMPILER_VERSION and fingerprint == compiler_fingerprint():
+                ast = deserialize_ast(payload)
+                self.hits += 1
+                return ast
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        
+        self.misses += 1
+        return None
+    
+    def store(self, key, ast):
+        """Grava a AST; o arquivo é substituído atomicamente."""
+        data = marshal.dumps((COMPILER_VERSION, compiler_fingerprint(), serialize_ast(ast)))
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+_compiler_fingerprint = None
+
+def compiler_fingerprint() -> str:
+    """sha256 do código do compilador, calculado uma vez por execução."""
+    global _compiler_fingerprint
+    if _compiler_fingerprint is None:
+        try:
+            with open(__file__, 'rb') as f:
+                _compiler_fingerprint = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            _compiler_fingerprint = ''
+    return _compiler_fingerprint
+
+
 #################################################
 # PARTE 3: ANÁLISE SEMÂNTICA
 #################################################
 
+class MeasureType:
+    """
+    Tipo de uma expressão com unidade de medida: a grandeza (Unit.dimension)
+    e se o valor é um par sistólica/diastólica, como 140/90mmHg. Valores
+    sem unidade (números, resultados de funções) não têm MeasureType e
+    combinam com qualquer grandeza.
+    """
+    __slots__ = ('dimension', 'compound')
+    
+    def __init__(self, dimension, compound=False):
+        self.dimension = dimension
+        self.compound = compound
+    
+    @classmethod
+    def of(cls, measurement: Measurement) -> Optional['MeasureType']:
+        """Tipo de uma medida com unidade, ou None."""
+        if measurement is None or measurement.unit_id is None:
+            return None
+        return cls(measurement.unit.dimension, isinstance(measurement.magnitude, tuple))
+    
+    def __eq__(self, other):
+        return (isinstance(other, MeasureType) and self.dimension == other.dimension
+                and self.compound == other.compound)
+    
+    def __hash__(self):
+        return hash((self.dimension, self.compound))
+    
+    def __str__(self):
+        return f"{self.dimension} (composta)" if self.compound else self.dimension
+
+# Grandezas das propriedades clínicas conhecidas (p.weight, p.blood_pressure...)
+PROPERTY_MEASURES = {
+    'weight': MeasureType('mass'),
+    'height': MeasureType('length'),
+    'age': MeasureType('time'),
+    'heart_rate': MeasureType('frequency'),
+    'blood_pressure': MeasureType('pressure', compound=True),
+    'temperature': MeasureType('temperature'),
+}
+
+# Massa molar (g/mol) dos analitos cujas concentrações podem ser convertidas
+# entre massa (mg/dL) e quantidade de matéria (mmol/L)
+ANALYTE_MOLAR_MASSES = {
+    'glucose': 180.156,
+    'cholesterol': 386.654,
+    'triglycerides': 885.7,
+    'creatinine': 113.118,
+    'urea': 60.056,
+    'uric_acid': 168.11,
+    'bilirubin': 584.66,
+    'calcium': 40.078,
+}
+
+# Unidade em que uma concentração convertida passa a ser expressa
+CONCENTRATION_UNITS = {
+    'mass_concentration': UNIT_BY_SYMBOL['mg/dL'],
+    'amount_concentration': UNIT_BY_SYMBOL['mmol/L'],
+}
+
+# Grandeza da dose de verify_dosage e unidade da tabela de doses
+DOSE_MEASURE = MeasureType('mass')
+DOSE_UNIT = UNIT_BY_SYMBOL['mg']
+
+# Tipos numéricos Charcot pelo tipo com que são gerados: i32 ou float
+INTEGER_VALUE_TYPES = frozenset(('int', 'date'))
+FLOAT_VALUE_TYPES = frozenset(('float', 'measurement')) | frozenset(UNIT_BY_SYMBOL)
+NUMERIC_VALUE_TYPES = INTEGER_VALUE_TYPES | FLOAT_VALUE_TYPES
+
+# Tipos dos literais; números e medidas são constantes, que o gerador dobra
+LITERAL_VALUE_TYPES = {'number': 'float', 'measurement': 'measurement', 'string': 'string', 'date': 'date'}
+
+# (tipo, constante) de uma expressão cujo tipo a análise não conhece
+UNTYPED = (None, False)
+
+# Operadores de comparação
+COMPARISON_OPERATORS = frozenset(('==', '!=', '<', '>', '<=', '>='))
+
 class Symbol:
     def __init__(self, name, type=None):
         self.name = name
         self.type = type
+        self.level = None  # Profundidade do escopo que define o símbolo
+        self.slot = None   # Posição do símbolo nesse escopo
+        self.measure = None  # MeasureType de variáveis com unidade
+        self.compound = False  # Valor sistólica/diastólica, com ou sem unidade
+        self.module = None   # Módulo de onde o símbolo foi importado
 
 class VariableSymbol(Symbol):
     def __init__(self, name, type=None):
@@ -1361,38 +3065,180 @@ class FunctionSymbol(Symbol):
         self.return_type = return_type
 
 class SymbolTable:
+    """
+    Escopo da análise semântica.
+    
+    Os escopos são abertos e fechados em ordem de pilha e compartilham um
+    único dicionário, bindings, que associa cada nome à pilha dos símbolos
+    visíveis com esse nome; o do topo é o do escopo mais interno. Assim,
+    lookup é uma única consulta, sem percorrer a cadeia de escopos. close()
+    retira os símbolos do escopo dessas pilhas e deve ser chamado ao sair
+    dele.
+    
+    Cada símbolo recebe o nível do escopo (level) e sua posição nele
+    (slot), na ordem das definições, que a análise grava nas referências
+    como (profundidade, slot).
+    """
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
+        if parent is None:
+            self.level = 0
+            self.bindings = {}
+        else:
+            self.level = parent.level + 1
+            self.bindings = parent.bindings
     
     def define(self, symbol):
+        symbol.level = self.level
+        symbol.slot = len(self.symbols)
         self.symbols[symbol.name] = symbol
+        self.bindings.setdefault(symbol.name, []).append(symbol)
     
     def lookup(self, name):
-        symbol = self.symbols.get(name)
-        if symbol is not None:
-            return symbol
-        
-        if self.parent is not None:
-            return self.parent.lookup(name)
-        
-        return None
+        visible = self.bindings.get(name)
+        return visible[-1] if visible else None
     
     def lookup_local(self, name):
         return self.symbols.get(name)
+    
+    def close(self):
+        """Sai do escopo: seus símbolos deixam de ser visíveis."""
+        bindings = self.bindings
+        for name in self.symbols:
+            visible = bindings[name]
+            visible.pop()
+            if not visible:
+                del bindings[name]
 
-class SemanticAnalyzer:
-    def __init__(self):
+class SemanticAnalyzer(NodeVisitor):
+    """
+    Verifica escopos e grandezas da AST. Os visitantes de expressões
+    retornam o MeasureType do valor (ou None, para valores sem unidade);
+    operandos de grandezas diferentes são erro, e as conversões possíveis
+    em tempo de compilação são dobradas nos literais: o valor inicial de
+    'dose : mg = 0.5g' passa a ser o literal 500mg, e em 'glucose > 7mmol/L'
+    o limiar é convertido para mg/dL pela massa molar da glicose.
+    
+    Com um ModuleLoader em modules, as importações são resolvidas e os
+    procedimentos e variáveis exportados pelo módulo entram no escopo global.
+    Com uma InteractionDatabase em interactions, um AllergenRegistry em
+    allergens e uma DoseLimitTable em doses, as chamadas a
+    verify_interaction, verify_allergies e verify_dosage com o nome do
+    medicamento literal são resolvidas (FunctionCall.resolved).
+    """
+    def __init__(self, modules=None, interactions=None, allergens=None, doses=None):
+        self.modules = modules
+        self.interactions = interactions
+        self.allergens = allergens
+        self.doses = doses
         self.current_scope = None
+        self.global_scope = None
         self.errors = []
+        self.types = {}  # Expressão visitada -> (tipo Charcot, constante)
+        self.compound = set()  # Expressões com valor composto (150/95), com ou sem unidade
     
     def error(self, message, node=None):
         self.errors.append(message)
     
-    def visit(self, node):
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+    def unify(self, operator, left_node, left, right_node, right):
+        """
+        Retorna a grandeza comum aos dois operandos de operator. Um operando
+        sem unidade assume a grandeza do outro; concentrações em massa e em
+        quantidade de matéria são compatibilizadas convertendo o literal de
+        um dos lados.
+        """
+        if left is None:
+            return right
+        if right is None or left == right:
+            return left
+        
+        if self.convert_concentration(right_node, right, left, left_node):
+            return left
+        if self.convert_concentration(left_node, left, right, right_node):
+            return right
+        
+        self.error(f"Grandezas incompatíveis em '{operator}': {left} e {right}")
+        return None
+    
+    def convert_concentration(self, node, measure, target, other):
+        """
+        Reescreve o literal de concentração node na grandeza target, usando a
+        massa molar do analito nomeado pelo outro operando (a variável ou
+        propriedade glucose, creatinine...). Retorna False se não for possível.
+        """
+        if not (isinstance(node, Literal) and node.measurement is not None and
+                not measure.compound and not target.compound and
+                {measure.dimension, target.dimension} == CONCENTRATION_UNITS.keys()):
+            return False
+        
+        analyte = self.analyte_of(other)
+        if analyte is None:
+            return False
+        
+        # Unidades canônicas: kg/m³ e mol/m³; a massa molar está em g/mol
+        molar_mass = ANALYTE_MOLAR_MASSES[analyte]
+        if target.dimension == 'mass_concentration':
+            factor = molar_mass / 1000
+        else:
+            factor = 1000 / molar_mass
+        
+        unit = CONCENTRATION_UNITS[target.dimension]
+        canonical_value = node.measurement.canonical_value * factor
+        magnitude = unit.from_canonical(canonical_value)
+        node.value = f"{magnitude:g}{unit.symbol}"
+        node.measurement = Measurement(magnitude, unit.unit_id, canonical_value)
+        return True
+    
+    def analyte_of(self, node):
+        """Analito nomeado por uma variável ou propriedade (glucose, p.creatinine, glucose_fasting), ou None."""
+        if isinstance(node, VariableReference):
+            name = node.name.lower()
+        elif isinstance(node, PropertyAccess):
+            name = node.property_name.lower()
+        else:
+            return None
+        
+        for analyte in ANALYTE_MOLAR_MASSES:
+            if name == analyte or name.startswith(analyte + '_') or name.endswith('_' + analyte):
+                return analyte
+        return None
+    
+    def convert_to_unit(self, node, unit, measure):
+        """
+        Expressa o valor inicial da declaração node na unidade declarada:
+        números sem unidade recebem a unidade, e medidas da mesma grandeza
+        são reescritas nela. Retorna a grandeza da variável.
+        """
+        value = node.value
+        declared = MeasureType(unit.dimension, self.is_compound(value, measure))
+        
+        if isinstance(value, Literal) and value.literal_type in ("number", "measurement"):
+            measurement = value.measurement
+            if measure is None and (measurement is None or measurement.unit_id is None):
+                # 95 ou 150/95 em 'glucose : mg/dL = 95'
+                value.value = f"{value.value}{unit.symbol}"
+                value.literal_type = "measurement"
+                value.measurement = parse_measurement(value.value)
+                return MeasureType.of(value.measurement)
+            
+            if measure is not None and measure.dimension == unit.dimension:
+                canonical_value = measurement.canonical_value
+                if declared.compound:
+                    magnitude = tuple(unit.from_canonical(v) for v in canonical_value)
+                    text = f"{magnitude[0]:g}/{magnitude[1]:g}{unit.symbol}"
+                else:
+                    magnitude = unit.from_canonical(canonical_value)
+                    text = f"{magnitude:g}{unit.symbol}"
+                value.value = text
+                value.measurement = Measurement(magnitude, unit.unit_id, canonical_value)
+                return declared
+        
+        if measure is not None and measure.dimension != unit.dimension:
+            target = MeasureType(unit.dimension, measure.compound)
+            if not self.convert_concentration(value, measure, target, VariableReference(node.name)):
+                self.error(f"Variável '{node.name}' declarada em {unit.symbol} recebe {measure}")
+        return declared
     
     def generic_visit(self, node):
         pass
@@ -1401,14 +3247,16 @@ class SemanticAnalyzer:
         # Cria o escopo global
         global_scope = SymbolTable()
         self.current_scope = global_scope
+        self.global_scope = global_scope
         
         # Adiciona as funções da biblioteca padrão
         self.define_builtin_functions(global_scope)
         
         # Visita todas as declarações do programa
         for declaration in node.declarations:
-            self.visit(declaration)
+            yield declaration
         
+        global_scope.close()
         return self.errors
     
     def define_builtin_functions(self, scope):
@@ -1456,9 +3304,24 @@ class SemanticAnalyzer:
         scope.define(prescribe)
     
     def visit_ImportDeclaration(self, node):
-        # Aqui seria implementada a lógica para importar símbolos de outros módulos
-        # Simplificando, apenas registramos a tentativa de importação
-        pass
+        # Sem um ModuleLoader, a importação é apenas registrada
+        if self.modules is None:
+            return
+        
+        try:
+            interface = self.modules.load(node.module_name)
+        except ModuleError as e:
+            self.error(str(e))
+            return
+        
+        # Os símbolos exportados ocupam posições consecutivas do escopo global
+        node.interface = interface
+        node.slot = len(self.current_scope.symbols)
+        for symbol in interface.symbols():
+            if self.current_scope.lookup_local(symbol.name) is not None:
+                self.error(f"'{symbol.name}', importado de '{node.module_name}', já definido neste escopo")
+                return
+            self.current_scope.define(symbol)
     
     def visit_VariableDeclaration(self, node):
         name = node.name
@@ -1471,10 +3334,82 @@ class SemanticAnalyzer:
         # Cria e registra o símbolo da variável
         variable_symbol = VariableSymbol(name, node.type_name)
         self.current_scope.define(variable_symbol)
+        node.slot = variable_symbol.slot
         
         # Visita a expressão de inicialização, se houver
+        measure = None
         if node.value is not None:
-            self.visit(node.value)
+            measure = yield node.value
+        
+        # Com uma unidade declarada, o valor inicial é convertido para ela
+        unit = UNIT_BY_SYMBOL.get(node.type_name)
+        if unit is not None:
+            if node.value is None:
+                measure = MeasureType(unit.dimension)
+            else:
+                measure = self.convert_to_unit(node, unit, measure)
+        variable_symbol.measure = measure
+        
+        # Só variáveis sem tipo ou com unidade guardam medidas compostas
+        if node.value is not None and self.is_compound(node.value, measure):
+            variable_symbol.compound = True
+            if node.type_name is not None and unit is None:
+                self.error(f"Variável '{name}' declarada como {node.type_name} recebe uma medida composta")
+        
+        # Sem tipo declarado, a variável tem o tipo do valor inicial, que a
+        # interface do módulo exporta e a geração de código usa
+        if node.type_name is None and node.value is not None:
+            node.value_type = variable_symbol.type = self.value_type(node.value)
+    
+    def value_type(self, expression):
+        """
+        Tipo Charcot do valor que a geração de código calcula para a
+        expressão já visitada, ou None se ele não for conhecido na análise
+        (chamadas, propriedades, arrays).
+        """
+        return self.types.get(expression, UNTYPED)[0]
+    
+    @staticmethod
+    def binary_type(operator, left, right):
+        """
+        (tipo, constante) de uma operação binária a partir dos operandos.
+        Como no gerador, uma constante numérica assume o tipo do outro
+        operando e um inteiro operado com um float resulta em float.
+        """
+        (left_type, left_constant), (right_type, right_constant) = left, right
+        if operator == '=':
+            return right
+        if operator not in ('+', '-', '*', '/'):
+            return 'bool', left_constant and right_constant and operator not in ('&&', '||')
+        if left_constant != right_constant:
+            return (right_type if left_constant else left_type), False
+        if left_type == right_type:
+            return left_type, left_constant
+        if left_type in NUMERIC_VALUE_TYPES and right_type in NUMERIC_VALUE_TYPES:
+            integer = left_type in INTEGER_VALUE_TYPES and right_type in INTEGER_VALUE_TYPES
+            return ('int' if integer else 'float'), left_constant
+        return None, False
+    
+    def is_compound(self, node, measure):
+        """Se a expressão visitada node, de grandeza measure, tem valor composto."""
+        return node in self.compound or (measure is not None and measure.compound)
+    
+    def check_comparable(self, operator, left_type, right_type):
+        """
+        Verifica os tipos conhecidos dos operandos de uma comparação: ordens
+        (<, >=...) exigem números, datas ou medidas; igualdades, dois valores
+        numéricos ou do mesmo tipo. Tipos desconhecidos não são verificados.
+        """
+        if operator in ('==', '!='):
+            if (left_type is None or right_type is None or left_type == right_type or
+                    {left_type, right_type} <= NUMERIC_VALUE_TYPES):
+                return
+            self.error(f"Tipos incompatíveis em '{operator}': {left_type} e {right_type}")
+            return
+        for operand_type in (left_type, right_type):
+            if operand_type is not None and operand_type not in NUMERIC_VALUE_TYPES:
+                self.error(f"Operador '{operator}' exige operandos numéricos, mas recebeu {operand_type}")
+                return
     
     def visit_PatientDeclaration(self, node):
         name = node.name
@@ -1487,10 +3422,11 @@ class SemanticAnalyzer:
         # Cria e registra o símbolo do paciente (como uma variável do tipo Patient)
         patient_symbol = VariableSymbol(name, "Patient")
         self.current_scope.define(patient_symbol)
+        node.slot = patient_symbol.slot
         
         # Visita as propriedades do paciente
         for prop in node.properties:
-            self.visit(prop)
+            yield prop
     
     def visit_ProcedureDeclaration(self, node):
         name = node.name
@@ -1518,14 +3454,15 @@ class SemanticAnalyzer:
             self.visit_Parameter(param)
         
         # Visita o corpo do procedimento
-        self.visit(node.body)
+        yield node.body
         
         # Restaura o escopo anterior
+        procedure_scope.close()
         self.current_scope = old_scope
     
     def visit_TreatmentDeclaration(self, node):
         # Tratamentos são similares a procedimentos
-        self.visit_ProcedureDeclaration(node)
+        yield from self.visit_ProcedureDeclaration(node)
     
     def visit_Parameter(self, node):
         name = node.name
@@ -1538,6 +3475,11 @@ class SemanticAnalyzer:
         # Cria e registra o símbolo do parâmetro
         param_symbol = VariableSymbol(name, node.type_name)
         self.current_scope.define(param_symbol)
+        node.slot = param_symbol.slot
+        
+        unit = UNIT_BY_SYMBOL.get(node.type_name)
+        if unit is not None:
+            param_symbol.measure = MeasureType(unit.dimension)
     
     def visit_BlockStatement(self, node):
         # Cria um novo escopo para o bloco
@@ -1547,28 +3489,29 @@ class SemanticAnalyzer:
         
         # Visita todas as declarações no bloco
         for statement in node.statements:
-            self.visit(statement)
+            yield statement
         
         # Restaura o escopo anterior
+        block_scope.close()
         self.current_scope = old_scope
     
     def visit_IfStatement(self, node):
         # Visita a condição
-        self.visit(node.condition)
+        yield node.condition
         
         # Visita o corpo do if
-        self.visit(node.if_body)
+        yield node.if_body
         
         # Visita o corpo do else, se houver
         if node.else_body is not None:
-            self.visit(node.else_body)
+            yield node.else_body
     
     def visit_WhileStatement(self, node):
         # Visita a condição
-        self.visit(node.condition)
+        yield node.condition
         
         # Visita o corpo do loop
-        self.visit(node.body)
+        yield node.body
     
     def visit_ForEachStatement(self, node):
         # Cria um novo escopo para o loop
@@ -1577,76 +3520,136 @@ class SemanticAnalyzer:
         self.current_scope = loop_scope
         
         # Visita a variável de iteração
-        self.visit(node.variable)
+        yield node.variable
         
         # Visita a coleção
-        self.visit(node.collection)
+        yield node.collection
         
         # Visita o corpo do loop
-        self.visit(node.body)
+        yield node.body
         
         # Restaura o escopo anterior
+        loop_scope.close()
         self.current_scope = old_scope
     
     def visit_ClinicalPathStatement(self, node):
         # Visita a expressão do switch
-        self.visit(node.expression)
+        yield node.expression
         
-        # Visita todos os casos
+        # Visita todos os casos; cada valor é comparado com a expressão
+        expression_type = self.value_type(node.expression)
         for case in node.cases:
-            self.visit(case)
+            yield case
+            self.check_comparable('==', expression_type, self.value_type(case.value))
     
     def visit_CaseStatement(self, node):
         # Visita o valor do caso
-        self.visit(node.value)
+        yield node.value
         
         # Visita o corpo do caso
-        self.visit(node.body)
+        yield node.body
     
     def visit_ReturnStatement(self, node):
         # Visita a expressão de retorno, se houver
         if node.value is not None:
-            self.visit(node.value)
+            yield node.value
     
     def visit_ExpressionStatement(self, node):
         # Visita a expressão
-        self.visit(node.expression)
+        yield node.expression
     
     def visit_PrescribeStatement(self, node):
         # Visita todos os argumentos da prescrição
-        self.visit(node.patient)
-        self.visit(node.medication)
-        self.visit(node.dose)
+        yield node.patient
+        yield node.medication
+        yield node.dose
         
         if node.instructions is not None:
-            self.visit(node.instructions)
+            yield node.instructions
         
         if node.duration is not None:
-            self.visit(node.duration)
+            yield node.duration
     
     def visit_BinaryOperation(self, node):
         # Visita as expressões à esquerda e à direita
-        self.visit(node.left)
-        self.visit(node.right)
+        left = yield node.left
+        right = yield node.right
+        operator = node.operator
+        if operator == '=' and isinstance(node.left, VariableReference):
+            # As variáveis de outro módulo são só leitura: o otimizador trata
+            # as que o próprio módulo não altera como constantes
+            symbol = self.current_scope.lookup(node.left.name)
+            if symbol is not None and symbol.module is not None:
+                self.error(f"Variável '{node.left.name}', importada de '{symbol.module}', não pode ser alterada")
+        
+        types = self.types
+        left_type, right_type = types.get(node.left, UNTYPED), types.get(node.right, UNTYPED)
+        if operator in COMPARISON_OPERATORS:
+            self.check_comparable(operator, left_type[0], right_type[0])
+        types[node] = self.binary_type(operator, left_type, right_type)
+        
+        # Um composto só se combina com outro composto ou com uma constante,
+        # replicada nos dois valores, e nunca chega a uma variável escalar
+        left_compound = self.is_compound(node.left, left)
+        right_compound = self.is_compound(node.right, right)
+        if operator in ('+', '-', '*', '/'):
+            if left_compound != right_compound and not (left_type if right_compound else right_type)[1]:
+                self.error(f"Medida composta operada com um valor escalar em '{operator}'")
+            if left_compound or right_compound:
+                self.compound.add(node)
+        elif operator == '=' and right_compound:
+            if not left_compound and left_type[0] in NUMERIC_VALUE_TYPES:
+                self.error("Medida composta atribuída a um valor escalar")
+            self.compound.add(node)
+        
+        if left is None and right is None:
+            return None
+        
+        if operator == '*':
+            # Escalar por um número mantém a grandeza; produtos de grandezas
+            # (mg * dias) não são acompanhados
+            return left if right is None else right if left is None else None
+        if operator == '/':
+            return left if right is None else None
+        if operator in ('&&', '||'):
+            return None
+        
+        # +, -, = e comparações exigem a mesma grandeza nos dois lados
+        measure = self.unify(operator, node.left, left, node.right, right)
+        return measure if operator in ('+', '-', '=') else None
     
     def visit_UnaryOperation(self, node):
         # Visita o operando
-        self.visit(node.operand)
+        measure = yield node.operand
+        operand_type, constant = self.types.get(node.operand, UNTYPED)
+        self.types[node] = ('bool' if node.operator == '!' else operand_type), constant
+        if node.operator == '-' and node.operand in self.compound:
+            self.compound.add(node)
+        return measure if node.operator == '-' else None
     
     def visit_VariableReference(self, node):
         name = node.name
         
-        # Verifica se a variável está definida
+        # Verifica se a variável está definida e registra onde ela foi declarada
         symbol = self.current_scope.lookup(name)
         if symbol is None:
             self.error(f"Variável '{name}' não definida")
+            return
+        
+        node.depth = self.current_scope.level - symbol.level
+        node.slot = symbol.slot
+        self.types[node] = (symbol.type, False)
+        if symbol.compound:
+            self.compound.add(node)
+        return symbol.measure
     
     def visit_PropertyAccess(self, node):
         # Visita a expressão do objeto
-        self.visit(node.object_expr)
+        yield node.object_expr
         
         # Aqui seria verificado se a propriedade existe no tipo do objeto
         # Mas isso requereria um sistema de tipos mais complexo
+        return PROPERTY_MEASURES.get(node.property_name)
     
     def visit_FunctionCall(self, node):
         name = node.name
@@ -1658,8 +3661,10 @@ class SemanticAnalyzer:
             return
         
         # Visita todos os argumentos
+        measures = []
         for arg in node.arguments:
-            self.visit(arg)
+            measure = yield arg
+            measures.append(measure)
         
         # Verifica se o número de argumentos está correto
         if len(node.arguments) != len(symbol.parameters):
@@ -1667,74 +3672,1101 @@ class SemanticAnalyzer:
                 f"Número incorreto de argumentos para '{name}'. " +
                 f"Esperado {len(symbol.parameters)}, mas recebeu {len(node.arguments)}"
             )
-    
-    def visit_MethodCall(self, node):
-        # Visita a expressão do objeto
-        self.visit(node.object_expr)
+        elif name == "verify_interaction" and self.interactions is not None:
+            self.resolve_interaction(node)
+        elif name == "verify_allergies" and self.allergens is not None:
+            self.resolve_allergies(node)
+        elif name == "verify_dosage":
+            # A dose é uma massa, passada em kg (unidade canônica)
+            if measures[2] is not None and measures[2] != DOSE_MEASURE:
+                self.error(f"'verify_dosage' espera uma dose em {DOSE_MEASURE}, mas recebeu {measures[2]}")
+            elif self.doses is not None:
+                self.resolve_dosage(node)
+    
+    def resolve_interaction(self, node):
+        """
+        Resolve verify_interaction(medicamentos, "nome"): o nome é trocado pelo
+        id do medicamento na base e, se a lista de medicamentos também for
+        literal, a verificação é feita aqui e a chamada vira uma constante.
+        Um medicamento fora da base não tem interações conhecidas.
+        """
+        medications, drug = node.arguments
+        if not (isinstance(drug, Literal) and drug.literal_type == "string"):
+            return
         
-        # Visita todos os argumentos
-        for arg in node.arguments:
-            self.visit(arg)
+        drug_id = self.interactions.drug_id(drug.value)
+        if drug_id is None:
+            node.resolved = True
+            return
+        node.resolved = drug_id
         
-        # Aqui seria verificado se o método existe no tipo do objeto
-        # Mas isso requereria um sistema de tipos mais complexo
+        if isinstance(medications, ArrayLiteral) and all(
+                isinstance(element, Literal) and element.literal_type == "string"
+                for element in medications.elements):
+            names = [element.value for element in medications.elements]
+            node.resolved = self.interactions.verify_interaction(names, drug_id)
     
-    def visit_Literal(self, node):
-        # Nada a verificar em literais
-        pass
+    def resolve_allergies(self, node):
+        """
+        Resolve verify_allergies(alergias, "nome"): o nome é trocado pela
+        máscara de alergênios do medicamento e, se a lista de alergias também
+        for literal, a verificação é feita aqui e a chamada vira uma
+        constante. Medicamentos fora do registro ficam para a execução, que
+        compara os nomes.
+        """
+        allergies, drug = node.arguments
+        names = self.literal_allergies(allergies)
+        if not (isinstance(drug, Literal) and drug.literal_type == "string"):
+            return
+        
+        mask = self.allergens.drug_mask(drug.value)
+        if mask == 0:
+            return
+        if names is not None:
+            node.resolved = self.allergens.verify_allergies(names, drug.value)
+        else:
+            node.resolved = self.allergens.to_words(mask)
+    
+    def resolve_dosage(self, node):
+        """
+        Resolve verify_dosage(paciente, "nome", dose): o nome é trocado pelo
+        id do medicamento na tabela de doses. Medicamentos fora da tabela e
+        doses literais fora dos limites de todas as faixas são erro.
+        """
+        _, drug, amount = node.arguments
+        if not (isinstance(drug, Literal) and drug.literal_type == "string"):
+            return
+        
+        drug_id = self.doses.drug_id(drug.value)
+        if drug_id is None:
+            self.error(f"Medicamento '{drug.value}' não consta da tabela de doses")
+            return
+        node.resolved = drug_id
+        
+        if isinstance(amount, Literal) and amount.measurement is not None:
+            dose = DOSE_UNIT.from_canonical(amount.measurement.canonical_value)
+            lowest, highest = self.doses.dose_range(drug_id)
+            if dose > highest:
+                self.error(f"Dose de {amount.value} de '{drug.value}' acima do máximo da "
+                           f"tabela de doses ({highest:g} mg)")
+            elif dose < lowest:
+                self.error(f"Dose de {amount.value} de '{drug.value}' abaixo do mínimo da "
+                           f"tabela de doses ({lowest:g} mg)")
+    
+    def literal_allergies(self, node):
+        """
+        Nomes de uma lista literal de alergias, ou None se ela não for
+        literal. Nomes fora do registro de alergênios são erro.
+        """
+        if not (isinstance(node, ArrayLiteral) and all(
+                isinstance(element, Literal) and element.literal_type == "string"
+                for element in node.elements)):
+            return None
+        
+        names = [element.value for element in node.elements]
+        for name in names:
+            if self.allergens.canonical(name) is None:
+                self.error(f"Alergênio '{name}' não consta do registro de alergênios")
+        return names
+    
+    def visit_MethodCall(self, node):
+        # Visita a expressão do objeto
+        yield node.object_expr
+        
+        # Visita todos os argumentos
+        for arg in node.arguments:
+            yield arg
+        
+        # Aqui seria verificado se o método existe no tipo do objeto
+        # Mas isso requereria um sistema de tipos mais complexo
+    
+    def visit_Literal(self, node):
+        self.types[node] = (LITERAL_VALUE_TYPES.get(node.literal_type), node.literal_type in ('number', 'measurement'))
+        if node.measurement is not None and isinstance(node.measurement.magnitude, tuple):
+            self.compound.add(node)
+        
+        # Medidas têm a grandeza da sua unidade
+        return MeasureType.of(node.measurement)
     
     def visit_ArrayLiteral(self, node):
         # Visita todos os elementos do array
         for element in node.elements:
-            self.visit(element)
+            yield element
     
     def visit_ObjectLiteral(self, node):
-        # Visita todas as propriedades do objeto
+        # Visita todas as propriedades do objeto; o objeto é um paciente
         for prop in node.properties:
-            self.visit(prop)
+            yield prop
+        self.types[node] = ('Patient', False)
     
     def visit_PropertyAssignment(self, node):
         # Visita o valor da propriedade
-        self.visit(node.value)
+        measure = yield node.value
+        
+        # Propriedades clínicas conhecidas (weight, blood_pressure...) têm grandeza fixa
+        expected = PROPERTY_MEASURES.get(node.name)
+        if expected is not None and measure is not None and measure != expected:
+            self.error(f"Propriedade '{node.name}' espera {expected}, mas recebeu {measure}")
+        
+        if node.name == "allergies" and self.allergens is not None:
+            self.literal_allergies(node.value)
+
+
+#################################################
+# MÓDULOS
+#################################################
+
+# Extensão dos arquivos de interface de módulos
+INTERFACE_EXTENSION = '.charcoti'
+
+class ModuleError(Exception):
+    """Módulo não encontrado, com erros ou importado circularmente."""
+    pass
+
+class ModuleInterface:
+    """
+    Interface de um módulo: o que um importador precisa saber dele, sem a
+    AST. Guarda os procedimentos exportados com seus parâmetros (nome,
+    tipo), as variáveis e pacientes globais com tipo e grandeza, e o sha256
+    do código-fonte do módulo e de cada módulo que ele importa, usados para
+    saber se a interface gravada em disco ainda vale.
+    """
+    __slots__ = ('name', 'source_hash', 'stamp', 'procedures', 'variables', 'dependencies')
+    
+    def __init__(self, name, source_hash, stamp, procedures, variables, dependencies):
+        self.name = name
+        self.source_hash = source_hash
+        self.stamp = stamp                # (st_mtime_ns, st_size) do código-fonte
+        self.procedures = procedures      # ((nome, ((parâmetro, tipo), ...)), ...)
+        self.variables = variables        # ((nome, tipo, grandeza, composta), ...)
+        self.dependencies = dependencies  # ((módulo, sha256), ...)
+    
+    @classmethod
+    def from_program(cls, name, source_hash, stamp, program, scope, dependencies):
+        """
+        Extrai a interface das declarações de nível superior de um programa
+        analisado; scope é o escopo global da análise, de onde vêm os tipos
+        e grandezas. Símbolos importados pelo módulo não são reexportados.
+        """
+        procedures = []
+        variables = []
+        for declaration in program.declarations:
+            symbol = scope.lookup_local(getattr(declaration, 'name', None))
+            if isinstance(declaration, (ProcedureDeclaration, TreatmentDeclaration)):
+                parameters = tuple((param.name, param.type) for param in symbol.parameters)
+                procedures.append((declaration.name, parameters))
+            elif isinstance(declaration, (VariableDeclaration, PatientDeclaration)):
+                measure = symbol.measure
+                variables.append((declaration.name, symbol.type,
+                                  measure.dimension if measure else None, symbol.compound))
+        return cls(name, source_hash, stamp, tuple(procedures), tuple(variables), dependencies)
+    
+    def symbols(self):
+        """Símbolos novos dos procedimentos e das variáveis exportados, nessa ordem."""
+        symbols = []
+        for name, parameters in self.procedures:
+            symbols.append(FunctionSymbol(name, [VariableSymbol(*param) for param in parameters]))
+        for name, type_name, dimension, compound in self.variables:
+            symbol = VariableSymbol(name, type_name)
+            if dimension is not None:
+                symbol.measure = MeasureType(dimension, compound)
+            symbol.compound = compound
+            symbols.append(symbol)
+        for symbol in symbols:
+            symbol.module = self.name
+        return symbols
+    
+    def to_bytes(self) -> bytes:
+        return marshal.dumps((COMPILER_VERSION, compiler_fingerprint(), self.name, self.source_hash,
+                              self.stamp, self.procedures, self.variables, self.dependencies))
+    
+    @classmethod
+    def from_bytes(cls, data) -> Optional['ModuleInterface']:
+        """Lê uma interface gravada por to_bytes; None se for de outra versão do compilador."""
+        version, fingerprint, *fields = marshal.loads(data)
+        if version != COMPILER_VERSION or fingerprint != compiler_fingerprint():
+            return None
+        return cls(*fields)
+
+class ModuleLoader:
+    """
+    Resolve importações: 'import medical.pharmacy;' procura
+    medical/pharmacy.charcot em cada diretório de search_path, na ordem.
+    
+    Cada módulo é analisado no máximo uma vez por execução: a interface
+    fica em modules, compartilhada por todos os importadores. Com um
+    directory, a interface também é gravada em directory/<módulo>.charcoti
+    e, nas execuções seguintes, lida no lugar do código do módulo enquanto
+    o código-fonte dele e dos módulos que ele importa não mudarem.
+    parsed e loaded contam os módulos analisados e as interfaces lidas.
+    """
+    def __init__(self, search_path=(), directory=None):
+        self.search_path = list(search_path)
+        self.directory = directory
+        self.modules = {}    # nome -> ModuleInterface
+        self.loading = []    # Módulos em análise, para detectar importações circulares
+        self.parsed = 0
+        self.loaded = 0
+    
+    def find(self, name) -> str:
+        """Caminho do código-fonte do módulo."""
+        relative = os.path.join(*name.split('.')) + '.charcot'
+        for directory in self.search_path:
+            path = os.path.join(directory, relative)
+            if os.path.isfile(path):
+                return path
+        raise ModuleError(f"Módulo '{name}' não encontrado")
+    
+    def interface_path(self, name) -> str:
+        return os.path.join(self.directory, name + INTERFACE_EXTENSION)
+    
+    def load(self, name) -> ModuleInterface:
+        """Retorna a interface do módulo, lendo-a do disco ou analisando o módulo."""
+        interface = self.modules.get(name)
+        if interface is not None:
+            return interface
+        
+        if name in self.loading:
+            cycle = ' -> '.join(self.loading[self.loading.index(name):] + [name])
+            raise ModuleError(f"Importação circular: {cycle}")
+        
+        path = self.find(name)
+        self.loading.append(name)
+        try:
+            interface = self.read_interface(name, path)
+            if interface is None:
+                interface = self.build_interface(name, path)
+        finally:
+            self.loading.pop()
+        
+        self.modules[name] = interface
+        return interface
+    
+    def read_interface(self, name, path) -> Optional[ModuleInterface]:
+        """Interface gravada do módulo, ou None se não existir ou estiver desatualizada."""
+        if self.directory is None:
+            return None
+        try:
+            with open(self.interface_path(name), 'rb') as f:
+                interface = ModuleInterface.from_bytes(f.read())
+            stat = os.stat(path)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if interface is None:
+            return None
+        
+        # Mesmo tamanho e data de modificação: o código-fonte não é lido
+        if tuple(interface.stamp) != (stat.st_mtime_ns, stat.st_size):
+            with open(path, 'rb') as f:
+                if ASTCache.source_hash(f.read()) != interface.source_hash:
+                    return None
+        
+        for dependency, source_hash in interface.dependencies:
+            if self.load(dependency).source_hash != source_hash:
+                return None
+        
+        self.loaded += 1
+        return interface
+    
+    def build_interface(self, name, path) -> ModuleInterface:
+        """Analisa o módulo e grava a sua interface."""
+        with open(path, 'rb') as f:
+            source = f.read()
+        stat = os.stat(path)
+        
+        try:
+            program = Parser(Scanner(source).iter_tokens()).parse()
+        except SyntaxError as e:
+            raise ModuleError(f"Erro de sintaxe no módulo '{name}': {e}") from e
+        
+        analyzer = SemanticAnalyzer(self)
+        errors = analyzer.visit(program)
+        if errors:
+            raise ModuleError(f"Erros no módulo '{name}': " + '; '.join(errors))
+        self.parsed += 1
+        
+        dependencies = tuple(
+            (declaration.module_name, declaration.interface.source_hash)
+            for declaration in program.declarations
+            if isinstance(declaration, ImportDeclaration)
+        )
+        interface = ModuleInterface.from_program(
+            name, ASTCache.source_hash(source), (stat.st_mtime_ns, stat.st_size),
+            program, analyzer.global_scope, dependencies
+        )
+        
+        if self.directory is not None:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                path = self.interface_path(name)
+                temporary = f"{path}.{os.getpid()}.tmp"
+                with open(temporary, 'wb') as f:
+                    f.write(interface.to_bytes())
+                os.replace(temporary, path)
+            except OSError:
+                pass  # Sem a interface em disco, o módulo é analisado de novo na próxima execução
+        return interface
 
 
 #################################################
 # PARTE 4: GERAÇÃO DE CÓDIGO LLVM IR
 #################################################
 
-class LLVMCodeGenerator:
+# Tipo LLVM das medidas compostas: <sistólica, diastólica> na unidade canônica
+VECTOR_TYPE = "<2 x float>"
+
+# Tipos inteiros do IR; os demais escalares numéricos são float
+INTEGER_TYPES = frozenset(('i1', 'i8', 'i32', 'i64'))
+
+# Instruções que encerram um bloco básico
+TERMINATORS = frozenset(('br', 'ret'))
+
+# Campos da estrutura %Patient: (propriedade, tipo LLVM, comentário)
+PATIENT_FIELDS = [
+    ('id', 'i8*', 'id'),
+    ('name', 'i8*', 'name'),
+    ('birth', 'i32', 'birth (timestamp)'),
+    ('weight', 'float', 'weight em kg'),
+    ('height', 'float', 'height em m'),
+    ('allergies', 'i8**', 'allergies (array de strings)'),
+]
+PATIENT_FIELD_INDEX = {name: index for index, (name, _, _) in enumerate(PATIENT_FIELDS)}
+
+
+def single(value) -> float:
+    """value arredondado para precisão simples, o float do código gerado; o que excede a faixa vira infinito."""
+    try:
+        return struct.unpack('f', struct.pack('f', value))[0]
+    except OverflowError:
+        return float('inf') if value > 0 else float('-inf')
+
+def wrap_integer(value, llvm_type='i32') -> int:
+    """value na faixa com sinal do tipo inteiro llvm_type, com overflow circular como na execução."""
+    bits = int(llvm_type[1:])
+    half = 1 << (bits - 1)
+    return (value + half) % (1 << bits) - half
+
+def format_float(value) -> str:
+    """
+    Literal float no formato do LLVM. Valores sem representação exata em
+    precisão simples (0.95, NaN, infinitos) são arredondados e escritos em
+    hexadecimal, como o próprio LLVM faz.
+    """
+    value = float(value)
+    single_value = single(value)
+    if single_value != value or single_value in (float('inf'), float('-inf')):
+        return f"0x{struct.pack('>d', single_value).hex().upper()}"
+    text = repr(value)
+    if 'e' in text and '.' not in text:
+        mantissa, exponent = text.split('e')
+        text = f"{mantissa}.0e{exponent}"
+    return text
+
+def llvm_string(text: str) -> Tuple[str, str]:
+    """Tipo e inicializador LLVM de um texto: bytes UTF-8 com o terminador null."""
+    data = text.encode('utf-8') + b'\0'
+    escaped = ''.join(
+        chr(byte) if 32 <= byte < 127 and byte not in (34, 92) else f"\\{byte:02X}"
+        for byte in data
+    )
+    return f"[{len(data)} x i8]", f'c"{escaped}"'
+
+def zero_value(llvm_type) -> 'Constant':
+    """Valor inicial de uma global cujo valor é calculado na execução: zero, false ou null."""
+    if llvm_type == VECTOR_TYPE:
+        return Constant(llvm_type, (0.0, 0.0))
+    if llvm_type.endswith('*'):
+        return Constant(llvm_type, None)
+    return Constant(llvm_type, 0)
+
+def pointee(llvm_type: str) -> str:
+    """Tipo apontado por um tipo ponteiro ('float*' -> 'float')."""
+    return llvm_type[:-1]
+
+
+#################################################
+# REPRESENTAÇÃO INTERMEDIÁRIA (SSA)
+#################################################
+
+class Value:
+    """
+    Valor do IR: constante, variável global, argumento ou instrução, com o
+    seu tipo LLVM. uses associa cada instrução que usa o valor ao número de
+    operandos em que ele aparece, de modo que replace_all_uses_with troca o
+    valor sem percorrer a função, e remover um uso não depende de quantos
+    outros o valor tem.
+    """
+    __slots__ = ('type', 'uses')
+    
+    def __init__(self, type):
+        self.type = type
+        self.uses: Dict['Instruction', int] = {}
+    
+    def add_use(self, user):
+        self.uses[user] = self.uses.get(user, 0) + 1
+    
+    def remove_use(self, user):
+        count = self.uses[user] - 1
+        if count:
+            self.uses[user] = count
+        else:
+            del self.uses[user]
+    
+    def replace_all_uses_with(self, value):
+        """Troca este valor por value em todas as instruções que o usam."""
+        for user in self.uses:
+            operands = user.operands
+            for index, operand in enumerate(operands):
+                if operand is self:
+                    operands[index] = value
+                    value.add_use(user)
+        self.uses = {}
+
+class Constant(Value):
+    """
+    Constante: número, booleano, vetor <sistólica, diastólica> ou, com
+    value None, null (ponteiros) ou undef.
+    """
+    __slots__ = ('value',)
+    
+    def __init__(self, type, value):
+        super().__init__(type)
+        self.value = value
+    
+    def cast(self, type) -> Optional['Constant']:
+        """
+        A mesma constante num tipo escalar, ou null/undef do novo tipo;
+        vetores são mantidos. Inteiros têm overflow circular; um float
+        infinito ou NaN não tem valor inteiro e resulta em None.
+        """
+        if type == self.type or VECTOR_TYPE in (type, self.type):
+            return self
+        value = self.value
+        if value is None:
+            return Constant(type, None)
+        if type == 'i1':
+            return Constant(type, bool(value))
+        if type in INTEGER_TYPES:
+            if isinstance(value, float) and not math.isfinite(value):
+                return None
+            return Constant(type, wrap_integer(int(value), type))
+        if type == 'float':
+            return Constant(type, float(self.value))
+        return self
+    
+    def __str__(self):
+        value = self.value
+        if value is None:
+            return 'null' if self.type.endswith('*') else 'undef'
+        if self.type == 'i1':
+            return 'true' if value else 'false'
+        if self.type in INTEGER_TYPES:
+            return str(int(value))
+        if self.type.startswith('<'):
+            # Vetor: <2 x float> das medidas compostas ou <2 x i1> das suas comparações
+            element_type = self.type[self.type.index(' x ') + 3:-1]
+            return f"<{', '.join(f'{element_type} {Constant(element_type, element)}' for element in value)}>"
+        return format_float(value)
+
+class GlobalVariable(Value):
+    """
+    Variável global do módulo: externa (importada de outro módulo, sem
+    inicializador), constante privada do pool, com o inicializador já no
+    formato do LLVM, ou variável de nível superior do programa, com um
+    Constant ou ElementPointer como valor inicial. constant marca as que nunca são
+    alteradas. Como operando, é o ponteiro @name.
+    """
+    __slots__ = ('name', 'value_type', 'initializer', 'comment', 'linkage', 'constant')
+    
+    def __init__(self, name, value_type, initializer=None, comment=None, linkage=None, constant=False):
+        super().__init__(value_type + '*')
+        self.name = name
+        self.value_type = value_type
+        self.initializer = initializer
+        self.comment = comment
+        self.linkage = linkage
+        self.constant = constant
+    
+    def __str__(self):
+        return f"@{self.name}"
+
+class ElementPointer(Value):
+    """
+    Expressão constante getelementptr para o primeiro elemento de uma
+    constante global, como o i8* de um texto. É impressa no lugar do
+    operando, sem instrução na função.
+    """
+    __slots__ = ('variable',)
+    
+    def __init__(self, variable: GlobalVariable, element_type):
+        super().__init__(element_type + '*')
+        self.variable = variable
+    
+    def __str__(self):
+        array_type = self.variable.value_type
+        return f"getelementptr ({array_type}, {array_type}* {self.variable}, i32 0, i32 0)"
+
+class Argument(Value):
+    """Parâmetro de uma função, impresso pela sua posição (%0, %1...)."""
+    __slots__ = ('index',)
+    
+    def __init__(self, type, index):
+        super().__init__(type)
+        self.index = index
+    
+    def __str__(self):
+        return f"%{self.index}"
+
+class Instruction(Value):
+    """
+    Instrução do IR. operands são os valores usados; targets são os blocos
+    de destino de um br e, num phi, o bloco de origem de cada operando.
+    predicate é a condição de fcmp/icmp; callee, o nome da função chamada
+    por um call; comment, um comentário impresso ao fim da linha.
+    Instruções sem resultado têm o tipo void.
+    """
+    __slots__ = ('opcode', 'operands', 'targets', 'block', 'predicate', 'callee', 'comment')
+    
+    def __init__(self, opcode, type, operands=(), targets=(), predicate=None,
+                 callee=None, comment=None):
+        super().__init__(type)
+        self.opcode = opcode
+        self.operands: List[Value] = list(operands)
+        for operand in self.operands:
+            operand.add_use(self)
+        self.targets: List['BasicBlock'] = targets
+        self.block: Optional['BasicBlock'] = None
+        self.predicate = predicate
+        self.callee = callee
+        self.comment = comment
+    
+    def drop_operands(self):
+        """Retira a instrução dos usos dos seus operandos, antes de removê-la."""
+        for operand in self.operands:
+            operand.remove_use(self)
+        self.operands = []
+    
+    def erase(self):
+        """Remove a instrução do seu bloco."""
+        self.drop_operands()
+        self.block.instructions.remove(self)
+        self.block = None
+
+class BasicBlock:
+    """Sequência de instruções terminada por um br ou ret."""
+    __slots__ = ('instructions', 'function')
+    
+    def __init__(self):
+        self.instructions: List[Instruction] = []
+        self.function: Optional['IRFunction'] = None
+    
+    @property
+    def terminator(self) -> Optional[Instruction]:
+        instructions = self.instructions
+        if instructions and instructions[-1].opcode in TERMINATORS:
+            return instructions[-1]
+        return None
+    
+    @property
+    def successors(self) -> List['BasicBlock']:
+        terminator = self.terminator
+        return terminator.targets if terminator is not None else []
+
+class IRFunction:
+    """
+    Função do módulo: uma definição, com os blocos básicos a partir do
+    bloco de entrada, ou uma declaração (sem blocos).
+    """
+    __slots__ = ('name', 'return_type', 'param_types', 'arguments', 'blocks')
+    
+    def __init__(self, name, return_type, param_types):
+        self.name = name
+        self.return_type = return_type
+        self.param_types = list(param_types)
+        self.arguments = [Argument(type, index) for index, type in enumerate(self.param_types)]
+        self.blocks: List[BasicBlock] = []
+    
+    @property
+    def is_declaration(self) -> bool:
+        return not self.blocks
+    
+    def append_block(self, block: BasicBlock) -> BasicBlock:
+        block.function = self
+        self.blocks.append(block)
+        return block
+    
+    def predecessors(self) -> Dict[BasicBlock, List[BasicBlock]]:
+        """Predecessores de cada bloco no grafo de fluxo de controle."""
+        predecessors = {block: [] for block in self.blocks}
+        for block in self.blocks:
+            for successor in block.successors:
+                predecessors[successor].append(block)
+        return predecessors
+
+def program_global(name) -> str:
+    """Nome LLVM da variável global name do programa (@var.name)."""
+    return f"var.{name}"
+
+class IRModule:
+    """
+    Unidade de compilação: tipos estruturados, variáveis globais e funções,
+    definidas ou declaradas, na ordem em que foram criadas. As constantes
+    globais formam um pool: cada valor distinto (tipo e inicializador) é
+    gravado uma única vez, por mais que o programa o repita.
+    """
     def __init__(self):
-        # Isso seria implementado com a biblioteca LLVM
-        # Para simplificar, vamos apenas construir strings LLVM IR
-        self.buffer = []
-        self.indentation = 0
-        self.label_counter = 0
-        self.temp_counter = 0
-        self.vars = {}  # Mapeamento de variáveis para registradores
-    
-    def indent(self):
-        self.indentation += 2
-    
-    def dedent(self):
-        self.indentation -= 2
-    
-    def emit(self, code):
-        self.buffer.append(' ' * self.indentation + code)
-    
-    def get_code(self):
-        return '\n'.join(self.buffer)
-    
-    def fresh_label(self):
-        """Gera um rótulo único."""
-        label = f"label{self.label_counter}"
-        self.label_counter += 1
-        return label
-    
-    def fresh_temp(self):
-        """Gera um registrador temporário único."""
-        temp = f"%t{self.temp_counter}"
-        self.temp_counter += 1
-        return temp
+        self.types: List[Tuple[str, List[Tuple[str, str]]]] = []  # (nome, [(tipo, comentário)])
+        self.globals: List[GlobalVariable] = []
+        self.functions: Dict[str, IRFunction] = {}
+        self.constants: Dict[Tuple[str, str], GlobalVariable] = {}
+        self.strings: Dict[str, ElementPointer] = {}
+        self.global_counter = 0
+    
+    def add_type(self, name, fields):
+        self.types.append((name, fields))
+    
+    def add_constant(self, prefix, value_type, initializer, comment=None) -> GlobalVariable:
+        """
+        Constante privada do pool. Uma constante nova recebe o nome prefix
+        seguido de um número único, separados por um ponto para não colidir
+        com as variáveis do programa; uma já existente é reutilizada.
+        """
+        key = (value_type, initializer)
+        variable = self.constants.get(key)
+        if variable is None:
+            variable = GlobalVariable(f"{prefix}.{self.global_counter}", value_type, initializer, comment,
+                                      linkage="private", constant=True)
+            self.global_counter += 1
+            self.globals.append(variable)
+            self.constants[key] = variable
+        return variable
+    
+    def string(self, text) -> ElementPointer:
+        """Ponteiro i8* para um texto do pool de constantes."""
+        pointer = self.strings.get(text)
+        if pointer is None:
+            array_type, initializer = llvm_string(text)
+            pointer = ElementPointer(self.add_constant("str", array_type, initializer), "i8")
+            self.strings[text] = pointer
+        return pointer
+    
+    def add_variable(self, name, value_type, initializer: Value) -> GlobalVariable:
+        """
+        Variável de nível superior do programa, visível aos módulos que o
+        importam. O nome recebe o prefixo var., que nenhum identificador
+        Charcot tem, para não colidir com as funções do ambiente de execução
+        (@array_size, @prescribe...) nem com os procedimentos.
+        """
+        variable = GlobalVariable(program_global(name), value_type, initializer)
+        self.globals.append(variable)
+        return variable
+    
+    def external_global(self, name, value_type) -> GlobalVariable:
+        """Variável global definida em outro módulo, com o nome que add_variable lhe deu lá."""
+        variable = GlobalVariable(program_global(name), value_type)
+        self.globals.append(variable)
+        return variable
+    
+    def declare_function(self, name, return_type, param_types) -> IRFunction:
+        """Declara uma função externa; uma função já declarada ou definida é mantida."""
+        function = self.functions.get(name)
+        if function is None:
+            function = self.functions[name] = IRFunction(name, return_type, param_types)
+        return function
+    
+    def add_function(self, name, return_type, param_types) -> IRFunction:
+        """Nova definição de função, com o bloco de entrada."""
+        function = IRFunction(name, return_type, param_types)
+        self.functions[name] = function
+        function.append_block(BasicBlock())
+        return function
+    
+    def definitions(self) -> List[IRFunction]:
+        return [function for function in self.functions.values() if not function.is_declaration]
+
+# Comparações de fcmp e icmp pelo sufixo do predicado (oeq, sgt, ne...)
+COMPARISONS = {
+    'eq': lambda left, right: left == right,
+    'ne': lambda left, right: left != right,
+    'gt': lambda left, right: left > right,
+    'ge': lambda left, right: left >= right,
+    'lt': lambda left, right: left < right,
+    'le': lambda left, right: left <= right,
+}
+
+def fold_constants(opcode, result_type, operands, predicate=None) -> Optional[Constant]:
+    """
+    Resultado de uma instrução cujos operandos são constantes, calculado como
+    na execução: floats em precisão simples, com NaN falso nas comparações
+    ordenadas, e inteiros de 32 bits com overflow circular. Vetores são
+    calculados elemento a elemento. None se o resultado não for uma
+    constante (undef, divisão inteira por zero).
+    """
+    values = [operand.value for operand in operands]
+    if any(value is None for value in values):
+        return None
+    if result_type.startswith('<'):
+        lanes = tuple(
+            fold_scalar(opcode, predicate, [value[lane] if isinstance(value, tuple) else value for value in values])
+            for lane in range(2)
+        )
+        return None if None in lanes else Constant(result_type, lanes)
+    value = fold_scalar(opcode, predicate, values)
+    return None if value is None else Constant(result_type, value)
+
+def fold_scalar(opcode, predicate, values):
+    """Valor escalar de fold_constants, ou None."""
+    if opcode in ('fadd', 'fsub', 'fmul', 'fdiv'):
+        left, right = single(values[0]), single(values[1])
+        if opcode == 'fadd':
+            return single(left + right)
+        if opcode == 'fsub':
+            return single(left - right)
+        if opcode == 'fmul':
+            return single(left * right)
+        if right == 0:
+            if left == 0 or left != left:
+                return float('nan')
+            return math.copysign(float('inf'), left) * math.copysign(1.0, right)
+        return single(left / right)
+    if opcode == 'fneg':
+        return -single(values[0])
+    if opcode == 'sitofp':
+        return single(int(values[0]))
+    if opcode == 'fptosi':
+        value = single(values[0])
+        if not math.isfinite(value):
+            return None
+        return wrap_integer(int(value))
+    if opcode in ('add', 'sub', 'mul', 'sdiv'):
+        left, right = int(values[0]), int(values[1])
+        if opcode == 'add':
+            result = left + right
+        elif opcode == 'sub':
+            result = left - right
+        elif opcode == 'mul':
+            result = left * right
+        elif right == 0 or (left == -2**31 and right == -1):
+            return None
+        else:
+            # sdiv trunca em direção a zero
+            result = abs(left) // abs(right) * (1 if (left < 0) == (right < 0) else -1)
+        return wrap_integer(result)
+    if opcode == 'xor':
+        return bool(values[0]) != bool(values[1])
+    if opcode in ('fcmp', 'icmp'):
+        left, right = values
+        if opcode == 'fcmp':
+            left, right = single(left), single(right)
+            if left != left or right != right:
+                # Predicados ordenados (o*) são falsos com NaN; os não ordenados (u*), verdadeiros
+                return predicate.startswith('u')
+        return COMPARISONS[predicate[-2:]](left, right)
+    return None
+
+class IRBuilder:
+    """
+    Cria instruções no fim do bloco atual. Uma instrução inserida depois do
+    br ou ret que encerrou o bloco vai para um bloco novo, sem
+    predecessores, que a otimização remove. Como no IRBuilder do LLVM,
+    operações cujos operandos são todos constantes são calculadas na hora,
+    sem instrução.
+    """
+    def __init__(self):
+        self.function: Optional[IRFunction] = None
+        self.block: Optional[BasicBlock] = None
+    
+    def position_at_end(self, block: BasicBlock):
+        """Passa a inserir em block, que entra na função atual se ainda não estiver nela."""
+        if block.function is None:
+            self.function.append_block(block)
+        self.block = block
+    
+    def insert(self, instruction: Instruction) -> Instruction:
+        block = self.block
+        if block.terminator is not None:
+            block = BasicBlock()
+            self.position_at_end(block)
+        instruction.block = block
+        block.instructions.append(instruction)
+        return instruction
+    
+    def alloca(self, llvm_type) -> Instruction:
+        return self.insert(Instruction('alloca', llvm_type + '*'))
+    
+    def load(self, pointer) -> Instruction:
+        return self.insert(Instruction('load', pointee(pointer.type), [pointer]))
+    
+    def coerce(self, value, llvm_type) -> Value:
+        """
+        value no tipo llvm_type: constantes são convertidas na hora, inteiros
+        e floats por sitofp/fptosi, escalares replicados nos dois valores de
+        um vetor e ponteiros, reinterpretados. Um float infinito ou NaN não
+        é calculado e fica para o fptosi da execução.
+        """
+        if value.type == llvm_type:
+            return value
+        if llvm_type == VECTOR_TYPE:
+            return self.splat(value)
+        if isinstance(value, Constant):
+            constant = value.cast(llvm_type)
+            if constant is not None:
+                return constant
+        if value.type == 'i32' and llvm_type == 'float':
+            return self.convert('sitofp', value, llvm_type)
+        if value.type == 'float' and llvm_type == 'i32':
+            return self.convert('fptosi', value, llvm_type)
+        if value.type.endswith('*') and llvm_type.endswith('*'):
+            return self.bitcast(value, llvm_type)
+        return value
+    
+    def splat(self, value) -> Value:
+        """Replica um escalar nos dois elementos de um vetor; vetores são mantidos."""
+        if value.type == VECTOR_TYPE:
+            return value
+        value = self.coerce(value, 'float')
+        if isinstance(value, Constant):
+            return Constant(VECTOR_TYPE, (value.value, value.value))
+        partial = self.insertelement(Constant(VECTOR_TYPE, None), value, 0)
+        return self.insertelement(partial, value, 1)
+    
+    def convert(self, opcode, value, llvm_type) -> Value:
+        """Conversão numérica (sitofp, fptosi) de value para llvm_type."""
+        return self.fold(Instruction(opcode, llvm_type, [value]))
+    
+    def store(self, value, pointer) -> Instruction:
+        value = self.coerce(value, pointee(pointer.type))
+        return self.insert(Instruction('store', 'void', [value, pointer]))
+    
+    def binary(self, opcode, left, right) -> Value:
+        return self.fold(Instruction(opcode, left.type, [left, right]))
+    
+    def compare(self, opcode, predicate, left, right) -> Value:
+        result_type = '<2 x i1>' if left.type == VECTOR_TYPE else 'i1'
+        return self.fold(Instruction(opcode, result_type, [left, right], predicate=predicate))
+    
+    def bitcast(self, value, llvm_type) -> Value:
+        if value.type == llvm_type:
+            return value
+        return self.insert(Instruction('bitcast', llvm_type, [value]))
+    
+    def unary(self, opcode, operand) -> Value:
+        return self.fold(Instruction(opcode, operand.type, [operand]))
+    
+    def fold(self, instruction: Instruction) -> Value:
+        """Insere instruction, ou retorna o seu valor se os operandos forem todos constantes."""
+        operands = instruction.operands
+        if all(isinstance(operand, Constant) for operand in operands):
+            folded = fold_constants(instruction.opcode, instruction.type, operands, instruction.predicate)
+            if folded is not None:
+                instruction.drop_operands()
+                return folded
+        return self.insert(instruction)
+    
+    def call(self, function: IRFunction, arguments, comment=None) -> Instruction:
+        """Chamada a function, com os argumentos convertidos para os tipos dos parâmetros."""
+        arguments = [self.coerce(argument, param_type) for argument, param_type
+                     in zip(arguments, function.param_types)] + list(arguments[len(function.param_types):])
+        return self.insert(Instruction('call', function.return_type, arguments,
+                                       callee=function.name, comment=comment))
+    
+    def getelementptr(self, result_type, pointer, *indices) -> Instruction:
+        operands = [pointer] + [Constant('i32', index) for index in indices]
+        return self.insert(Instruction('getelementptr', result_type, operands))
+    
+    def insertelement(self, vector, element, index) -> Instruction:
+        return self.insert(Instruction('insertelement', vector.type, [vector, element, Constant('i32', index)]))
+    
+    def phi(self, llvm_type, incoming) -> Instruction:
+        """Phi com os pares (valor, bloco de origem) de incoming."""
+        return self.insert(Instruction('phi', llvm_type, [value for value, _ in incoming],
+                                       [block for _, block in incoming]))
+    
+    def br(self, target) -> Instruction:
+        return self.insert(Instruction('br', 'void', targets=[target]))
+    
+    def cond_br(self, condition, then_block, else_block) -> Instruction:
+        return self.insert(Instruction('br', 'void', [condition], [then_block, else_block]))
+    
+    def ret(self, value=None) -> Instruction:
+        return self.insert(Instruction('ret', 'void', [value] if value is not None else []))
+
+class IRPrinter:
+    """
+    Escreve um IRModule como texto LLVM. Os registradores (%tN) e os
+    rótulos dos blocos (labelN) são numerados aqui, por função, na ordem em
+    que aparecem.
+    """
+    def print_module(self, module: IRModule) -> str:
+        lines = []
+        if module.types:
+            lines.append("; Tipos médicos personalizados")
+            for name, fields in module.types:
+                lines.append(f"{name} = type {{")
+                width = max(len(field_type) for field_type, _ in fields) + 1
+                for index, (field_type, comment) in enumerate(fields):
+                    separator = ',' if index < len(fields) - 1 else ''
+                    lines.append(f"  {field_type + separator:<{width}} ; {comment}")
+                lines.append("}")
+                lines.append("")
+        
+        declarations = [function for function in module.functions.values() if function.is_declaration]
+        if declarations:
+            lines.append("; Funções externas")
+            for function in declarations:
+                lines.append(f"declare {function.return_type} @{function.name}({', '.join(function.param_types)})")
+            lines.append("")
+        
+        if module.globals:
+            for variable in module.globals:
+                if variable.initializer is None:
+                    line = f"{variable} = external global {variable.value_type}"
+                else:
+                    linkage = f"{variable.linkage} " if variable.linkage else ""
+                    kind = "constant" if variable.constant else "global"
+                    line = f"{variable} = {linkage}{kind} {variable.value_type} {variable.initializer}"
+                lines.append(f"{line}  ; {variable.comment}" if variable.comment else line)
+            lines.append("")
+        
+        for function in module.definitions():
+            self.print_function(function, lines)
+        return '\n'.join(lines)
+    
+    def print_function(self, function: IRFunction, lines: List[str]):
+        names = {}
+        labels = {block: f"label{index}" if index else "entry" for index, block in enumerate(function.blocks)}
+        self.names = names
+        self.labels = labels
+        for block in function.blocks:
+            for instruction in block.instructions:
+                if instruction.type != 'void':
+                    names[instruction] = f"%t{len(names)}"
+        
+        params = ', '.join(function.param_types)
+        lines.append(f"define {function.return_type} @{function.name}({params}) {{")
+        for block in function.blocks:
+            lines.append(f"{labels[block]}:")
+            for instruction in block.instructions:
+                text = self.format(instruction)
+                if instruction.comment:
+                    text = f"{text}  ; {instruction.comment}"
+                lines.append(f"  {text}")
+        lines.append("}")
+        lines.append("")
+    
+    def operand(self, value: Value) -> str:
+        if isinstance(value, Instruction):
+            return self.names[value]
+        return str(value)
+    
+    def format(self, instruction: Instruction) -> str:
+        operand = self.operand
+        operands = instruction.operands
+        opcode = instruction.opcode
+        result = self.names.get(instruction)
+        
+        if opcode == 'alloca':
+            return f"{result} = alloca {pointee(instruction.type)}"
+        if opcode == 'load':
+            pointer = operands[0]
+            return f"{result} = load {instruction.type}, {pointer.type} {operand(pointer)}"
+        if opcode == 'store':
+            value, pointer = operands
+            return f"store {pointee(pointer.type)} {operand(value)}, {pointer.type} {operand(pointer)}"
+        if opcode in ('fcmp', 'icmp'):
+            left, right = operands
+            return f"{result} = {opcode} {instruction.predicate} {left.type} {operand(left)}, {operand(right)}"
+        if opcode == 'call':
+            arguments = ', '.join(f"{argument.type} {operand(argument)}" for argument in operands)
+            call = f"call {instruction.type} @{instruction.callee}({arguments})"
+            return call if result is None else f"{result} = {call}"
+        if opcode == 'getelementptr':
+            pointer = operands[0]
+            indices = ', '.join(f"{index.type} {operand(index)}" for index in operands[1:])
+            return f"{result} = getelementptr {pointee(pointer.type)}, {pointer.type} {operand(pointer)}, {indices}"
+        if opcode == 'insertelement':
+            vector, element, index = operands
+            return (f"{result} = insertelement {vector.type} {operand(vector)}, "
+                    f"{element.type} {operand(element)}, {index.type} {operand(index)}")
+        if opcode == 'phi':
+            incoming = ', '.join(f"[ {operand(value)}, %{self.labels[block]} ]"
+                                 for value, block in zip(operands, instruction.targets))
+            return f"{result} = phi {instruction.type} {incoming}"
+        if opcode == 'br':
+            if operands:
+                then_block, else_block = instruction.targets
+                return (f"br i1 {operand(operands[0])}, label %{self.labels[then_block]}, "
+                        f"label %{self.labels[else_block]}")
+            return f"br label %{self.labels[instruction.targets[0]]}"
+        if opcode == 'ret':
+            return f"ret {operands[0].type} {operand(operands[0])}" if operands else "ret void"
+        if opcode in ('bitcast', 'sitofp', 'fptosi'):
+            return f"{result} = {opcode} {operands[0].type} {operand(operands[0])} to {instruction.type}"
+        if opcode == 'fneg':
+            return f"{result} = fneg {instruction.type} {operand(operands[0])}"
+        
+        # Operações binárias (fadd, add, xor...)
+        left, right = operands
+        return f"{result} = {opcode} {instruction.type} {operand(left)}, {operand(right)}"
+
+
+#################################################
+# GERAÇÃO DO IR
+#################################################
+
+# Instruções aritméticas e predicados de comparação por tipo dos operandos
+FLOAT_OPCODES = {'+': 'fadd', '-': 'fsub', '*': 'fmul', '/': 'fdiv'}
+INTEGER_OPCODES = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'sdiv'}
+FLOAT_PREDICATES = {'>': 'ogt', '<': 'olt', '>=': 'oge', '<=': 'ole', '==': 'oeq', '!=': 'one'}
+INTEGER_PREDICATES = {'>': 'sgt', '<': 'slt', '>=': 'sge', '<=': 'sle', '==': 'eq', '!=': 'ne'}
+
+class LLVMCodeGenerator(NodeVisitor):
+    """
+    Gera o IR de uma AST já verificada pelo SemanticAnalyzer.
+    
+    O resultado é um IRModule: os visitantes de expressões retornam o Value
+    do resultado e o IRBuilder insere as instruções no bloco atual. O texto
+    LLVM só é produzido no fim, pelo IRPrinter, depois das otimizações. Os
+    comandos de nível superior que não declaram procedimentos formam a
+    função @charcot.init, e as variáveis e pacientes declarados nesse nível
+    são variáveis globais do módulo (@var.nome).
+    
+    As variáveis ficam em frames, uma pilha com uma lista por escopo
+    (programa, procedimento, bloco, foreach), na mesma estrutura dos escopos
+    da análise semântica: cada declaração ocupa a posição slot do frame do
+    seu escopo com o ponteiro (alloca ou global) que guarda o seu valor, e
+    cada referência é encontrada pelo (depth, slot) que a análise gravou
+    nela. Entrar e sair de um bloco apenas empilha e desempilha um frame,
+    sem copiar as variáveis visíveis. Um procedimento começa uma pilha
+    nova sobre o frame do programa, de modo que as globais continuam
+    visíveis.
+    """
+    def __init__(self):
+        self.module = IRModule()
+        self.builder = IRBuilder()
+        self.frames = [[]]  # Ponteiro de cada variável, por escopo
+        self.init_function = None  # @charcot.init, criada no primeiro comando de nível superior
+    
+    def define_variable(self, node, pointer):
+        """Registra a variável declarada por node no frame do escopo atual."""
+        self.define_slot(node.slot, pointer)
+    
+    def define_slot(self, slot, pointer):
+        """Registra uma variável na posição slot do frame do escopo atual."""
+        frame = self.frames[-1]
+        if slot >= len(frame):
+            frame.extend([None] * (slot + 1 - len(frame)))
+        frame[slot] = pointer
+    
+    def lookup_variable(self, node):
+        """Retorna o ponteiro da variável referenciada por node, ou None."""
+        depth = node.depth
+        level = len(self.frames) - 1 - depth if depth is not None else -1
+        if level < 0:
+            return None  # Não declarada, ou global dentro de um procedimento
+        frame = self.frames[level]
+        slot = node.slot
+        return frame[slot] if slot < len(frame) else None
     
     def get_type_str(self, type_name):
         """Converte um tipo Charcot para um tipo LLVM IR."""
@@ -1750,88 +4782,97 @@ class LLVMCodeGenerator:
             "Prescription": "%Prescription*"
         }
         
+        if type_name in UNIT_BY_SYMBOL:
+            # Medidas com unidade declarada ficam na unidade canônica
+            return "float"
+        
         return type_mapping.get(type_name, "i8*")  # Padrão para tipos desconhecidos
     
-    def generate(self, ast):
-        """Gera código LLVM IR a partir da AST."""
-        # Emite os cabeçalhos e declarações globais
+    def generate(self, ast) -> IRModule:
+        """Gera o IR do programa."""
+        # Tipos e declarações das funções de biblioteca
         self.generate_prelude()
         
         # Visita o nó raiz (Program)
         self.visit(ast)
         
-        return self.get_code()
+        return self.module
     
     def generate_prelude(self):
-        """Gera as declarações iniciais e tipos necessários."""
-        # Declarações de tipo para estruturas médicas
-        self.emit("; Tipos médicos personalizados")
-        
-        # Tipo Patient
-        self.emit("%Patient = type {")
-        self.indent()
-        self.emit("i8*,   ; id")
-        self.emit("i8*,   ; name")
-        self.emit("i32,   ; birth (timestamp)")
-        self.emit("float, ; weight em kg")
-        self.emit("float, ; height em cm")
-        self.emit("i8**   ; allergies (array de strings)")
-        self.dedent()
-        self.emit("}")
-        self.emit("")
-        
-        # Tipo Medication
-        self.emit("%Medication = type {")
-        self.indent()
-        self.emit("i8*,   ; name")
-        self.emit("i8*,   ; active_ingredient")
-        self.emit("float, ; strength")
-        self.emit("i8*    ; unit (mg, ml, etc)")
-        self.dedent()
-        self.emit("}")
-        self.emit("")
-        
-        # Tipo Prescription
-        self.emit("%Prescription = type {")
-        self.indent()
-        self.emit("%Patient*,    ; patient")
-        self.emit("%Medication*, ; medication")
-        self.emit("float,        ; dose")
-        self.emit("i8*,          ; instructions")
-        self.emit("i32,          ; valid_for (dias)")
-        self.emit("i32,          ; renewals")
-        self.emit("i8*,          ; prescribed_by")
-        self.emit("i32           ; date (timestamp)")
-        self.dedent()
-        self.emit("}")
-        self.emit("")
-        
-        # Funções de biblioteca padrão
-        self.emit("; Funções de biblioteca padrão")
-        
-        # Função verify_interaction
-        self.emit("declare i1 @verify_interaction(i8**, %Medication*)")
-        
-        # Função verify_allergies
-        self.emit("declare i1 @verify_allergies(i8**, %Medication*)")
-        
-        # Função verify_dosage
-        self.emit("declare i1 @verify_dosage(%Patient*, %Medication*, float)")
+        """Registra no módulo os tipos médicos e as funções de biblioteca."""
+        module = self.module
+        
+        # Tipos estruturados para as entidades médicas
+        module.add_type("%Patient", [(field_type, comment) for _, field_type, comment in PATIENT_FIELDS])
+        module.add_type("%Medication", [
+            ("i8*", "name"),
+            ("i8*", "active_ingredient"),
+            ("float", "strength"),
+            ("i8*", "unit (mg, ml, etc)"),
+        ])
+        module.add_type("%Prescription", [
+            ("%Patient*", "patient"),
+            ("%Medication*", "medication"),
+            ("float", "dose"),
+            ("i8*", "instructions"),
+            ("i32", "valid_for (dias)"),
+            ("i32", "renewals"),
+            ("i8*", "prescribed_by"),
+            ("i32", "date (timestamp)"),
+        ])
+        
+        declare = module.declare_function
+        
+        # Função verify_interaction, e a variante com o id do medicamento já resolvido
+        declare("verify_interaction", "i1", ["i8**", "%Medication*"])
+        declare("verify_interaction_id", "i1", ["i8**", "i32"])
+        
+        # Função verify_allergies, e a variante com a máscara de alergênios do medicamento
+        declare("verify_allergies", "i1", ["i8**", "%Medication*"])
+        declare("verify_allergies_mask", "i1", ["i8**", "i64*", "i32"])
+        
+        # Função verify_dosage, e a variante com o id do medicamento na tabela de doses
+        declare("verify_dosage", "i1", ["%Patient*", "%Medication*", "float"])
+        declare("verify_dosage_id", "i1", ["%Patient*", "i32", "float"])
         
         # Função log_administration
-        self.emit("declare void @log_administration(%Patient*, %Medication*, float, i32)")
+        declare("log_administration", "void", ["%Patient*", "%Medication*", "float", "i32"])
         
         # Outras funções de utilidade
-        self.emit("declare i8* @string_concat(i8*, i8*)")
-        self.emit("declare i32 @get_current_timestamp()")
-        self.emit("declare %Medication* @get_medication_by_name(i8*)")
-        self.emit("")
-    
-    def visit(self, node):
-        """Visita um nó da AST e gera o código correspondente."""
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        declare("string_concat", "i8*", ["i8*", "i8*"])
+        declare("get_current_timestamp", "i32", [])
+        declare("get_medication_by_name", "%Medication*", ["i8*"])
+        
+        # Reduções das comparações de medidas compostas (sistólica/diastólica)
+        declare("llvm.vector.reduce.or.v2i1", "i1", ["<2 x i1>"])
+        declare("llvm.vector.reduce.and.v2i1", "i1", ["<2 x i1>"])
+        
+        # Funções do ambiente de execução usadas pelo código gerado
+        declare("prescribe", "void", ["%Patient*", "%Medication*", "float", "i8*", "i32"])
+        declare("create_patient", "%Patient*", [])
+        declare("create_array", "i8**", ["i32"])
+        declare("array_set", "void", ["i8**", "i32", "i8*"])
+        declare("array_get", "i8*", ["i8**", "i32"])
+        declare("array_size", "i32", ["i8**"])
+        declare("values_equal", "i1", ["i8*", "i8*"])
+        declare("date_to_timestamp", "i32", ["i8*"])
+    
+    def call(self, name, arguments, comment=None) -> Value:
+        """
+        Chamada à função name. Funções ainda não declaradas são declaradas
+        com os tipos dos argumentos, retornando i8*.
+        """
+        function = self.module.functions.get(name)
+        if function is None:
+            function = self.module.declare_function(name, "i8*", [argument.type for argument in arguments])
+        return self.builder.call(function, arguments, comment)
+    
+    def parameter_types(self, node):
+        """Tipos LLVM dos parâmetros de um procedimento ou tratamento."""
+        return [
+            self.get_type_str(param.type_name) if param.type_name else "i8*"  # Tipo padrão
+            for param in node.parameters
+        ]
     
     def generic_visit(self, node):
         """Método genérico para nós não implementados explicitamente."""
@@ -1840,132 +4881,1165 @@ class LLVMCodeGenerator:
     
     def visit_Program(self, node):
         """Visita o nó raiz do programa."""
-        # Gera código para todas as declarações
+        builder = self.builder
+        
+        # Declara os procedimentos antes de gerar o código, para que as
+        # chamadas anteriores à definição usem a assinatura correta
+        for decl in node.declarations:
+            if isinstance(decl, (ProcedureDeclaration, TreatmentDeclaration)):
+                self.module.declare_function(decl.name, "void", self.parameter_types(decl))
+        
         for decl in node.declarations:
-            self.visit(decl)
+            if not isinstance(decl, (ProcedureDeclaration, TreatmentDeclaration, ImportDeclaration)):
+                # Comandos de nível superior vão para @charcot.init
+                if self.init_function is None:
+                    self.init_function = self.module.add_function("charcot.init", "void", [])
+                    builder.function = self.init_function
+                    builder.position_at_end(self.init_function.blocks[0])
+            yield decl
+        
+        if self.init_function is not None:
+            builder.ret()
     
     def visit_ImportDeclaration(self, node):
-        """Importações são resolvidas pelo analisador semântico, não gera código LLVM."""
-        self.emit(f"; Importação: {node.module_name}")
+        """
+        Importações são resolvidas pelo analisador semântico; aqui apenas se
+        declaram os procedimentos e as variáveis globais do módulo, definidos
+        na sua própria unidade de compilação.
+        """
+        interface = node.interface
+        if interface is None:
+            return
+        
+        for name, parameters in interface.procedures:
+            param_types = [self.get_type_str(type_name) for _, type_name in parameters]
+            self.module.declare_function(name, "void", param_types)
+        
+        # As variáveis ocupam as posições seguintes às dos procedimentos
+        slot = node.slot + len(interface.procedures)
+        for offset, (name, type_name, _, compound) in enumerate(interface.variables):
+            llvm_type = VECTOR_TYPE if compound else self.get_type_str(type_name)
+            self.define_slot(slot + offset, self.module.external_global(name, llvm_type))
     
     def visit_VariableDeclaration(self, node):
         """Gera código para declaração de variável."""
-        # No escopo global, declaramos variáveis globais
-        # No escopo local, usamos alloca
-        var_name = node.name
-        
-        # Determina o tipo LLVM da variável
-        if node.type_name:
-            llvm_type = self.get_type_str(node.type_name)
+        initial = None
+        if node.value:
+            initial = yield node.value
+        
+        # Determina o tipo LLVM da variável: o declarado ou, sem tipo, o que
+        # a análise inferiu do valor inicial (o mesmo que a interface do
+        # módulo exporta) ou, por fim, o do próprio valor; medidas compostas
+        # (150/95mmHg) ocupam um vetor sistólica/diastólica, se a variável
+        # não tiver tipo ou tiver uma unidade
+        type_name = node.type_name or node.value_type
+        compound = initial is not None and initial.type == VECTOR_TYPE and (
+            not node.type_name or node.type_name in UNIT_BY_SYMBOL)
+        if initial is not None and (compound or not type_name):
+            llvm_type = initial.type
+        elif type_name:
+            llvm_type = self.get_type_str(type_name)
         else:
-            # Inferência de tipo simples baseada no valor, se disponível
-            if node.value:
-                # Aqui seria implementada a inferência completa
-                llvm_type = "i8*"  # Assumindo string como padrão
-            else:
-                llvm_type = "i8*"  # Tipo padrão para variáveis sem tipo e sem valor
-        
-        # Aloca memória para a variável
-        temp = self.fresh_temp()
-        self.emit(f"{temp} = alloca {llvm_type}")
+            llvm_type = "i8*"  # Tipo padrão para variáveis sem tipo e sem valor
+        
+        if len(self.frames) == 1:
+            # Nível superior: variável global, com o valor inicial constante
+            # (número, medida ou texto) como inicializador; outros valores
+            # são gravados por @charcot.init
+            initializer = initial
+            if isinstance(initial, Constant) and initial.value is not None:
+                initializer = initial.cast(llvm_type)
+            constant = isinstance(initializer, (Constant, ElementPointer)) and initializer.type == llvm_type
+            if not constant:
+                initializer = zero_value(llvm_type)
+            pointer = self.module.add_variable(node.name, llvm_type, initializer)
+            self.define_variable(node, pointer)
+            if initial is not None and not constant:
+                self.builder.store(initial, pointer)
+            return
         
-        # Registra a variável para uso posterior
-        self.vars[var_name] = (temp, llvm_type)
+        # Aloca memória para a variável e registra-a para uso posterior
+        pointer = self.builder.alloca(llvm_type)
+        self.define_variable(node, pointer)
         
         # Se tiver um valor inicial, atribui-o
-        if node.value:
-            value_temp = self.visit(node.value)
-            if value_temp:
-                self.emit(f"store {llvm_type} {value_temp}, {llvm_type}* {temp}")
+        if initial is not None:
+            self.builder.store(initial, pointer)
     
     def visit_PatientDeclaration(self, node):
         """Gera código para declaração de paciente."""
-        patient_name = node.name
+        builder = self.builder
+        
+        if len(self.frames) == 1:
+            # Paciente global: a estrutura é criada por @charcot.init e
+            # precisa sobreviver a ela
+            patient = self.call("create_patient", [])
+            pointer = self.module.add_variable(node.name, "%Patient*", zero_value("%Patient*"))
+        else:
+            # Aloca a estrutura Patient; a variável guarda o ponteiro para ela
+            patient = builder.alloca("%Patient")
+            pointer = builder.alloca("%Patient*")
+        builder.store(patient, pointer)
+        self.define_variable(node, pointer)
+        
+        # Inicializa os campos do paciente com base nas propriedades fornecidas
+        yield from self.store_fields(patient, node.properties)
+        return patient
+    
+    def store_fields(self, patient, properties):
+        """Armazena as propriedades conhecidas nos campos de um %Patient."""
+        builder = self.builder
+        for prop in properties:
+            value = yield prop.value
+            field_index = PATIENT_FIELD_INDEX.get(prop.name)
+            if field_index is not None and value is not None:
+                builder.store(value, self.patient_field(patient, field_index))
+    
+    def visit_ProcedureDeclaration(self, node):
+        """Gera código para declaração de procedimento."""
+        builder = self.builder
+        
+        function = self.module.add_function(node.name, "void", self.parameter_types(node))
+        
+        # Salva a posição atual e o contexto de variáveis, e cria um novo
+        old_function, old_block = builder.function, builder.block
+        old_frames = self.frames
+        self.frames = [old_frames[0], []]
+        builder.function = function
+        builder.position_at_end(function.blocks[0])
+        
+        # Copia os parâmetros para variáveis locais
+        for param, argument in zip(node.parameters, function.arguments):
+            pointer = builder.alloca(argument.type)
+            builder.store(argument, pointer)
+            self.define_variable(param, pointer)
+        
+        # Gera código para o corpo do procedimento
+        yield node.body
+        
+        # Adiciona return void padrão se não houver return explícito
+        builder.ret()
         
-        # Aloca memória para a estrutura Patient
-        temp = self.fresh_temp()
-        self.emit(f"{temp} = alloca %Patient")
+        # Restaura o contexto anterior
+        self.frames = old_frames
+        builder.function, builder.block = old_function, old_block
+    
+    def visit_TreatmentDeclaration(self, node):
+        """Tratamentos são similares a procedimentos."""
+        yield from self.visit_ProcedureDeclaration(node)
+    
+    def visit_BlockStatement(self, node):
+        """Gera código para um bloco de declarações."""
+        # Novo escopo: variáveis declaradas no bloco não estarão
+        # disponíveis fora dele
+        self.frames.append([])
+        
+        # Gera código para cada declaração no bloco
+        for stmt in node.statements:
+            yield stmt
+        
+        self.frames.pop()
+    
+    def visit_IfStatement(self, node):
+        """Gera código para declaração if/else."""
+        builder = self.builder
+        condition = yield node.condition
+        
+        # Blocos then, else (se houver) e de continuação
+        then_block = BasicBlock()
+        else_block = BasicBlock() if node.else_body else None
+        cont_block = BasicBlock()
+        builder.cond_br(condition, then_block, else_block or cont_block)
+        
+        builder.position_at_end(then_block)
+        yield node.if_body
+        builder.br(cont_block)
+        
+        if else_block is not None:
+            builder.position_at_end(else_block)
+            yield node.else_body
+            builder.br(cont_block)
+        
+        builder.position_at_end(cont_block)
+    
+    def visit_WhileStatement(self, node):
+        """Gera código para loop while."""
+        builder = self.builder
+        cond_block = BasicBlock()
+        body_block = BasicBlock()
+        exit_block = BasicBlock()
+        builder.br(cond_block)
+        
+        # Bloco de condição
+        builder.position_at_end(cond_block)
+        condition = yield node.condition
+        builder.cond_br(condition, body_block, exit_block)
+        
+        # Bloco do corpo
+        builder.position_at_end(body_block)
+        yield node.body
+        builder.br(cond_block)
+        
+        builder.position_at_end(exit_block)
+    
+    def visit_ForEachStatement(self, node):
+        """Gera código para loop foreach."""
+        # Esta é uma implementação simplificada para arrays
+        # Uma implementação completa precisaria suportar diferentes tipos de coleções
+        builder = self.builder
+        
+        # O loop tem seu escopo, com a variável de iteração e a coleção
+        self.frames.append([])
+        
+        # Gera código para a coleção e obtém o seu tamanho (assumindo que é um array)
+        collection = yield node.collection
+        size = self.call("array_size", [collection])
+        
+        # Inicializa o índice
+        index = builder.alloca("i32")
+        builder.store(Constant("i32", 0), index)
+        
+        cond_block = BasicBlock()
+        body_block = BasicBlock()
+        exit_block = BasicBlock()
+        builder.br(cond_block)
+        
+        # Bloco de condição
+        builder.position_at_end(cond_block)
+        current = builder.load(index)
+        condition = builder.compare("icmp", "slt", current, size)
+        builder.cond_br(condition, body_block, exit_block)
+        
+        # Bloco do corpo: obtém o elemento atual
+        builder.position_at_end(body_block)
+        element = self.call("array_get", [collection, current])
+        
+        # Se node.variable for uma declaração de variável, declaramos a variável
+        # Senão, assumimos que é uma referência a uma variável existente
+        if isinstance(node.variable, VariableDeclaration):
+            var_type = self.get_type_str(node.variable.type_name) if node.variable.type_name else "i8*"
+            pointer = builder.alloca(var_type)
+            self.define_variable(node.variable, pointer)
+        else:
+            pointer = self.lookup_variable(node.variable)
+        if pointer is not None:
+            builder.store(element, pointer)
+        
+        # Visita o corpo do loop
+        yield node.body
+        
+        # Incrementa o índice e volta para a condição
+        following = builder.binary("add", builder.load(index), Constant("i32", 1))
+        builder.store(following, index)
+        builder.br(cond_block)
+        
+        builder.position_at_end(exit_block)
+        self.frames.pop()
+    
+    def visit_ClinicalPathStatement(self, node):
+        """Gera código para declaração clinical_path (switch/case)."""
+        builder = self.builder
+        value = yield node.expression
+        exit_block = BasicBlock()
+        
+        # Para cada caso, compara com a expressão e, se for igual, executa o corpo
+        for i, case in enumerate(node.cases):
+            case_value = yield case.value
+            equal = self.values_equal(value, case_value)
+            
+            case_block = BasicBlock()
+            next_block = BasicBlock() if i < len(node.cases) - 1 else exit_block
+            builder.cond_br(equal, case_block, next_block)
+            
+            builder.position_at_end(case_block)
+            yield case.body
+            builder.br(exit_block)
+            
+            if next_block is not exit_block:
+                builder.position_at_end(next_block)
+        
+        if not node.cases:
+            builder.br(exit_block)
+        builder.position_at_end(exit_block)
+    
+    def values_equal(self, value, case_value):
+        """
+        Igualdade do clinical_path, como o operador '==': números e medidas
+        são comparados com fcmp/icmp, que a otimização consegue calcular;
+        textos e outros ponteiros, por @values_equal na execução.
+        """
+        return self.binary_operation('==', value, case_value)
+    
+    def visit_ReturnStatement(self, node):
+        """Gera código para declaração return."""
+        if node.value:
+            # O tipo de retorno dependeria do contexto da função
+            # Para simplificar, assumimos que os procedimentos são void
+            yield node.value
+        self.builder.ret()
+    
+    def visit_ExpressionStatement(self, node):
+        """Gera código para uma declaração de expressão."""
+        yield node.expression
+    
+    def visit_PrescribeStatement(self, node):
+        """Gera código para declaração prescribe."""
+        patient = yield node.patient
+        medication = yield node.medication
+        dose = yield node.dose
+        
+        if node.instructions:
+            instructions = yield node.instructions
+        else:
+            instructions = Constant("i8*", None)  # Sem instruções
+        
+        if node.duration:
+            duration = yield node.duration
+        else:
+            duration = Constant("i32", 30)  # Duração padrão (30 dias)
+        
+        self.call("prescribe", [patient, medication, dose, instructions, duration])
+    
+    def visit_BinaryOperation(self, node):
+        """Gera código para operações binárias."""
+        operator = node.operator
+        if operator in ('&&', '||'):
+            return (yield from self.logical_operation(node))
+        if operator == '=':
+            return (yield from self.assignment(node))
+        
+        left = yield node.left
+        right = yield node.right
+        if left is None or right is None:
+            return None
+        return self.binary_operation(operator, left, right)
+    
+    def binary_operation(self, operator, left, right):
+        """
+        Operação aritmética ou comparação entre dois valores. Igualdades
+        entre ponteiros (textos, pacientes) são decididas por @values_equal.
+        """
+        if VECTOR_TYPE in (left.type, right.type):
+            return self.vector_operation(operator, left, right)
+        
+        if operator in ('==', '!=') and left.type.endswith('*') and right.type.endswith('*'):
+            equal = self.call("values_equal", [left, right])
+            return equal if operator == '==' else self.builder.binary("xor", equal, Constant("i1", True))
+        
+        # Constantes assumem o tipo do outro operando (i32 ou float); entre
+        # um inteiro e um float calculados, o inteiro é convertido para float
+        builder = self.builder
+        if isinstance(left, Constant):
+            left = builder.coerce(left, right.type)
+        elif isinstance(right, Constant):
+            right = builder.coerce(right, left.type)
+        elif left.type == 'float':
+            right = builder.coerce(right, 'float')
+        elif right.type == 'float':
+            left = builder.coerce(left, 'float')
+        
+        integer = left.type in INTEGER_TYPES
+        if operator in FLOAT_OPCODES:
+            opcode = (INTEGER_OPCODES if integer else FLOAT_OPCODES)[operator]
+            return builder.binary(opcode, left, right)
+        if integer:
+            return builder.compare("icmp", INTEGER_PREDICATES[operator], left, right)
+        return builder.compare("fcmp", FLOAT_PREDICATES[operator], left, right)
+    
+    def logical_operation(self, node):
+        """
+        a && b e a || b com avaliação em curto-circuito: b só é calculado
+        se a não decidir o resultado, e um phi junta os dois caminhos.
+        """
+        builder = self.builder
+        left = yield node.left
+        left_block = builder.block
+        right_block = BasicBlock()
+        end_block = BasicBlock()
+        if node.operator == '&&':
+            builder.cond_br(left, right_block, end_block)
+        else:
+            builder.cond_br(left, end_block, right_block)
+        
+        builder.position_at_end(right_block)
+        right = yield node.right
+        right_end = builder.block
+        builder.br(end_block)
+        
+        builder.position_at_end(end_block)
+        short_circuit = Constant("i1", node.operator == '||')
+        return builder.phi("i1", [(short_circuit, left_block), (right, right_end)])
+    
+    def assignment(self, node):
+        """Atribuição: armazena o valor no endereço da variável ou do campo à esquerda."""
+        value = yield node.right
+        target = node.left
+        
+        if isinstance(target, VariableReference):
+            pointer = self.lookup_variable(target)
+            if pointer is None:
+                print(f"Warning: Variable {target.name} not found")
+        elif isinstance(target, PropertyAccess) and target.property_name in PATIENT_FIELD_INDEX:
+            patient = yield target.object_expr
+            pointer = self.patient_field(patient, PATIENT_FIELD_INDEX[target.property_name])
+        else:
+            pointer = None
+        
+        if pointer is not None and value is not None:
+            self.builder.store(value, pointer)
+        return value
+    
+    def vector_operation(self, operator, left, right):
+        """
+        Gera código para uma operação com medida composta. Um operando
+        escalar é replicado nos dois elementos; comparações reduzem o vetor
+        de i1 a um único valor: '>', '>=' e '!=' valem se valerem para a
+        sistólica ou a diastólica, os demais apenas se valerem para ambas.
+        """
+        builder = self.builder
+        left = builder.splat(left)
+        right = builder.splat(right)
+        
+        if operator in FLOAT_OPCODES:
+            return builder.binary(FLOAT_OPCODES[operator], left, right)
+        
+        compare = builder.compare("fcmp", FLOAT_PREDICATES[operator], left, right)
+        reduction = 'or' if operator in ['>', '>=', '!='] else 'and'
+        return self.call(f"llvm.vector.reduce.{reduction}.v2i1", [compare])
+    
+    def visit_UnaryOperation(self, node):
+        """Gera código para operações unárias."""
+        operand = yield node.operand
+        if operand is None:
+            return None
+        
+        if node.operator == '-':
+            if operand.type in INTEGER_TYPES:
+                return self.builder.binary("sub", Constant(operand.type, 0), operand)
+            return self.builder.unary("fneg", operand)
+        if node.operator == '!':
+            return self.builder.binary("xor", operand, Constant("i1", True))
+        return operand
+    
+    def visit_VariableReference(self, node):
+        """Gera código para referência a variável."""
+        pointer = self.lookup_variable(node)
+        if pointer is None:
+            print(f"Warning: Variable {node.name} not found")
+            return Constant("i8*", None)
+        
+        # Carrega o valor da variável
+        return self.builder.load(pointer)
+    
+    def visit_PropertyAccess(self, node):
+        """Gera código para acesso a propriedade."""
+        obj = yield node.object_expr
+        prop_name = node.property_name
+        
+        # Aqui seria necessário conhecer o tipo do objeto para
+        # determinar o índice correto do campo
+        # Para simplificar, assumimos que é um paciente
+        field_index = PATIENT_FIELD_INDEX.get(prop_name)
+        if field_index is None:
+            print(f"Warning: Property {prop_name} not found")
+            return Constant("i8*", None)
+        
+        # Acessa o campo e carrega o seu valor
+        return self.builder.load(self.patient_field(obj, field_index))
+    
+    def patient_field(self, patient, field_index):
+        """Ponteiro para um campo de %Patient; outros ponteiros são convertidos para %Patient*."""
+        patient = self.builder.bitcast(patient, "%Patient*")
+        field_type = PATIENT_FIELDS[field_index][1]
+        return self.builder.getelementptr(field_type + '*', patient, 0, field_index)
+    
+    def visit_FunctionCall(self, node):
+        """Gera código para chamada de função."""
+        resolved = node.resolved
+        if isinstance(resolved, bool):
+            # Decidida pela análise semântica; os argumentos são literais
+            return Constant("i1", resolved)
+        
+        if isinstance(resolved, tuple) and node.name == "verify_allergies":
+            # Medicamento literal: a execução faz o AND da máscara do paciente
+            # com a máscara do medicamento, palavra a palavra
+            allergies = yield node.arguments[0]
+            words = len(resolved)
+            mask_type = f"[{words} x i64]"
+            mask = self.module.add_constant(
+                "allergy_mask", mask_type, f"[{', '.join(f'i64 {word}' for word in resolved)}]",
+                node.arguments[1].value
+            )
+            mask_pointer = ElementPointer(mask, "i64")
+            return self.call("verify_allergies_mask", [allergies, mask_pointer, Constant("i32", words)])
+        
+        if resolved is not None and node.name == "verify_dosage":
+            # Medicamento literal: a execução consulta a faixa pelo id na tabela de doses
+            patient = yield node.arguments[0]
+            amount = yield node.arguments[2]
+            return self.call("verify_dosage_id", [patient, Constant("i32", resolved), amount],
+                             node.arguments[1].value)
+        
+        if resolved is not None and node.name == "verify_interaction":
+            # Medicamento literal: a execução recebe o id na base, sem comparar nomes
+            medications = yield node.arguments[0]
+            return self.call("verify_interaction_id", [medications, Constant("i32", resolved)],
+                             node.arguments[1].value)
+        
+        # Gera código para os argumentos
+        arguments = []
+        for arg in node.arguments:
+            argument = yield arg
+            arguments.append(argument if argument is not None else Constant("i8*", None))
+        
+        # Funções sem declaração retornam i8*; procedimentos (void) não têm valor
+        result = self.call(node.name, arguments)
+        return None if result.type == "void" else result
+    
+    def visit_MethodCall(self, node):
+        """Gera código para chamada de método."""
+        # Similar à chamada de função, mas com o objeto como primeiro argumento
+        obj = yield node.object_expr
+        
+        # Gera código para os argumentos
+        arguments = [obj]  # O objeto é o primeiro argumento
+        for arg in node.arguments:
+            argument = yield arg
+            arguments.append(argument)
+        arguments = [argument if argument is not None else Constant("i8*", None) for argument in arguments]
+        
+        # O nome do método é prefixado com o tipo do objeto
+        # Para simplificar, assumimos que é um paciente
+        return self.call(f"Patient_{node.method_name}", arguments)
+    
+    def visit_Literal(self, node):
+        """Gera código para literais."""
+        literal_type = node.literal_type
+        value = node.value
+        
+        if literal_type == "number":
+            # Números são tratados como float para simplificar
+            return Constant("float", float(value))
+        
+        if literal_type == "string":
+            return self.module.string(value)
+        
+        if literal_type == "date":
+            # Datas são representadas como timestamps Unix (i32), convertidos na execução
+            return self.call("date_to_timestamp", [self.module.string(value)])
+        
+        if literal_type == "measurement":
+            # Medições são tratadas como float na unidade canônica (SI),
+            # já calculada pelo analisador léxico
+            measurement = node.measurement or parse_measurement(value)
+            canonical_value = measurement.canonical_value
+            if isinstance(canonical_value, tuple):
+                # Medida composta: vetor (sistólica, diastólica)
+                return Constant(VECTOR_TYPE, canonical_value)
+            return Constant("float", canonical_value)
+        
+        # Tipo desconhecido
+        return Constant("i32", 0)
+    
+    def visit_ArrayLiteral(self, node):
+        """Gera código para literais de array."""
+        builder = self.builder
+        
+        # Cria um array de ponteiros
+        array_value = self.call("create_array", [Constant("i32", len(node.elements))])
+        
+        # Preenche o array com os elementos
+        for i, element in enumerate(node.elements):
+            element_value = yield element
+            self.call("array_set", [array_value, Constant("i32", i), element_value])
+        
+        return array_value
+    
+    def visit_ObjectLiteral(self, node):
+        """Gera código para literais de objeto."""
+        # Para simplificar, assumimos que é um paciente
+        patient = self.call("create_patient", [])
+        
+        # Inicializa os campos do objeto com as propriedades fornecidas
+        yield from self.store_fields(patient, node.properties)
+        return patient
+
+
+#################################################
+# PARTE 5: OTIMIZAÇÃO
+#################################################
+
+# Instruções sem efeitos colaterais: podem ser removidas se o resultado não
+# for usado, e duas iguais no mesmo bloco calculam o mesmo valor
+PURE_OPCODES = frozenset((
+    'fadd', 'fsub', 'fmul', 'fdiv', 'add', 'sub', 'mul', 'sdiv', 'xor', 'fneg',
+    'fcmp', 'icmp', 'getelementptr', 'insertelement', 'bitcast', 'sitofp', 'fptosi',
+))
+
+# Instruções que a eliminação de código morto remove quando o resultado não é usado
+REMOVABLE_OPCODES = PURE_OPCODES | {'load', 'phi', 'alloca'}
+
+# Valor, na propagação de constantes, de uma instrução que não é constante
+OVERDEFINED = object()
+
+class Optimizer:
+    """
+    Realiza otimizações no IR gerado. Os passes transformam as funções do
+    IRModule no próprio lugar; o texto LLVM é escrito depois.
+    """
+    def __init__(self, module: IRModule):
+        self.module = module
+        self.texts: Dict[ElementPointer, str] = {}
+    
+    def optimize(self) -> IRModule:
+        """Aplica várias otimizações nas funções do módulo."""
+        self.propagate_global_constants()
+        for function in self.module.definitions():
+            self.promote_allocas(function)
+            self.constant_folding(function)
+            self.common_subexpression_elimination(function)
+            self.dead_code_elimination(function)
+        self.remove_unused_constants()
+        return self.module
+    
+    def remove_unused_constants(self):
+        """
+        Remove do pool as constantes que nenhuma instrução nem inicializador
+        usa mais, como o texto de uma data já convertida por date_to_timestamp.
+        """
+        module = self.module
+        used = set()
+        values = [variable.initializer for variable in module.globals]
+        for function in module.definitions():
+            for block in function.blocks:
+                for instruction in block.instructions:
+                    values.extend(instruction.operands)
+        for value in values:
+            if isinstance(value, ElementPointer):
+                used.add(value.variable)
+            elif isinstance(value, GlobalVariable):
+                used.add(value)
+        
+        pool = set(module.constants.values())
+        unused = pool - used
+        if not unused:
+            return
+        module.globals = [variable for variable in module.globals if variable not in unused]
+        module.constants = {key: variable for key, variable in module.constants.items() if variable not in unused}
+        module.strings = {text: pointer for text, pointer in module.strings.items()
+                          if pointer.variable not in unused}
+    
+    def propagate_global_constants(self):
+        """
+        Uma variável global do programa que nunca é alterada (só é usada por
+        loads) vale sempre o seu inicializador: os loads são trocados por
+        ele e a variável passa a ser constant. Os módulos que a importam não
+        podem alterá-la, o que o analisador semântico garante.
+        """
+        for variable in self.module.globals:
+            initializer = variable.initializer
+            if (variable.constant or not isinstance(initializer, (Constant, ElementPointer)) or
+                    any(user.opcode != 'load' for user in variable.uses)):
+                continue
+            for load in list(variable.uses):
+                load.replace_all_uses_with(initializer)
+            variable.constant = True
+    
+    def constant_folding(self, function):
+        """
+        Propagação de constantes esparsa condicional (Wegman e Zadeck): cada
+        instrução começa indefinida e só é avaliada quando o seu bloco é
+        alcançável por arestas executáveis; um br com condição constante
+        torna executável apenas o destino tomado. No fim, as instruções de
+        valor constante são trocadas pelo valor, os br constantes viram
+        incondicionais e os blocos que nunca executam são removidos, com as
+        entradas dos phis que vinham deles.
+        """
+        values: Dict[Instruction, Any] = {}  # ausente: ainda indefinido
+        edges = set()
+        executable = set()
+        flow = [(None, function.blocks[0])]
+        ssa: List[Instruction] = []
+        
+        def lattice(value):
+            if isinstance(value, Instruction):
+                return values.get(value)
+            if isinstance(value, ElementPointer) or (isinstance(value, Constant) and value.value is not None):
+                return value
+            return OVERDEFINED  # argumentos, globais e undef
+        
+        def visit(instruction):
+            opcode = instruction.opcode
+            if opcode == 'br':
+                targets = instruction.targets
+                if instruction.operands:
+                    condition = lattice(instruction.operands[0])
+                    if condition is None:
+                        return
+                    if condition is not OVERDEFINED:
+                        targets = [targets[0] if condition.value else targets[1]]
+                for target in targets:
+                    flow.append((instruction.block, target))
+                return
+            if opcode == 'phi':
+                value = None
+                for operand, predecessor in zip(instruction.operands, instruction.targets):
+                    if (predecessor, instruction.block) in edges:
+                        value = self.meet(value, lattice(operand))
+            elif opcode == 'call':
+                value = self.fold_call(instruction, [lattice(operand) for operand in instruction.operands])
+            elif opcode in PURE_OPCODES:
+                value = self.fold_instruction(instruction, [lattice(operand) for operand in instruction.operands])
+            else:
+                value = OVERDEFINED
+            if value is None:
+                return
+            old = values.get(instruction)
+            new = value if old is None else self.meet(old, value)
+            if new is not old:
+                values[instruction] = new
+                ssa.extend(instruction.uses)
+        
+        while flow or ssa:
+            while flow:
+                edge = flow.pop()
+                if edge in edges:
+                    continue
+                edges.add(edge)
+                block = edge[1]
+                if block in executable:
+                    # Nova aresta para um bloco já avaliado: só os phis mudam
+                    for instruction in block.instructions:
+                        if instruction.opcode != 'phi':
+                            break
+                        visit(instruction)
+                    continue
+                executable.add(block)
+                for instruction in block.instructions:
+                    visit(instruction)
+            while ssa:
+                instruction = ssa.pop()
+                if instruction.block in executable:
+                    visit(instruction)
+        
+        # Troca os valores constantes e fixa os desvios constantes
+        for block in function.blocks:
+            if block not in executable:
+                continue
+            kept = []
+            for instruction in block.instructions:
+                value = values.get(instruction)
+                if value is not None and value is not OVERDEFINED:
+                    instruction.replace_all_uses_with(value)
+                    instruction.drop_operands()
+                    continue
+                if instruction.opcode == 'br' and instruction.operands:
+                    condition = lattice(instruction.operands[0])
+                    if condition is not None and condition is not OVERDEFINED:
+                        instruction.drop_operands()
+                        instruction.targets = [instruction.targets[0] if condition.value else instruction.targets[1]]
+                kept.append(instruction)
+            block.instructions = kept
+        
+        self.remove_unreachable_blocks(function)
+        predecessors = function.predecessors()
+        for block in function.blocks:
+            for instruction in block.instructions:
+                if instruction.opcode != 'phi':
+                    break
+                self.remove_incoming(instruction, set(predecessors[block]))
+        self.merge_blocks(function)
+    
+    def merge_blocks(self, function):
+        """
+        Junta a um bloco terminado por um br incondicional o seu destino,
+        quando o bloco é o único predecessor dele, como nas cadeias de br
+        que os desvios constantes deixam.
+        """
+        entry = function.blocks[0]
+        predecessors = function.predecessors()
+        merged = set()
+        for block in function.blocks:
+            if block in merged:
+                continue
+            while True:
+                terminator = block.terminator
+                if terminator is None or terminator.opcode != 'br' or terminator.operands:
+                    break
+                successor = terminator.targets[0]
+                if successor is block or successor is entry or len(predecessors[successor]) != 1:
+                    break
+                # Com um único predecessor, cada phi do destino vale a sua única entrada
+                instructions = successor.instructions
+                start = 0
+                while instructions[start].opcode == 'phi':
+                    phi = instructions[start]
+                    phi.replace_all_uses_with(phi.operands[0])
+                    phi.drop_operands()
+                    start += 1
+                block.instructions.pop()
+                for instruction in instructions[start:]:
+                    instruction.block = block
+                block.instructions.extend(instructions[start:])
+                for following in successor.successors:
+                    predecessors[following] = [block if other is successor else other
+                                               for other in predecessors[following]]
+                    for phi in following.instructions:
+                        if phi.opcode != 'phi':
+                            break
+                        phi.targets = [block if other is successor else other for other in phi.targets]
+                merged.add(successor)
+        if merged:
+            function.blocks = [block for block in function.blocks if block not in merged]
+    
+    @staticmethod
+    def meet(left, right):
+        """Encontro de dois valores da propagação de constantes (None é indefinido)."""
+        if left is None:
+            return right
+        if right is None or left is right:
+            return left
+        if OVERDEFINED in (left, right) or Optimizer.operand_key(left) != Optimizer.operand_key(right):
+            return OVERDEFINED
+        return left
+    
+    @staticmethod
+    def fold_instruction(instruction, operands):
+        """Valor de uma instrução sem efeitos colaterais a partir dos valores dos operandos."""
+        if OVERDEFINED in operands:
+            return OVERDEFINED
+        if None in operands:
+            return None
+        if not all(isinstance(operand, Constant) for operand in operands):
+            return OVERDEFINED
+        if instruction.opcode == 'insertelement':
+            vector, element, index = operands
+            lanes = list(vector.value or (None, None))
+            lanes[index.value] = element.value
+            return OVERDEFINED if None in lanes else Constant(instruction.type, tuple(lanes))
+        folded = fold_constants(instruction.opcode, instruction.type, operands, instruction.predicate)
+        return OVERDEFINED if folded is None else folded
+    
+    def fold_call(self, instruction, operands):
+        """
+        Valor de uma chamada que pode ser calculada na compilação: as
+        reduções dos vetores de comparação, values_equal entre textos do
+        pool e date_to_timestamp de uma data literal válida (meia-noite UTC).
+        """
+        callee = instruction.callee
+        if callee not in ('llvm.vector.reduce.or.v2i1', 'llvm.vector.reduce.and.v2i1',
+                          'values_equal', 'date_to_timestamp'):
+            return OVERDEFINED
+        if OVERDEFINED in operands:
+            return OVERDEFINED
+        if None in operands:
+            return None
+        if callee == 'values_equal':
+            left, right = operands
+            if isinstance(left, ElementPointer) and isinstance(right, ElementPointer) and left.type == 'i8*':
+                # Textos do pool são únicos: o mesmo ponteiro é o mesmo texto
+                return Constant('i1', left is right)
+            return OVERDEFINED
+        if callee == 'date_to_timestamp':
+            text = self.string_text(operands[0])
+            try:
+                date = datetime.date.fromisoformat(text)
+            except (TypeError, ValueError):
+                return OVERDEFINED
+            timestamp = calendar.timegm(date.timetuple())
+            return Constant('i32', timestamp) if -2**31 <= timestamp < 2**31 else OVERDEFINED
+        vector = operands[0]
+        if not isinstance(vector, Constant):
+            return OVERDEFINED
+        reduce = any if callee == 'llvm.vector.reduce.or.v2i1' else all
+        return Constant('i1', reduce(vector.value))
+    
+    def string_text(self, pointer) -> Optional[str]:
+        """Texto de um ponteiro do pool de strings do módulo, ou None."""
+        if len(self.texts) != len(self.module.strings):
+            self.texts = {pointer: text for text, pointer in self.module.strings.items()}
+        return self.texts.get(pointer)
+    
+    def promote_allocas(self, function):
+        """
+        Promoção para registradores (mem2reg): uma variável local cujo
+        alloca só é usado como endereço de load e store passa a ser um valor
+        SSA. Os phis vão para a fronteira de dominância iterada dos blocos
+        com store, apenas onde a variável está viva; depois, cada load é
+        trocado pelo valor que o alcança e os stores e o alloca são removidos.
+        """
+        self.remove_unreachable_blocks(function)
+        allocas = [
+            instruction for block in function.blocks for instruction in block.instructions
+            if instruction.opcode == 'alloca' and self.is_promotable(instruction)
+        ]
+        if not allocas:
+            return
         
-        # Registra o paciente para uso posterior
-        self.vars[patient_name] = (temp, "%Patient*")
+        predecessors = function.predecessors()
+        frontiers = self.dominance_frontiers(function, predecessors)
+        position = {
+            instruction: index for block in function.blocks
+            for index, instruction in enumerate(block.instructions)
+        }
         
-        # Inicializa os campos do paciente com base nas propriedades fornecidas
-        for prop in node.properties:
-            prop_name = prop.name
-            prop_value_temp = self.visit(prop.value)
+        # Inserção dos phis, em ordem de variável no início de cada bloco
+        phis: Dict[Instruction, int] = {}
+        new_phis: Dict[BasicBlock, List[Instruction]] = {}
+        for number, alloca in enumerate(allocas):
+            definitions = {user.block for user in alloca.uses if user.opcode == 'store'}
+            live = self.live_in_blocks(alloca, definitions, predecessors, position)
+            visited = set(definitions)
+            pending = list(definitions)
+            placed = set()
+            while pending:
+                for block in frontiers[pending.pop()]:
+                    if block in placed or block not in live:
+                        continue
+                    placed.add(block)
+                    phi = Instruction('phi', pointee(alloca.type), [], [])
+                    phi.block = block
+                    new_phis.setdefault(block, []).append(phi)
+                    phis[phi] = number
+                    if block not in visited:
+                        visited.add(block)
+                        pending.append(block)
+        for block, block_phis in new_phis.items():
+            block.instructions = block_phis + block.instructions
+        
+        # Renomeação: percorre o grafo a partir da entrada levando o valor
+        # atual de cada variável; antes de qualquer store, o valor é undef
+        index = {alloca: number for number, alloca in enumerate(allocas)}
+        initial = [Constant(pointee(alloca.type), None) for alloca in allocas]
+        pending = [(function.blocks[0], None, initial)]
+        visited = set()
+        while pending:
+            block, predecessor, values = pending.pop()
+            if predecessor is not None:
+                for phi in block.instructions:
+                    if phi.opcode != 'phi':
+                        break
+                    number = phis.get(phi)
+                    if number is not None:
+                        phi.operands.append(values[number])
+                        phi.targets.append(predecessor)
+                        values[number].add_use(phi)
+            if block in visited:
+                continue
+            visited.add(block)
             
-            # Obtém o campo correto com base no nome da propriedade
-            field_index = {
-                "id": 0,
-                "name": 1,
-                "birth": 2,
-                "weight": 3,
-                "height": 4,
-                "allergies": 5
-            }.get(prop_name, -1)
+            values = values.copy()
+            kept = []
+            for instruction in block.instructions:
+                opcode = instruction.opcode
+                if opcode == 'phi' and instruction in phis:
+                    values[phis[instruction]] = instruction
+                elif opcode == 'load' and instruction.operands[0] in index:
+                    instruction.replace_all_uses_with(values[index[instruction.operands[0]]])
+                    instruction.drop_operands()
+                    continue
+                elif opcode == 'store' and instruction.operands[1] in index:
+                    values[index[instruction.operands[1]]] = instruction.operands[0]
+                    instruction.drop_operands()
+                    continue
+                elif opcode == 'alloca' and instruction in index:
+                    continue
+                kept.append(instruction)
+            block.instructions = kept
             
-            if field_index >= 0:
-                # Acessa o campo
-                field_ptr_temp = self.fresh_temp()
-                self.emit(f"{field_ptr_temp} = getelementptr %Patient, %Patient* {temp}, i32 0, i32 {                field_index}")
-                
-                # Determina o tipo do campo
-                field_type = [
-                    "i8*",   # id
-                    "i8*",   # name
-                    "i32",   # birth
-                    "float", # weight
-                    "float", # height
-                    "i8**"   # allergies
-                ][field_index]
-                
-                # Armazena o valor
-                self.emit(f"store {field_type} {prop_value_temp}, {field_type}* {field_ptr_temp}")
-        
-        return obj_temp
-
-
-#################################################
-# PARTE 5: OTIMIZAÇÃO
-#################################################
-
-class Optimizer:
-    """
-    Realiza otimizações no código LLVM IR gerado.
-    """
-    def __init__(self, llvm_code):
-        self.llvm_code = llvm_code
-    
-    def optimize(self):
-        """Aplica várias otimizações no código LLVM."""
-        self.llvm_code = self.constant_folding(self.llvm_code)
-        self.llvm_code = self.dead_code_elimination(self.llvm_code)
-        self.llvm_code = self.common_subexpression_elimination(self.llvm_code)
-        return self.llvm_code
+            for successor in block.successors:
+                pending.append((successor, block, values))
+    
+    @staticmethod
+    def is_promotable(alloca):
+        """O alloca só é usado como endereço de loads e stores do seu próprio tipo."""
+        value_type = pointee(alloca.type)
+        for user in alloca.uses:
+            if user.opcode == 'load' and user.type == value_type:
+                continue
+            if (user.opcode == 'store' and user.operands[0] is not alloca and
+                    user.operands[0].type == value_type):
+                continue
+            return False
+        return True
     
-    def constant_folding(self, code):
+    @staticmethod
+    def live_in_blocks(alloca, definitions, predecessors, position):
         """
-        Dobramento de constantes: substitui expressões constantes
-        por seus valores calculados em tempo de compilação.
+        Blocos em cuja entrada a variável está viva: os que a leem antes de
+        qualquer store e, para trás, os predecessores sem store que levam a
+        eles.
         """
-        # Implementação simplificada
-        return code
-    
-    def dead_code_elimination(self, code):
+        first = {}
+        for user in alloca.uses:
+            block = user.block
+            if block not in first or position[user] < position[first[block]]:
+                first[block] = user
+        live = {block for block, user in first.items() if user.opcode == 'load'}
+        pending = list(live)
+        while pending:
+            for predecessor in predecessors[pending.pop()]:
+                if predecessor not in live and predecessor not in definitions:
+                    live.add(predecessor)
+                    pending.append(predecessor)
+        return live
+    
+    @staticmethod
+    def dominance_frontiers(function, predecessors):
+        """
+        Fronteira de dominância de cada bloco, a partir dos dominadores
+        imediatos calculados pelo algoritmo iterativo de Cooper, Harvey e
+        Kennedy sobre a pós-ordem reversa.
+        """
+        entry = function.blocks[0]
+        postorder = []
+        visited = {entry}
+        stack = [(entry, iter(entry.successors))]
+        while stack:
+            block, successors = stack[-1]
+            for successor in successors:
+                if successor not in visited:
+                    visited.add(successor)
+                    stack.append((successor, iter(successor.successors)))
+                    break
+            else:
+                stack.pop()
+                postorder.append(block)
+        order = {block: number for number, block in enumerate(postorder)}
+        
+        idom = {entry: entry}
+        changed = True
+        while changed:
+            changed = False
+            for block in reversed(postorder[:-1]):
+                dominator = None
+                for predecessor in predecessors[block]:
+                    if predecessor not in idom:
+                        continue
+                    if dominator is None:
+                        dominator = predecessor
+                        continue
+                    # Sobe pelas duas cadeias de dominadores até o ancestral comum
+                    other = predecessor
+                    while other is not dominator:
+                        while order[other] < order[dominator]:
+                            other = idom[other]
+                        while order[dominator] < order[other]:
+                            dominator = idom[dominator]
+                if idom.get(block) is not dominator:
+                    idom[block] = dominator
+                    changed = True
+        
+        frontiers = {block: set() for block in function.blocks}
+        for block in postorder:
+            block_predecessors = predecessors[block]
+            if len(block_predecessors) < 2:
+                continue
+            for predecessor in block_predecessors:
+                runner = predecessor
+                while runner is not idom[block]:
+                    frontiers[runner].add(block)
+                    runner = idom[runner]
+        return frontiers
+    
+    def remove_unreachable_blocks(self, function):
+        """Remove os blocos inalcançáveis a partir da entrada e as entradas dos phis que vinham deles."""
+        reachable = {function.blocks[0]}
+        pending = [function.blocks[0]]
+        while pending:
+            for successor in pending.pop().successors:
+                if successor not in reachable:
+                    reachable.add(successor)
+                    pending.append(successor)
+        
+        if len(reachable) < len(function.blocks):
+            for block in function.blocks:
+                if block not in reachable:
+                    for instruction in block.instructions:
+                        instruction.drop_operands()
+            function.blocks = [block for block in function.blocks if block in reachable]
+            # Phis dos blocos restantes perdem as entradas dos removidos
+            for block in function.blocks:
+                for instruction in block.instructions:
+                    if instruction.opcode == 'phi':
+                        self.remove_incoming(instruction, reachable)
+    
+    def dead_code_elimination(self, function):
         """
-        Eliminação de código morto: remove instruções que não
-        afetam o resultado do programa.
+        Eliminação de código morto: remove os blocos inalcançáveis a partir
+        da entrada e as instruções sem efeitos colaterais cujo resultado
+        não é usado (inclusive as que só eram usadas pelas removidas).
         """
-        # Implementação simplificada
-        return code
+        self.remove_unreachable_blocks(function)
+        pending = [
+            instruction for block in function.blocks for instruction in block.instructions
+            if not instruction.uses and instruction.opcode in REMOVABLE_OPCODES
+        ]
+        removed = set()
+        while pending:
+            instruction = pending.pop()
+            if instruction in removed:
+                continue
+            removed.add(instruction)
+            operands = instruction.operands
+            instruction.drop_operands()
+            for operand in operands:
+                if (isinstance(operand, Instruction) and not operand.uses and
+                        operand.opcode in REMOVABLE_OPCODES):
+                    pending.append(operand)
+        
+        if removed:
+            for block in function.blocks:
+                block.instructions = [
+                    instruction for instruction in block.instructions if instruction not in removed
+                ]
+    
+    def remove_incoming(self, phi, reachable):
+        """Remove de um phi as entradas vindas de blocos fora de reachable."""
+        kept = [(value, block) for value, block in zip(phi.operands, phi.targets) if block in reachable]
+        if len(kept) == len(phi.targets):
+            return
+        phi.drop_operands()
+        phi.operands = [value for value, _ in kept]
+        phi.targets = [block for _, block in kept]
+        for value in phi.operands:
+            value.add_use(phi)
     
-    def common_subexpression_elimination(self, code):
+    def common_subexpression_elimination(self, function):
+        """
+        Eliminação de subexpressões comuns: em cada bloco, uma instrução
+        sem efeitos colaterais igual a uma anterior (mesma operação, mesmo
+        tipo e mesmos operandos) é trocada pelo resultado da anterior.
         """
-        Eliminação de subexpressões comuns: identifica e elimina
-        cálculos redundantes.
+        for block in function.blocks:
+            available = {}
+            kept = []
+            for instruction in block.instructions:
+                if instruction.opcode in PURE_OPCODES:
+                    key = (instruction.opcode, instruction.type, instruction.predicate,
+                           tuple(self.operand_key(operand) for operand in instruction.operands))
+                    previous = available.get(key)
+                    if previous is not None:
+                        instruction.replace_all_uses_with(previous)
+                        instruction.drop_operands()
+                        continue
+                    available[key] = instruction
+                kept.append(instruction)
+            block.instructions = kept
+    
+    @staticmethod
+    def operand_key(operand):
         """
-        # Implementação simplificada
-        return code
+        Chave de um operando: constantes iguais têm a mesma chave, os demais
+        valores são comparados pela identidade. repr distingue 0.0 de -0.0 e
+        iguala os NaN.
+        """
+        if isinstance(operand, Constant):
+            value = operand.value
+            if operand.type == 'i1':
+                return (operand.type, bool(value))
+            return (operand.type, repr(value))
+        return id(operand)
 
 
 #################################################
@@ -2019,6 +6093,23 @@ def main():
     parser.add_argument('--dump-tokens', action='store_true', help='Mostrar tokens')
     parser.add_argument('--no-optimize', action='store_true', help='Desabilitar otimizações')
     parser.add_argument('-t', '--target', default='x86_64', help='Arquitetura alvo (default: x86_64)')
+    parser.add_argument('--lexer', choices=['scanner', 'classic'], default='scanner',
+                        help='Analisador léxico (default: scanner)')
+    parser.add_argument('--mmap', action='store_true',
+                        help='Mapear o arquivo de entrada em memória em vez de lê-lo (requer --lexer scanner)')
+    parser.add_argument('--recover', action='store_true',
+                        help='Continuar após erros de sintaxe e relatar todos de uma vez')
+    parser.add_argument('--no-cache', action='store_true', help='Não usar o cache de ASTs')
+    parser.add_argument('--cache-dir', default='.charcot_cache',
+                        help='Diretório do cache de ASTs (default: .charcot_cache)')
+    parser.add_argument('-I', '--module-path', action='append', default=[],
+                        help='Diretório de busca de módulos importados (pode ser repetido)')
+    parser.add_argument('--interactions',
+                        help='Base de interações medicamentosas (.csv ou .json) para resolver verify_interaction')
+    parser.add_argument('--allergens',
+                        help='Registro de alergênios (.json) para resolver verify_allergies')
+    parser.add_argument('--doses',
+                        help='Tabela de limites de dose (.csv ou .json) para resolver verify_dosage')
     
     args = parser.parse_args()
     
@@ -2028,10 +6119,18 @@ def main():
     if not input_file.endswith('.charcot'):
         print("Aviso: O arquivo de entrada não tem extensão .charcot")
     
+    if args.mmap and args.lexer != 'scanner':
+        print("Erro: --mmap requer --lexer scanner")
+        return 1
+    
     # Lê o arquivo de entrada
     try:
-        with open(input_file, 'r') as f:
-            source_code = f.read()
+        if args.mmap:
+            # O Scanner lê diretamente do arquivo mapeado, sem copiar o texto
+            source_code = map_source(input_file)
+        else:
+            with open(input_file, 'r') as f:
+                source_code = f.read()
     except FileNotFoundError:
         print(f"Erro: Arquivo {input_file} não encontrado")
         return 1
@@ -2042,42 +6141,111 @@ def main():
     if args.verbose:
         print(f"Compilando {input_file}...")
     
+    interactions = None
+    if args.interactions:
+        try:
+            interactions = InteractionDatabase.load(args.interactions)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Erro ao carregar a base de interações: {e}")
+            return 1
+    
+    allergens = None
+    if args.allergens:
+        try:
+            allergens = AllergenRegistry.load(args.allergens)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Erro ao carregar o registro de alergênios: {e}")
+            return 1
+    
+    doses = None
+    if args.doses:
+        try:
+            doses = DoseLimitTable.load(args.doses)
+        except (OSError, ValueError, KeyError, ImportError) as e:
+            print(f"Erro ao carregar a tabela de doses: {e}")
+            return 1
+    
     try:
-        # Fase 1: Análise léxica (Tokenização)
-        lexer = Lexer(source_code)
-        tokens = lexer.tokenize()
-        
-        if args.dump_tokens:
-            print("\n--- Tokens ---")
-            for token in tokens:
-                print(token)
+        # Cache de ASTs: com o mesmo código-fonte e a mesma versão do
+        # compilador, as fases 1 e 2 são substituídas pela leitura do cache
+        cache = None
+        ast = None
+        diagnostics = []
+        if not args.no_cache and not args.dump_tokens:
+            cache = ASTCache(args.cache_dir)
+            cache_key = ASTCache.source_hash(source_code)
+            ast = cache.load(cache_key)
+            if args.verbose:
+                print(f"Cache de AST: {cache.hits} acerto(s), {cache.misses} falta(s)")
         
-        # Fase 2: Análise sintática (Parsing)
-        parser = Parser(tokens)
-        ast = parser.parse()
+        if ast is None:
+            # Fase 1: Análise léxica (Tokenização)
+            lexer = Scanner(source_code) if args.lexer == 'scanner' else Lexer(source_code)
+            
+            if args.dump_tokens:
+                tokens = lexer.tokenize()
+                print("\n--- Tokens ---")
+                for token in tokens:
+                    print(token)
+            else:
+                # Os tokens são produzidos sob demanda, à medida que o parser avança
+                tokens = lexer.iter_tokens()
+            
+            # Fase 2: Análise sintática (Parsing)
+            parser = Parser(tokens, recover=args.recover)
+            ast = parser.parse()
+            diagnostics = parser.diagnostics
+            
+            if diagnostics:
+                # Modo de recuperação: a AST parcial segue para a análise semântica
+                print("\n--- Erros de Sintaxe ---")
+                for diagnostic in diagnostics:
+                    print(f"Erro de sintaxe: {diagnostic}")
+            elif cache is not None:
+                # Apenas ASTs completas são guardadas
+                try:
+                    cache.store(cache_key, ast)
+                except OSError as e:
+                    if args.verbose:
+                        print(f"Aviso: não foi possível gravar o cache de AST: {e}")
         
         if args.dump_ast:
             print("\n--- AST ---")
             print_ast(ast)  # Função para imprimir a AST (não implementada aqui)
         
-        # Fase 3: Análise semântica
-        semantic_analyzer = SemanticAnalyzer()
+        # Fase 3: Análise semântica. Os módulos importados são procurados no
+        # diretório do arquivo de entrada e nos informados com -I; as
+        # interfaces ficam no cache, salvo com --no-cache
+        module_loader = ModuleLoader(
+            [os.path.dirname(os.path.abspath(input_file))] + args.module_path,
+            None if args.no_cache else os.path.join(args.cache_dir, 'modules')
+        )
+        semantic_analyzer = SemanticAnalyzer(module_loader, interactions, allergens, doses)
         errors = semantic_analyzer.visit(ast)
         
+        if args.verbose and module_loader.modules:
+            print(f"Módulos: {module_loader.parsed} analisado(s), {module_loader.loaded} interface(s) lida(s)")
+        
         if errors:
             print("\n--- Erros Semânticos ---")
             for error in errors:
                 print(f"Erro: {error}")
             return 1
         
-        # Fase 4: Geração de código LLVM IR
+        if diagnostics:
+            return 1
+        
+        # Fase 4: Geração do IR
         code_generator = LLVMCodeGenerator()
-        llvm_code = code_generator.generate(ast)
+        module = code_generator.generate(ast)
         
-        # Fase 5: Otimização (opcional)
+        # Fase 5: Otimização (opcional), no próprio IR
         if not args.no_optimize:
-            optimizer = Optimizer(llvm_code)
-            llvm_code = optimizer.optimize()
+            optimizer = Optimizer(module)
+            optimizer.optimize()
+        
+        # O texto LLVM é escrito uma única vez, depois das otimizações
+        llvm_code = IRPrinter().print_module(module)
         
         if args.assembly:
             # Apenas gera o código LLVM IR
@@ -2108,709 +6276,187 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if isinstance(source_code, mmap.mmap):
+            source_code.close()
 
 
 def print_ast(node, indent=0):
     """Função auxiliar para imprimir a AST de forma legível."""
-    prefix = '  ' * indent
-    
-    if isinstance(node, Program):
-        print(f"{prefix}Program:")
-        for decl in node.declarations:
-            print_ast(decl, indent + 1)
-    
-    elif isinstance(node, ImportDeclaration):
-        print(f"{prefix}Import: {node.module_name}")
-    
-    elif isinstance(node, VariableDeclaration):
-        print(f"{prefix}Variable: {node.name} : {node.type_name or 'inferred'}")
-        if node.value:
-            print_ast(node.value, indent + 1)
-    
-    elif isinstance(node, PatientDeclaration):
-        print(f"{prefix}Patient: {node.name}")
-        for prop in node.properties:
-            print_ast(prop, indent + 1)
-    
-    elif isinstance(node, ProcedureDeclaration):
-        print(f"{prefix}Procedure: {node.name}")
-        print(f"{prefix}  Parameters:")
-        for param in node.parameters:
-            print_ast(param, indent + 2)
-        print(f"{prefix}  Body:")
-        print_ast(node.body, indent + 2)
+    ASTPrinter(indent).visit(node)
+
+
+class ASTPrinter(NodeVisitor):
+    """Imprime a AST de forma legível, um nó por linha, indentado pela profundidade."""
+    def __init__(self, indent=0):
+        self.indent = indent
     
-    elif isinstance(node, TreatmentDeclaration):
-        print(f"{prefix}Treatment: {node.name}")
-        print(f"{prefix}  Parameters:")
-        for param in node.parameters:
-            print_ast(param, indent + 2)
-        print(f"{prefix}  Body:")
-        print_ast(node.body, indent + 2)
+    def emit(self, text):
+        """Imprime uma linha no nível de indentação atual."""
+        print('  ' * self.indent + text)
     
-    elif isinstance(node, Parameter):
-        print(f"{prefix}Param: {node.name} : {node.type_name or 'any'}")
+    def child(self, node, levels=1):
+        """Visita node levels níveis abaixo do nó atual."""
+        self.indent += levels
+        yield node
+        self.indent -= levels
     
-    elif isinstance(node, BlockStatement):
-        print(f"{prefix}Block:")
-        for stmt in node.statements:
-            print_ast(stmt, indent + 1)
-    
-    elif isinstance(node, IfStatement):
-        print(f"{prefix}If:")
-        print(f"{prefix}  Condition:")
-        print_ast(node.condition, indent + 2)
-        print(f"{prefix}  Then:")
-        print_ast(node.if_body, indent + 2)
-        if node.else_body:
-            print(f"{prefix}  Else:")
-            print_ast(node.else_body, indent + 2)
-    
-    elif isinstance(node, WhileStatement):
-        print(f"{prefix}While:")
-        print(f"{prefix}  Condition:")
-        print_ast(node.condition, indent + 2)
-        print(f"{prefix}  Body:")
-        print_ast(node.body, indent + 2)
-    
-    elif isinstance(node, ForEachStatement):
-        print(f"{prefix}ForEach:")
-        print(f"{prefix}  Variable:")
-        print_ast(node.variable, indent + 2)
-        print(f"{prefix}  Collection:")
-        print_ast(node.collection, indent + 2)
-        print(f"{prefix}  Body:")
-        print_ast(node.body, indent + 2)
-    
-    elif isinstance(node, ClinicalPathStatement):
-        print(f"{prefix}ClinicalPath:")
-        print(f"{prefix}  Expression:")
-        print_ast(node.expression, indent + 2)
-        print(f"{prefix}  Cases:")
-        for case in node.cases:
-            print_ast(case, indent + 2)
+    def visit_Program(self, node):
+        self.emit("Program:")
+        for decl in node.declarations:
+            yield self.child(decl)
     
-    elif isinstance(node, CaseStatement):
-        print(f"{prefix}Case:")
-        print(f"{prefix}  Value:")
-        print_ast(node.value, indent + 2)
-        print(f"{prefix}  Body:")
-        print_ast(node.body, indent + 2)
+    def visit_ImportDeclaration(self, node):
+        self.emit(f"Import: {node.module_name}")
     
-    elif isinstance(node, ReturnStatement):
-        print(f"{prefix}Return:")
+    def visit_VariableDeclaration(self, node):
+        self.emit(f"Variable: {node.name} : {node.type_name or 'inferred'}")
         if node.value:
-            print_ast(node.value, indent + 1)
-    
-    elif isinstance(node, ExpressionStatement):
-        print(f"{prefix}Expression:")
-        print_ast(node.expression, indent + 1)
-    
-    elif isinstance(node, PrescribeStatement):
-        print(f"{prefix}Prescribe:")
-        print(f"{prefix}  Patient:")
-        print_ast(node.patient, indent + 2)
-        print(f"{prefix}  Medication:")
-        print_ast(node.medication, indent + 2)
-        print(f"{prefix}  Dose:")
-        print_ast(node.dose, indent + 2)
-        if node.instructions:
-            print(f"{prefix}  Instructions:")
-            print_ast(node.instructions, indent + 2)
-        if node.duration:
-            print(f"{prefix}  Duration:")
-            print_ast(node.duration, indent + 2)
-    
-    elif isinstance(node, BinaryOperation):
-        print(f"{prefix}Binary: {node.operator}")
-        print(f"{prefix}  Left:")
-        print_ast(node.left, indent + 2)
-        print(f"{prefix}  Right:")
-        print_ast(node.right, indent + 2)
-    
-    elif isinstance(node, UnaryOperation):
-        print(f"{prefix}Unary: {node.operator}")
-        print(f"{prefix}  Operand:")
-        print_ast(node.operand, indent + 2)
-    
-    elif isinstance(node, VariableReference):
-        print(f"{prefix}Variable: {node.name}")
-    
-    elif isinstance(node, PropertyAccess):
-        print(f"{prefix}Property Access: {node.property_name}")
-        print(f"{prefix}  Object:")
-        print_ast(node.object_expr, indent + 2)
-    
-    elif isinstance(node, FunctionCall):
-        print(f"{prefix}Function Call: {node.name}")
-        print(f"{prefix}  Arguments:")
-        for arg in node.arguments:
-            print_ast(arg, indent + 2)
-    
-    elif isinstance(node, MethodCall):
-        print(f"{prefix}Method Call: {node.method_name}")
-        print(f"{prefix}  Object:")
-        print_ast(node.object_expr, indent + 2)
-        print(f"{prefix}  Arguments:")
-        for arg in node.arguments:
-            print_ast(arg, indent + 2)
-    
-    elif isinstance(node, Literal):
-        print(f"{prefix}Literal ({node.literal_type}): {node.value}")
+            yield self.child(node.value)
     
-    elif isinstance(node, ArrayLiteral):
-        print(f"{prefix}Array:")
-        for elem in node.elements:
-            print_ast(elem, indent + 1)
-    
-    elif isinstance(node, ObjectLiteral):
-        print(f"{prefix}Object:")
+    def visit_PatientDeclaration(self, node):
+        self.emit(f"Patient: {node.name}")
         for prop in node.properties:
-            print_ast(prop, indent + 1)
-    
-    elif isinstance(node, PropertyAssignment):
-        print(f"{prefix}Property: {node.name} =")
-        print_ast(node.value, indent + 1)
+            yield self.child(prop)
     
-    else:
-        print(f"{prefix}Unknown node type: {type(node).__name__}")
-
-
-if __name__ == "__main__":
-    sys.exit(main())
-
-                
-    # Determina o tipo do campo
-    field_type = ["i8*", "i8*", "i32", "float", "float", "i8**"][field_index]  # [id, name, birth, weight, height, allergies]                
-    # Armazena o valor
-    self.emit(f"store {field_type} {prop_value_temp}, {field_type}* {field_ptr_temp}")
-    
-    def visit_ProcedureDeclaration(self, node):
-        """Gera código para declaração de procedimento."""
-        proc_name = node.name
-        
-        # Determina os tipos dos parâmetros
-        param_types = []
+    def visit_ProcedureDeclaration(self, node, kind="Procedure"):
+        self.emit(f"{kind}: {node.name}")
+        self.emit("  Parameters:")
         for param in node.parameters:
-            if param.type_name:
-                param_types.append(self.get_type_str(param.type_name))
-            else:
-                param_types.append("i8*")  # Tipo padrão
-        
-        # Cria a assinatura da função
-        params_str = ", ".join(param_types)
-        self.emit(f"define void @{proc_name}({params_str}) {{")
-        self.indent()
-        
-        # Salva o contexto anterior de variáveis e cria um novo
-        old_vars = self.vars.copy()
-        self.vars = {}
-        
-        # Aloca memória para os parâmetros e mapeia-os para variáveis locais
-        for i, param in enumerate(node.parameters):
-            param_name = param.name
-            param_type = param_types[i]
-            
-            # Aloca memória para o parâmetro
-            temp = self.fresh_temp()
-            self.emit(f"{temp} = alloca {param_type}")
-            
-            # Armazena o valor do parâmetro
-            self.emit(f"store {param_type} %{i}, {param_type}* {temp}")
-            
-            # Registra o parâmetro para uso posterior
-            self.vars[param_name] = (temp, param_type)
-        
-        # Gera código para o corpo do procedimento
-        self.visit(node.body)
-        
-        # Adiciona return void padrão se não houver return explícito
-        self.emit("ret void")
-        
-        # Restaura o contexto anterior de variáveis
-        self.vars = old_vars
-        
-        self.dedent()
-        self.emit("}")
-        self.emit("")
+            yield self.child(param, 2)
+        self.emit("  Body:")
+        yield self.child(node.body, 2)
     
     def visit_TreatmentDeclaration(self, node):
-        """Tratamentos são similares a procedimentos."""
-        self.visit_ProcedureDeclaration(node)
+        return self.visit_ProcedureDeclaration(node, "Treatment")
+    
+    def visit_Parameter(self, node):
+        self.emit(f"Param: {node.name} : {node.type_name or 'any'}")
     
     def visit_BlockStatement(self, node):
-        """Gera código para um bloco de declarações."""
-        # Salva o contexto anterior de variáveis (para escopo)
-        old_vars = self.vars.copy()
-        
-        # Gera código para cada declaração no bloco
+        self.emit("Block:")
         for stmt in node.statements:
-            self.visit(stmt)
-        
-        # Restaura o contexto anterior de variáveis
-        # Este é um escopo léxico simplificado - variáveis declaradas
-        # no bloco não estarão disponíveis fora dele
-        self.vars = old_vars
+            yield self.child(stmt)
     
     def visit_IfStatement(self, node):
-        """Gera código para declaração if/else."""
-        # Gera código para a condição
-        cond_temp = self.visit(node.condition)
-        
-        # Cria rótulos para os blocos then, else e continue
-        then_label = self.fresh_label()
-        else_label = self.fresh_label()
-        cont_label = self.fresh_label()
-        
-        # Branch condicional
-        self.emit(f"br i1 {cond_temp}, label %{then_label}, label %{else_label}")
-        
-        # Bloco 'then'
-        self.emit(f"{then_label}:")
-        self.visit(node.if_body)
-        self.emit(f"br label %{cont_label}")
-        
-        # Bloco 'else'
-        self.emit(f"{else_label}:")
+        self.emit("If:")
+        self.emit("  Condition:")
+        yield self.child(node.condition, 2)
+        self.emit("  Then:")
+        yield self.child(node.if_body, 2)
         if node.else_body:
-            self.visit(node.else_body)
-        self.emit(f"br label %{cont_label}")
-        
-        # Bloco de continuação
-        self.emit(f"{cont_label}:")
+            self.emit("  Else:")
+            yield self.child(node.else_body, 2)
     
     def visit_WhileStatement(self, node):
-        """Gera código para loop while."""
-        # Cria rótulos para os blocos de condição, corpo e saída
-        cond_label = self.fresh_label()
-        body_label = self.fresh_label()
-        exit_label = self.fresh_label()
-        
-        # Branch para a condição
-        self.emit(f"br label %{cond_label}")
-        
-        # Bloco de condição
-        self.emit(f"{cond_label}:")
-        cond_temp = self.visit(node.condition)
-        self.emit(f"br i1 {cond_temp}, label %{body_label}, label %{exit_label}")
-        
-        # Bloco do corpo
-        self.emit(f"{body_label}:")
-        self.visit(node.body)
-        self.emit(f"br label %{cond_label}")
-        
-        # Bloco de saída
-        self.emit(f"{exit_label}:")
+        self.emit("While:")
+        self.emit("  Condition:")
+        yield self.child(node.condition, 2)
+        self.emit("  Body:")
+        yield self.child(node.body, 2)
     
     def visit_ForEachStatement(self, node):
-        """Gera código para loop foreach."""
-        # Esta é uma implementação simplificada para arrays
-        # Uma implementação completa precisaria suportar diferentes tipos de coleções
-        
-        # Gera código para a coleção
-        collection_temp = self.visit(node.collection)
-        
-        # Obtém o tamanho da coleção (assumindo que é um array)
-        size_temp = self.fresh_temp()
-        self.emit(f"{size_temp} = call i32 @array_size(i8** {collection_temp})")
-        
-        # Inicializa o índice
-        index_temp = self.fresh_temp()
-        self.emit(f"{index_temp} = alloca i32")
-        self.emit(f"store i32 0, i32* {index_temp}")
-        
-        # Cria rótulos para os blocos de condição, corpo e saída
-        cond_label = self.fresh_label()
-        body_label = self.fresh_label()
-        exit_label = self.fresh_label()
-        
-        # Branch para a condição
-        self.emit(f"br label %{cond_label}")
-        
-        # Bloco de condição
-        self.emit(f"{cond_label}:")
-        current_index_temp = self.fresh_temp()
-        self.emit(f"{current_index_temp} = load i32, i32* {index_temp}")
-        
-        cond_temp = self.fresh_temp()
-        self.emit(f"{cond_temp} = icmp slt i32 {current_index_temp}, {size_temp}")
-        self.emit(f"br i1 {cond_temp}, label %{body_label}, label %{exit_label}")
-        
-        # Bloco do corpo
-        self.emit(f"{body_label}:")
-        
-        # Obtém o elemento atual
-        element_temp = self.fresh_temp()
-        self.emit(f"{element_temp} = call i8* @array_get(i8** {collection_temp}, i32 {current_index_temp})")
-        
-        # Se node.variable for uma declaração de variável, declaramos a variável
-        # Senão, assumimos que é uma referência a uma variável existente
-        if isinstance(node.variable, VariableDeclaration):
-            var_name = node.variable.name
-            var_type = self.get_type_str(node.variable.type_name) if node.variable.type_name else "i8*"
-            
-            var_temp = self.fresh_temp()
-            self.emit(f"{var_temp} = alloca {var_type}")
-            self.emit(f"store {var_type} {element_temp}, {var_type}* {var_temp}")
-            
-            self.vars[var_name] = (var_temp, var_type)
-        else:
-            var_name = node.variable.name
-            var_temp, var_type = self.vars.get(var_name, (None, "i8*"))
-            
-            if var_temp:
-                self.emit(f"store {var_type} {element_temp}, {var_type}* {var_temp}")
-        
-        # Visita o corpo do loop
-        self.visit(node.body)
-        
-        # Incrementa o índice
-        self.emit(f"{current_index_temp} = add i32 {current_index_temp}, 1")
-        self.emit(f"store i32 {current_index_temp}, i32* {index_temp}")
-        
-        # Volta para a condição
-        self.emit(f"br label %{cond_label}")
-        
-        # Bloco de saída
-        self.emit(f"{exit_label}:")
+        self.emit("ForEach:")
+        self.emit("  Variable:")
+        yield self.child(node.variable, 2)
+        self.emit("  Collection:")
+        yield self.child(node.collection, 2)
+        self.emit("  Body:")
+        yield self.child(node.body, 2)
     
     def visit_ClinicalPathStatement(self, node):
-        """Gera código para declaração clinical_path (switch/case)."""
-        # Gera código para a expressão
-        expr_temp = self.visit(node.expression)
-        
-        # Cria um rótulo para o bloco de saída
-        exit_label = self.fresh_label()
-        
-        # Gera código para cada caso
-        case_labels = []
+        self.emit("ClinicalPath:")
+        self.emit("  Expression:")
+        yield self.child(node.expression, 2)
+        self.emit("  Cases:")
         for case in node.cases:
-            case_labels.append(self.fresh_label())
-        
-        # Para cada caso, compara com a expressão
-        for i, case in enumerate(node.cases):
-            case_value_temp = self.visit(case.value)
-            
-            # Compara o valor do caso com a expressão
-            cmp_temp = self.fresh_temp()
-            self.emit(f"{cmp_temp} = call i1 @values_equal(i8* {expr_temp}, i8* {case_value_temp})")
-            
-            # Se for igual, vai para o bloco do caso
-            next_label = self.fresh_label() if i < len(node.cases) - 1 else exit_label
-            self.emit(f"br i1 {cmp_temp}, label %{case_labels[i]}, label %{next_label}")
-            
-            # Bloco do caso
-            self.emit(f"{case_labels[i]}:")
-            self.visit(case.body)
-            self.emit(f"br label %{exit_label}")
-            
-            if i < len(node.cases) - 1:
-                self.emit(f"{next_label}:")
-        
-        # Bloco de saída
-        self.emit(f"{exit_label}:")
+            yield self.child(case, 2)
+    
+    def visit_CaseStatement(self, node):
+        self.emit("Case:")
+        self.emit("  Value:")
+        yield self.child(node.value, 2)
+        self.emit("  Body:")
+        yield self.child(node.body, 2)
     
     def visit_ReturnStatement(self, node):
-        """Gera código para declaração return."""
+        self.emit("Return:")
         if node.value:
-            value_temp = self.visit(node.value)
-            # O tipo de retorno dependeria do contexto da função
-            # Para simplificar, assumimos que os procedimentos são void
-            self.emit(f"ret void")
-        else:
-            self.emit("ret void")
+            yield self.child(node.value)
     
     def visit_ExpressionStatement(self, node):
-        """Gera código para uma declaração de expressão."""
-        self.visit(node.expression)
+        self.emit("Expression:")
+        yield self.child(node.expression)
     
     def visit_PrescribeStatement(self, node):
-        """Gera código para declaração prescribe."""
-        # Gera código para os argumentos
-        patient_temp = self.visit(node.patient)
-        medication_temp = self.visit(node.medication)
-        dose_temp = self.visit(node.dose)
-        
-        instructions_temp = None
+        self.emit("Prescribe:")
+        self.emit("  Patient:")
+        yield self.child(node.patient, 2)
+        self.emit("  Medication:")
+        yield self.child(node.medication, 2)
+        self.emit("  Dose:")
+        yield self.child(node.dose, 2)
         if node.instructions:
-            instructions_temp = self.visit(node.instructions)
-        else:
-            # String vazia como padrão
-            instructions_temp = '""'
-        
-        duration_temp = None
+            self.emit("  Instructions:")
+            yield self.child(node.instructions, 2)
         if node.duration:
-            duration_temp = self.visit(node.duration)
-        else:
-            # Duração padrão (30 dias)
-            duration_temp = "30"
-        
-        # Chama a função de prescrição
-        self.emit(f"call void @prescribe(%Patient* {patient_temp}, %Medication* {medication_temp}, float {dose_temp}, i8* {instructions_temp}, i32 {duration_temp})")
+            self.emit("  Duration:")
+            yield self.child(node.duration, 2)
     
     def visit_BinaryOperation(self, node):
-        """Gera código para operações binárias."""
-        left_temp = self.visit(node.left)
-        right_temp = self.visit(node.right)
-        
-        result_temp = self.fresh_temp()
-        
-        # Tipo de operação
-        if node.operator in ['+', '-', '*', '/']:
-            # Operações aritméticas
-            op_map = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'fdiv'}
-            self.emit(f"{result_temp} = {op_map[node.operator]} float {left_temp}, {right_temp}")
-        
-        elif node.operator in ['>', '<', '>=', '<=', '==', '!=']:
-            # Operações de comparação
-            op_map = {'>': 'sgt', '<': 'slt', '>=': 'sge', '<=': 'sle', '==': 'eq', '!=': 'ne'}
-            self.emit(f"{result_temp} = fcmp {op_map[node.operator]} float {left_temp}, {right_temp}")
-        
-        elif node.operator in ['&&', '||']:
-            # Operações lógicas
-            if node.operator == '&&':
-                # a && b => a ? b : false
-                temp1 = self.fresh_temp()
-                label1 = self.fresh_label()
-                label2 = self.fresh_label()
-                label3 = self.fresh_label()
-                
-                self.emit(f"br i1 {left_temp}, label %{label1}, label %{label2}")
-                self.emit(f"{label1}:")
-                self.emit(f"{temp1} = {right_temp}")
-                self.emit(f"br label %{label3}")
-                self.emit(f"{label2}:")
-                self.emit(f"{temp1} = false")
-                self.emit(f"br label %{label3}")
-                self.emit(f"{label3}:")
-                self.emit(f"{result_temp} = phi i1 [ {temp1}, %{label1} ], [ false, %{label2} ]")
-            
-            else:  # '||'
-                # a || b => a ? true : b
-                temp1 = self.fresh_temp()
-                label1 = self.fresh_label()
-                label2 = self.fresh_label()
-                label3 = self.fresh_label()
-                
-                self.emit(f"br i1 {left_temp}, label %{label1}, label %{label2}")
-                self.emit(f"{label1}:")
-                self.emit(f"{temp1} = true")
-                self.emit(f"br label %{label3}")
-                self.emit(f"{label2}:")
-                self.emit(f"{temp1} = {right_temp}")
-                self.emit(f"br label %{label3}")
-                self.emit(f"{label3}:")
-                self.emit(f"{result_temp} = phi i1 [ true, %{label1} ], [ {temp1}, %{label2} ]")
-        
-        elif node.operator == '=':
-            # Atribuição
-            # Assumindo que left_temp é um ponteiro para o lado esquerdo
-            self.emit(f"store float {right_temp}, float* {left_temp}")
-            result_temp = right_temp
-        
-        return result_temp
+        self.emit(f"Binary: {node.operator}")
+        self.emit("  Left:")
+        yield self.child(node.left, 2)
+        self.emit("  Right:")
+        yield self.child(node.right, 2)
     
     def visit_UnaryOperation(self, node):
-        """Gera código para operações unárias."""
-        operand_temp = self.visit(node.operand)
-        
-        result_temp = self.fresh_temp()
-        
-        if node.operator == '-':
-            self.emit(f"{result_temp} = fneg float {operand_temp}")
-        elif node.operator == '!':
-            self.emit(f"{result_temp} = xor i1 {operand_temp}, true")
-        
-        return result_temp
+        self.emit(f"Unary: {node.operator}")
+        self.emit("  Operand:")
+        yield self.child(node.operand, 2)
     
     def visit_VariableReference(self, node):
-        """Gera código para referência a variável."""
-        var_name = node.name
-        
-        if var_name in self.vars:
-            var_temp, var_type = self.vars[var_name]
-            
-            # Carrega o valor da variável
-            result_temp = self.fresh_temp()
-            self.emit(f"{result_temp} = load {var_type}, {var_type}* {var_temp}")
-            
-            return result_temp
-        else:
-            print(f"Warning: Variable {var_name} not found")
-            return "null"
+        self.emit(f"Variable: {node.name}")
     
     def visit_PropertyAccess(self, node):
-        """Gera código para acesso a propriedade."""
-        obj_temp = self.visit(node.object_expr)
-        prop_name = node.property_name
-        
-        # Aqui seria necessário conhecer o tipo do objeto para
-        # determinar o índice correto do campo
-        # Para simplificar, assumimos que é um paciente
-        
-        field_index = {
-            "id": 0,
-            "name": 1,
-            "birth": 2,
-            "weight": 3,
-            "height": 4,
-            "allergies": 5
-        }.get(prop_name, -1)
-        
-        if field_index >= 0:
-            # Acessa o campo
-            field_ptr_temp = self.fresh_temp()
-            self.emit(f"{field_ptr_temp} = getelementptr %Patient, %Patient* {obj_temp}, i32 0, i32 {field_index}")
-            
-            # Determina o tipo do campo
-            field_type = [
-                "i8*",   # id
-                "i8*",   # name
-                "i32",   # birth
-                "float", # weight
-                "float", # height
-                "i8**"   # allergies
-            ][field_index]
-            
-            # Carrega o valor do campo
-            result_temp = self.fresh_temp()
-            self.emit(f"{result_temp} = load {field_type}, {field_type}* {field_ptr_temp}")
-            
-            return result_temp
-        else:
-            print(f"Warning: Property {prop_name} not found")
-            return "null"
+        self.emit(f"Property Access: {node.property_name}")
+        self.emit("  Object:")
+        yield self.child(node.object_expr, 2)
     
     def visit_FunctionCall(self, node):
-        """Gera código para chamada de função."""
-        # Gera código para os argumentos
-        arg_temps = []
+        self.emit(f"Function Call: {node.name}")
+        self.emit("  Arguments:")
         for arg in node.arguments:
-            arg_temp = self.visit(arg)
-            arg_temps.append(arg_temp)
-        
-        # Chama a função
-        result_temp = self.fresh_temp()
-        
-        # O tipo de retorno depende da função
-        # Para simplificar, assumimos void
-        func_name = node.name
-        arg_types_str = ", ".join(["i8*"] * len(arg_temps))  # Assumindo i8* para todos os argumentos
-        args_str = ", ".join([f"i8* {arg}" for arg in arg_temps])
-        
-        self.emit(f"{result_temp} = call i8* @{func_name}({args_str})")
-        
-        return result_temp
+            yield self.child(arg, 2)
     
     def visit_MethodCall(self, node):
-        """Gera código para chamada de método."""
-        # Similar à chamada de função, mas com o objeto como primeiro argumento
-        obj_temp = self.visit(node.object_expr)
-        
-        # Gera código para os argumentos
-        arg_temps = [obj_temp]  # O objeto é o primeiro argumento
+        self.emit(f"Method Call: {node.method_name}")
+        self.emit("  Object:")
+        yield self.child(node.object_expr, 2)
+        self.emit("  Arguments:")
         for arg in node.arguments:
-            arg_temp = self.visit(arg)
-            arg_temps.append(arg_temp)
-        
-        # Chama o método
-        result_temp = self.fresh_temp()
-        
-        # O nome do método é prefixado com o tipo do objeto
-        # Para simplificar, assumimos que é um paciente
-        method_name = f"Patient_{node.method_name}"
-        
-        # Tipos e argumentos
-        arg_types = ["i8*"] * len(arg_temps)  # Assumindo i8* para todos os argumentos
-        arg_types_str = ", ".join(arg_types)
-        args_str = ", ".join([f"{t} {a}" for t, a in zip(arg_types, arg_temps)])
-        
-        self.emit(f"{result_temp} = call i8* @{method_name}({args_str})")
-        
-        return result_temp
+            yield self.child(arg, 2)
     
     def visit_Literal(self, node):
-        """Gera código para literais."""
-        literal_type = node.literal_type
-        value = node.value
-        
-        result_temp = self.fresh_temp()
-        
-        if literal_type == "number":
-            # Números são tratados como float para simplificar
-            self.emit(f"{result_temp} = {value}")
-        
-        elif literal_type == "string":
-            # Strings são ponteiros para arrays de caracteres
-            str_const = f"@str{len(self.buffer)}"
-            str_len = len(value) + 1  # +1 para o terminador null
-            
-            # Define a string constante
-            self.emit(f"{str_const} = private constant [{str_len} x i8] c\"{value}\\00\"")
-            
-            # Obtém um ponteiro para a string
-            self.emit(f"{result_temp} = getelementptr [{str_len} x i8], [{str_len} x i8]* {str_const}, i32 0, i32 0")
-        
-        elif literal_type == "date":
-            # Datas são representadas como timestamps Unix (i32)
-            # Para simplificar, não convertemos a data para timestamp
-            self.emit(f"{result_temp} = call i32 @date_to_timestamp(i8* {value})")
-        
-        elif literal_type == "measurement":
-            # Medições são tratadas como float para simplificar
-            # Na realidade, precisaríamos extrair o valor numérico e a unidade
-            measurement_value = "".join(c for c in value if c.isdigit() or c == '.')
-            measurement_value = float(measurement_value) if measurement_value else 0.0
-            
-            self.emit(f"{result_temp} = {measurement_value}")
-        
-        else:
-            # Tipo desconhecido
-            self.emit(f"{result_temp} = 0")
-        
-        return result_temp
+        self.emit(f"Literal ({node.literal_type}): {node.value}")
     
     def visit_ArrayLiteral(self, node):
-        """Gera código para literais de array."""
-        # Aloca memória para o array
-        array_size = len(node.elements)
-        
-        # Cria um array de ponteiros
-        array_temp = self.fresh_temp()
-        self.emit(f"{array_temp} = call i8** @create_array(i32 {array_size})")
-        
-        # Preenche o array com os elementos
-        for i, element in enumerate(node.elements):
-            element_temp = self.visit(element)
-            
-            # Armazena o elemento no array
-            self.emit(f"call void @array_set(i8** {array_temp}, i32 {i}, i8* {element_temp})")
-        
-        return array_temp
+        self.emit("Array:")
+        for elem in node.elements:
+            yield self.child(elem)
     
     def visit_ObjectLiteral(self, node):
-        """Gera código para literais de objeto."""
-        # Aloca memória para o objeto
-        # Para simplificar, assumimos que é um paciente
-        obj_temp = self.fresh_temp()
-        self.emit(f"{obj_temp} = call %Patient* @create_patient()")
-        
-        # Inicializa os campos do objeto com as propriedades fornecidas
+        self.emit("Object:")
         for prop in node.properties:
-            prop_name = prop.name
-            prop_value_temp = self.visit(prop.value)
-            
-            # Obtém o campo correto com base no nome da propriedade
-            field_index = {
-                "id": 0,
-                "name": 1,
-                "birth": 2,
-                "weight": 3,
-                "height": 4,
-                "allergies": 5
-            }.get(prop_name, -1)
-            
-            if field_index >= 0:
-                # Acessa o campo
-                field_ptr_temp = self.fresh_temp()
-                self.emit(f"{field_ptr_temp} = getelementptr %Patient, %Patient* {obj_temp}, i32 0, i32 {field_index}")
+            yield self.child(prop)
+    
+    def visit_PropertyAssignment(self, node):
+        self.emit(f"Property: {node.name} =")
+        yield self.child(node.value)
+    
+    def generic_visit(self, node):
+        self.emit(f"Unknown node type: {type(node).__name__}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
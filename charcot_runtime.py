@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Biblioteca de execução da linguagem Charcot.
+
+Contém as bases clínicas consultadas pelas funções médicas integradas
+(verify_interaction, verify_allergies, verify_dosage). São usadas pelos
+serviços que executam os programas compilados e pelo próprio compilador,
+que resolve em tempo de compilação as chamadas com nomes de medicamentos
+literais.
+"""
+
+import os
+import csv
+import json
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Apenas a tabela de doses (DoseLimitTable) requer NumPy
+    np = None
+
+
+def normalize_name(name: str) -> str:
+    """Forma canônica de um nome: espaços simples e letras minúsculas."""
+    return ' '.join(name.split()).casefold()
+
+
+#################################################
+# INTERAÇÕES MEDICAMENTOSAS
+#################################################
+
+# Gravidade atribuída a interações sem gravidade informada
+DEFAULT_SEVERITY = 'unspecified'
+
+class InteractionDatabase:
+    """
+    Base local de interações medicamentosas.
+    
+    Os nomes dos medicamentos são internados em ids inteiros, atribuídos em
+    ordem alfabética: a mesma base, carregada de novo, produz os mesmos ids,
+    de modo que um id resolvido pelo compilador vale na execução. As
+    interações ficam em listas de adjacência ordenadas (offsets/partners,
+    como numa matriz esparsa CSR), com a gravidade de cada par em
+    severities, e em partner_sets, o conjunto de parceiros de cada
+    medicamento. Verificar um medicamento contra a lista de um paciente é
+    a interseção desse conjunto com os ids da lista, sem percorrer a base.
+    """
+    def __init__(self, interactions: Iterable[Tuple[str, str, Optional[str]]]):
+        pairs: Dict[Tuple[str, str], str] = {}
+        for first, second, severity in interactions:
+            first, second = normalize_name(first), normalize_name(second)
+            if first == second:
+                continue
+            severity = normalize_name(severity) if severity else DEFAULT_SEVERITY
+            pairs[(first, second)] = severity
+            pairs[(second, first)] = severity
+        
+        self.names: List[str] = sorted({first for first, _ in pairs})
+        self.drug_ids: Dict[str, int] = {name: drug_id for drug_id, name in enumerate(self.names)}
+        self.severity_names: List[str] = sorted(set(pairs.values()))
+        severity_ids = {name: index for index, name in enumerate(self.severity_names)}
+        
+        adjacency: List[List[Tuple[int, int]]] = [[] for _ in self.names]
+        drug_ids = self.drug_ids
+        for (first, second), severity in pairs.items():
+            adjacency[drug_ids[first]].append((drug_ids[second], severity_ids[severity]))
+        
+        self.offsets = array('I', [0])
+        self.partners = array('I')
+        self.severities = array('B')
+        for neighbours in adjacency:
+            neighbours.sort()
+            self.partners.extend(partner for partner, _ in neighbours)
+            self.severities.extend(severity for _, severity in neighbours)
+            self.offsets.append(len(self.partners))
+        
+        self.partner_sets: List[frozenset] = [
+            frozenset(self.partners[self.offsets[drug_id]:self.offsets[drug_id + 1]])
+            for drug_id in range(len(self.names))
+        ]
+    
+    def __len__(self):
+        """Número de pares de medicamentos que interagem."""
+        return len(self.partners) // 2
+    
+    @classmethod
+    def load(cls, path) -> 'InteractionDatabase':
+        """Carrega a base de um arquivo .csv ou .json, conforme a extensão."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return cls.from_csv(path)
+        if extension == '.json':
+            return cls.from_json(path)
+        raise ValueError(f"Formato de base de interações desconhecido: {path}")
+    
+    @classmethod
+    def from_csv(cls, path) -> 'InteractionDatabase':
+        """Lê um CSV com as colunas drug_a, drug_b e, opcionalmente, severity."""
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = csv.DictReader(f)
+            return cls((row['drug_a'], row['drug_b'], row.get('severity')) for row in rows)
+    
+    @classmethod
+    def from_json(cls, path) -> 'InteractionDatabase':
+        """
+        Lê um JSON com uma lista de objetos {"drug_a", "drug_b", "severity"},
+        diretamente ou na chave "interactions".
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data['interactions']
+        return cls((item['drug_a'], item['drug_b'], item.get('severity')) for item in data)
+    
+    def drug_id(self, name) -> Optional[int]:
+        """Id do medicamento, ou None se ele não tiver interações na base."""
+        return self.drug_ids.get(normalize_name(name))
+    
+    def medication_ids(self, medications: Iterable[str]) -> frozenset:
+        """
+        Ids dos medicamentos de uma lista que constam da base. O resultado
+        pode ser guardado e reutilizado em todas as verificações do paciente.
+        """
+        drug_ids = self.drug_ids
+        return frozenset(
+            drug_id for drug_id in map(drug_ids.get, map(normalize_name, medications))
+            if drug_id is not None
+        )
+    
+    def severity(self, first_id, second_id) -> Optional[str]:
+        """Gravidade da interação entre dois ids, por busca binária na adjacência; None se não houver."""
+        start, stop = self.offsets[first_id], self.offsets[first_id + 1]
+        index = bisect_left(self.partners, second_id, start, stop)
+        if index < stop and self.partners[index] == second_id:
+            return self.severity_names[self.severities[index]]
+        return None
+    
+    def interacting_ids(self, drug_id, medication_ids) -> frozenset:
+        """Ids de medication_ids que interagem com drug_id."""
+        return self.partner_sets[drug_id].intersection(medication_ids)
+    
+    def check(self, medications, drug) -> List[Tuple[str, str]]:
+        """
+        Interações de drug com os medicamentos de uma lista (de nomes ou de
+        ids já internados), como pares (medicamento, gravidade) em ordem
+        alfabética. Um nome ou id fora da base não tem interações.
+        """
+        drug_id = self.drug_id(drug) if isinstance(drug, str) else drug
+        if drug_id is None or not 0 <= drug_id < len(self.names):
+            return []
+        if not isinstance(medications, frozenset):
+            medications = self.medication_ids(medications)
+        return [
+            (self.names[partner], self.severity(drug_id, partner))
+            for partner in sorted(self.interacting_ids(drug_id, medications))
+        ]
+    
+    def verify_interaction(self, medications, drug) -> bool:
+        """Implementação de verify_interaction: True se drug não interage com nenhum dos medicamentos."""
+        drug_id = self.drug_id(drug) if isinstance(drug, str) else drug
+        if drug_id is None or not 0 <= drug_id < len(self.names):
+            return True
+        if not isinstance(medications, frozenset):
+            medications = self.medication_ids(medications)
+        return self.partner_sets[drug_id].isdisjoint(medications)
+
+
+#################################################
+# ALERGIAS E REATIVIDADE CRUZADA
+#################################################
+
+# Registro padrão: classes de medicamentos com seus membros, pares de classes
+# com reatividade cruzada e nomes alternativos
+DEFAULT_ALLERGEN_FAMILIES = {
+    'penicillins': ['penicilina', 'amoxicilina', 'ampicilina', 'oxacilina', 'piperacilina'],
+    'cephalosporins': ['cefalexina', 'cefazolina', 'cefuroxima', 'ceftriaxona', 'cefepima'],
+    'carbapenems': ['meropenem', 'imipenem', 'ertapenem'],
+    'sulfonamides': ['sulfametoxazol', 'sulfadiazina'],
+    'nsaids': ['ácido acetilsalicílico', 'ibuprofeno', 'diclofenaco', 'naproxeno'],
+    'ace_inhibitors': ['enalapril', 'captopril', 'lisinopril'],
+}
+DEFAULT_CROSS_REACTIVITY = [
+    ('penicillins', 'cephalosporins'),
+    ('penicillins', 'carbapenems'),
+]
+DEFAULT_ALLERGEN_ALIASES = {
+    'penicilinas': 'penicillins',
+    'cefalosporinas': 'cephalosporins',
+    'sulfas': 'sulfonamides',
+    'aines': 'nsaids',
+    'aas': 'ácido acetilsalicílico',
+    'iecas': 'ace_inhibitors',
+}
+
+class AllergenRegistry:
+    """
+    Registro de alergênios: medicamentos, classes de medicamentos e outras
+    substâncias, cada um internado num bit, em ordem alfabética.
+    
+    A lista de alergias de um paciente vira uma máscara (allergy_mask) com o
+    bit de cada alergênio e, para medicamentos, os das suas classes; cada
+    medicamento tem uma máscara (drug_mask) com o seu bit, os das suas
+    classes e os das classes com reatividade cruzada com elas. Verificar
+    uma prescrição é um único AND entre as duas máscaras. As máscaras são
+    inteiros de width bits; to_words as converte nas words palavras de 64
+    bits usadas pelo código compilado.
+    """
+    def __init__(self, families=None, cross_reactivity=(), aliases=None, allergens=()):
+        families = {
+            normalize_name(family): {normalize_name(member) for member in members}
+            for family, members in (families or {}).items()
+        }
+        self.classes: Dict[str, List[str]] = {}  # medicamento -> classes
+        for family, members in families.items():
+            for member in members:
+                self.classes.setdefault(member, []).append(family)
+        
+        self.names: List[str] = sorted(
+            set(families) | set(self.classes) | {normalize_name(name) for name in allergens}
+        )
+        self.allergen_ids: Dict[str, int] = {name: index for index, name in enumerate(self.names)}
+        self.aliases: Dict[str, str] = {
+            normalize_name(alias): normalize_name(name) for alias, name in (aliases or {}).items()
+        }
+        self.width = len(self.names)
+        self.words = (self.width + 63) // 64
+        
+        related: Dict[str, set] = {family: {family} for family in families}
+        for first, second in cross_reactivity:
+            first, second = normalize_name(first), normalize_name(second)
+            for family in (first, second):
+                if family not in related:
+                    raise ValueError(f"Reatividade cruzada com a classe desconhecida '{family}'")
+            related[first].add(second)
+            related[second].add(first)
+        
+        ids = self.allergen_ids
+        self.allergen_masks: Dict[str, int] = {}
+        self.drug_masks: Dict[str, int] = {}
+        for name in self.names:
+            own_classes = self.classes.get(name, ())
+            mask = 1 << ids[name]
+            for family in own_classes:
+                mask |= 1 << ids[family]
+            self.allergen_masks[name] = mask
+            for family in own_classes:
+                for reactive in related[family]:
+                    mask |= 1 << ids[reactive]
+            self.drug_masks[name] = mask
+    
+    @classmethod
+    def default(cls) -> 'AllergenRegistry':
+        """Registro com as famílias padrão (penicilinas/cefalosporinas, sulfonamidas...)."""
+        return cls(DEFAULT_ALLERGEN_FAMILIES, DEFAULT_CROSS_REACTIVITY, DEFAULT_ALLERGEN_ALIASES)
+    
+    @classmethod
+    def load(cls, path) -> 'AllergenRegistry':
+        """
+        Carrega o registro de um JSON com as chaves families (classe ->
+        membros), cross_reactivity (pares de classes), aliases (nome ->
+        alergênio) e allergens (outras substâncias), todas opcionais.
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('families'), data.get('cross_reactivity', ()),
+                   data.get('aliases'), data.get('allergens', ()))
+    
+    def canonical(self, name) -> Optional[str]:
+        """Nome do alergênio no registro, resolvendo nomes alternativos; None se não constar."""
+        name = normalize_name(name)
+        name = self.aliases.get(name, name)
+        return name if name in self.allergen_ids else None
+    
+    def allergy_mask(self, allergies: Iterable[str]) -> int:
+        """Máscara da lista de alergias de um paciente; nomes fora do registro são ignorados."""
+        mask = 0
+        masks = self.allergen_masks
+        for allergy in allergies:
+            name = self.canonical(allergy)
+            if name is not None:
+                mask |= masks[name]
+        return mask
+    
+    def drug_mask(self, drug) -> int:
+        """Máscara dos alergênios que contraindicam o medicamento; 0 se ele não constar do registro."""
+        name = self.canonical(drug)
+        return self.drug_masks[name] if name is not None else 0
+    
+    def to_words(self, mask) -> Tuple[int, ...]:
+        """A máscara em words palavras de 64 bits, da menos para a mais significativa."""
+        return tuple((mask >> (64 * index)) & 0xFFFFFFFFFFFFFFFF for index in range(self.words))
+    
+    def verify_allergies(self, allergies, drug) -> bool:
+        """
+        Implementação de verify_allergies: True se o paciente não tem alergia
+        a drug nem a uma classe com reatividade cruzada. allergies é a lista
+        de nomes ou a máscara já calculada por allergy_mask, e drug é o nome
+        ou a máscara de drug_mask. Com as duas listas de nomes, alergias fora
+        do registro ainda são comparadas pelo nome.
+        """
+        drug_mask = drug if isinstance(drug, int) else self.drug_mask(drug)
+        if isinstance(allergies, int) or isinstance(drug, int):
+            if not isinstance(allergies, int):
+                allergies = self.allergy_mask(allergies)
+            return not allergies & drug_mask
+        if self.allergy_mask(allergies) & drug_mask:
+            return False
+        drug = normalize_name(drug)
+        return all(normalize_name(allergy) != drug for allergy in allergies)
+
+
+#################################################
+# LIMITES DE DOSE
+#################################################
+
+# Colunas de uma faixa da tabela de doses: idade em anos, peso em kg, doses em mg
+DOSE_BAND_FIELDS = (
+    'min_age', 'max_age', 'min_weight', 'max_weight',
+    'min_mg_per_kg', 'max_mg_per_kg', 'min_dose', 'max_dose',
+)
+MIN_AGE, MAX_AGE, MIN_WEIGHT, MAX_WEIGHT, MIN_MG_PER_KG, MAX_MG_PER_KG, MIN_DOSE, MAX_DOSE = range(8)
+
+class DoseLimitTable:
+    """
+    Tabela de limites de dose por medicamento, em faixas de idade e peso.
+    
+    Cada faixa vale para idades em [min_age, max_age) e pesos em
+    [min_weight, max_weight) e limita a dose por kg (min/max_mg_per_kg) e
+    em valor absoluto (min/max_dose); limites omitidos não restringem e,
+    se mais de uma faixa servir, vale a primeira da tabela. Os nomes são
+    internados em ids em ordem alfabética, como na InteractionDatabase.
+    
+    As faixas ficam num array NumPy (medicamentos x faixas x campos),
+    completado com faixas vazias (NaN) até o maior número de faixas de um
+    medicamento, mais uma linha vazia ao fim para os ids fora da tabela
+    (-1 e os demais). check_batch verifica uma enfermaria inteira numa única
+    passada sobre a cópia campo a campo desse array (fields), que reúne
+    só os campos usados em cada etapa; verify_dosage percorre as faixas de
+    um medicamento na cópia em listas (band_lists), sem o custo de montar
+    arrays para uma única prescrição.
+    """
+    def __init__(self, bands: Iterable[Tuple[str, Dict[str, Optional[float]]]]):
+        if np is None:
+            raise ImportError("A tabela de doses requer NumPy (pip install numpy)")
+        
+        by_drug: Dict[str, List[List[float]]] = {}
+        for drug, limits in bands:
+            by_drug.setdefault(normalize_name(drug), []).append(
+                [self.bound(limits.get(field)) for field in DOSE_BAND_FIELDS]
+            )
+        
+        self.names: List[str] = sorted(by_drug)
+        self.drug_ids: Dict[str, int] = {name: drug_id for drug_id, name in enumerate(self.names)}
+        
+        width = max((len(drug_bands) for drug_bands in by_drug.values()), default=1)
+        self.bands = np.full((len(self.names) + 1, width, len(DOSE_BAND_FIELDS)), np.nan)
+        for drug_id, name in enumerate(self.names):
+            drug_bands = np.array(by_drug[name])
+            # Faixas de idade e peso sem limite valem para qualquer paciente
+            for field, open_bound in ((MIN_AGE, -np.inf), (MAX_AGE, np.inf),
+                                      (MIN_WEIGHT, -np.inf), (MAX_WEIGHT, np.inf)):
+                column = drug_bands[:, field]
+                column[np.isnan(column)] = open_bound
+            self.bands[drug_id, :len(drug_bands)] = drug_bands
+        self.fields = np.ascontiguousarray(self.bands.transpose(2, 0, 1))
+        self.band_lists: List[List[List[float]]] = self.bands.tolist()
+    
+    def __len__(self):
+        """Número de medicamentos na tabela."""
+        return len(self.names)
+    
+    @staticmethod
+    def bound(value) -> float:
+        """Limite lido da tabela; vazio ou ausente é NaN (sem limite)."""
+        if value is None or value == '':
+            return float('nan')
+        return float(value)
+    
+    @classmethod
+    def load(cls, path) -> 'DoseLimitTable':
+        """Carrega a tabela de um arquivo .csv ou .json, conforme a extensão."""
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            return cls.from_csv(path)
+        if extension == '.json':
+            return cls.from_json(path)
+        raise ValueError(f"Formato de tabela de doses desconhecido: {path}")
+    
+    @classmethod
+    def from_csv(cls, path) -> 'DoseLimitTable':
+        """Lê um CSV com a coluna drug e as colunas de DOSE_BAND_FIELDS, uma faixa por linha."""
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls((row['drug'], row) for row in csv.DictReader(f))
+    
+    @classmethod
+    def from_json(cls, path) -> 'DoseLimitTable':
+        """
+        Lê um JSON com uma lista de faixas {"drug", "min_age", ...},
+        diretamente ou na chave "doses".
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data['doses']
+        return cls((item['drug'], item) for item in data)
+    
+    def drug_id(self, name) -> Optional[int]:
+        """Id do medicamento, ou None se ele não constar da tabela."""
+        return self.drug_ids.get(normalize_name(name))
+    
+    def ids(self, drugs: Iterable[str]) -> 'np.ndarray':
+        """Ids de uma lista de nomes para check_batch; -1 para os que não constam da tabela."""
+        drug_ids = self.drug_ids
+        return np.fromiter(
+            (drug_ids.get(normalize_name(name), -1) for name in drugs), dtype=np.intp
+        )
+    
+    def dose_range(self, drug_id) -> Tuple[float, float]:
+        """
+        Menor e maior dose (mg) aceitas para o medicamento em alguma faixa,
+        considerando os limites por kg nos extremos de peso da faixa.
+        Limites abertos são -inf e inf.
+        """
+        bands = self.bands[drug_id]
+        bands = bands[~np.isnan(bands[:, MIN_AGE])]
+        with np.errstate(invalid='ignore'):
+            lowest = np.fmax(bands[:, MIN_DOSE], bands[:, MIN_MG_PER_KG] * bands[:, MIN_WEIGHT])
+            highest = np.fmin(bands[:, MAX_DOSE], bands[:, MAX_MG_PER_KG] * bands[:, MAX_WEIGHT])
+        lowest = np.where(np.isnan(lowest), -np.inf, lowest)
+        highest = np.where(np.isnan(highest), np.inf, highest)
+        return float(lowest.min()), float(highest.max())
+    
+    def check_batch(self, weights, ages, drug_ids, doses) -> 'np.ndarray':
+        """
+        Verifica N prescrições de uma vez: pesos (kg), idades (anos), ids
+        dos medicamentos e doses (mg). Retorna a máscara das violações:
+        True onde a dose está fora dos limites da faixa do paciente, o
+        medicamento não consta da tabela (id -1 ou qualquer id fora dela)
+        ou nenhuma faixa serve.
+        """
+        weights = np.asarray(weights, dtype=np.float64)
+        ages = np.asarray(ages, dtype=np.float64)
+        doses = np.asarray(doses, dtype=np.float64)
+        drug_ids = np.asarray(drug_ids, dtype=np.intp)
+        empty = len(self.names)  # Linha vazia: nenhuma faixa serve
+        drug_ids = np.where((drug_ids >= 0) & (drug_ids < empty), drug_ids, empty)
+        fields = self.fields
+        
+        # Primeira faixa de cada linha que contém a idade e o peso do paciente (N x faixas)
+        column_ages = ages[:, None]
+        column_weights = weights[:, None]
+        matches = ((fields[MIN_AGE][drug_ids] <= column_ages) & (column_ages < fields[MAX_AGE][drug_ids]) &
+                   (fields[MIN_WEIGHT][drug_ids] <= column_weights) &
+                   (column_weights < fields[MAX_WEIGHT][drug_ids]))
+        bands = drug_ids * fields.shape[2] + matches.argmax(axis=1)
+        limits = fields.reshape(len(fields), -1)[:, bands]  # campos x N
+        
+        # fmax/fmin ignoram os NaN dos limites omitidos; uma comparação com NaN é falsa
+        lowest = np.fmax(limits[MIN_DOSE], limits[MIN_MG_PER_KG] * weights)
+        highest = np.fmin(limits[MAX_DOSE], limits[MAX_MG_PER_KG] * weights)
+        return ~matches.any(axis=1) | (doses < lowest) | (doses > highest)
+    
+    def verify_dosage(self, weight, age, drug, dose) -> bool:
+        """
+        Implementação de verify_dosage: True se a dose (mg) de drug, pelo
+        nome ou pelo id, está dentro dos limites para o peso (kg) e a idade
+        (anos) do paciente, com o mesmo resultado de check_batch.
+        """
+        drug_id = self.drug_id(drug) if isinstance(drug, str) else drug
+        if drug_id is None or not 0 <= drug_id < len(self.names):
+            return False
+        for band in self.band_lists[drug_id]:
+            # Como em check_batch, comparações com os NaN dos limites omitidos são falsas
+            if band[MIN_AGE] <= age < band[MAX_AGE] and band[MIN_WEIGHT] <= weight < band[MAX_WEIGHT]:
+                return not (dose < band[MIN_DOSE] or dose < band[MIN_MG_PER_KG] * weight or
+                            dose > band[MAX_DOSE] or dose > band[MAX_MG_PER_KG] * weight)
+        return False
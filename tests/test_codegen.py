@@ -0,0 +1,86 @@
+"""Testes da geração de código: o IR produzido precisa ser aceito pelo llvm-as."""
+
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_compiler import Scanner, Parser, SemanticAnalyzer, LLVMCodeGenerator, Optimizer, IRPrinter
+
+
+def analyze(source):
+    """AST e erros semânticos de source."""
+    ast = Parser(Scanner(source).iter_tokens()).parse()
+    return ast, SemanticAnalyzer().visit(ast)
+
+
+def compile_ir(source, optimize=True):
+    """Texto LLVM de source, que não pode ter erros semânticos."""
+    ast, errors = analyze(source)
+    if errors:
+        raise AssertionError(f"Erros semânticos: {errors}")
+    module = LLVMCodeGenerator().generate(ast)
+    if optimize:
+        module = Optimizer(module).optimize()
+    return IRPrinter().print_module(module)
+
+
+@unittest.skipIf(shutil.which('llvm-as') is None, "llvm-as não encontrado")
+class LLVMAssemblyTest(unittest.TestCase):
+    def assert_assembles(self, source):
+        """Verifica, com e sem otimização, que o llvm-as aceita o IR de source."""
+        for optimize in (True, False):
+            ir = compile_ir(source, optimize)
+            result = subprocess.run(['llvm-as', '-o', os.devnull], input=ir,
+                                    capture_output=True, text=True)
+            self.assertEqual(result.returncode, 0, f"{result.stderr}\n{ir}")
+
+    def test_scalar_assigned_to_compound(self):
+        self.assert_assembles(
+            "x : mmHg = 140/90mmHg;\n"
+            "procedure f(p : float) {\n"
+            "    y : mmHg = 140/90mmHg;\n"
+            "    y = 130;\n"
+            "    y = p;\n"
+            "    x = 130;\n"
+            "}\n"
+        )
+
+    def test_compound_with_constant(self):
+        self.assert_assembles(
+            "bp = 150/95;\n"
+            "procedure f() {\n"
+            "    z : mmHg = bp - 10;\n"
+            "    if (z > 120/80mmHg) { z = 135/85mmHg; }\n"
+            "}\n"
+        )
+
+
+class ConstantPoolTest(unittest.TestCase):
+    def test_folded_date_text_is_removed(self):
+        source = 'd = 2024-01-15;\nlabel = "alto";\n'
+        self.assertIn('2024-01-15', compile_ir(source, optimize=False))
+        ir = compile_ir(source)
+        self.assertNotIn('2024-01-15', ir)
+        self.assertIn('alto', ir)
+
+
+class CompoundMeasureTest(unittest.TestCase):
+    def test_compound_into_scalar_declaration(self):
+        _, errors = analyze("h : float = 10/2;\nn : int = 120/80;\n")
+        self.assertEqual(len(errors), 2)
+
+    def test_compound_with_scalar_operand(self):
+        _, errors = analyze("w : kg = 70;\nbp = w * 15/2;\n")
+        self.assertIn("Medida composta operada com um valor escalar em '*'", errors)
+
+    def test_compound_assigned_to_scalar(self):
+        _, errors = analyze("procedure f(p : float) { p = 140/90mmHg; }\n")
+        self.assertIn("Medida composta atribuída a um valor escalar", errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
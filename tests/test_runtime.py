@@ -0,0 +1,36 @@
+"""Testes das bases clínicas da biblioteca de execução."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from charcot_runtime import InteractionDatabase
+
+
+class InteractionDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.database = InteractionDatabase([
+            ('varfarina', 'aspirina', 'grave'),
+            ('varfarina', 'ibuprofeno', 'grave'),
+            ('lisinopril', 'ibuprofeno', 'moderada'),
+        ])
+
+    def test_ids_are_alphabetical(self):
+        self.assertEqual(self.database.names, ['aspirina', 'ibuprofeno', 'lisinopril', 'varfarina'])
+
+    def test_known_drug(self):
+        medications = ['aspirina', 'lisinopril']
+        self.assertFalse(self.database.verify_interaction(medications, 'varfarina'))
+        self.assertEqual(self.database.check(medications, 'varfarina'), [('aspirina', 'grave')])
+
+    def test_out_of_range_ids_are_unknown_drugs(self):
+        medications = ['aspirina', 'lisinopril']
+        for drug_id in (-1, len(self.database.names), 99):
+            self.assertTrue(self.database.verify_interaction(medications, drug_id))
+            self.assertEqual(self.database.check(medications, drug_id), [])
+
+
+if __name__ == '__main__':
+    unittest.main()